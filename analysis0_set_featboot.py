@@ -5,6 +5,7 @@ from sklearn.svm import SVC
 
 from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
 from utils.load_dataset import find_datasets
+from utils.results_loader import load_raw_results
 
 
 DATASETS_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)), 'datasets/set_params')
@@ -30,28 +31,14 @@ n_repeats = 5
 n_folds = n_splits * n_repeats
 n_methods = len(methods) * len(base_estimator)
 n_metrics = len(metrics_alias)
-data_np = np.zeros((n_datasets, n_metrics, n_methods, n_folds))
-mean_scores_fold = np.zeros((n_datasets, n_metrics, n_methods))
-stds = np.zeros((n_datasets, n_metrics, n_methods))
-
-# Load data from file
-datasets = []
-for dataset_id, dataset in enumerate(find_datasets(DATASETS_DIR)):
-    datasets.append(dataset)
+# Load data from files - all results are read in one pass and cached in results/experiment0_set_featboot/cache
+datasets = list(find_datasets(DATASETS_DIR))
+data_np = load_raw_results("experiment0_set_featboot", datasets, methods, metrics_alias, n_folds)
+mean_scores_fold = np.mean(data_np, axis=3)
+stds = np.std(data_np, axis=3)
+for dataset_id, dataset in enumerate(datasets):
     for clf_id, clf_name in enumerate(methods):
-        for metric_id, metric in enumerate(metrics_alias):
-            try:
-                filename = "results/experiment0_set_featboot/raw_results/%s/%s/%s.csv" % (metric, dataset, clf_name)
-                scores = np.genfromtxt(filename, delimiter=',', dtype=np.float32)
-                data_np[dataset_id, metric_id, clf_id] = scores
-                mean_score = np.mean(scores)
-                mean_scores_fold[dataset_id, metric_id, clf_id] = mean_score
-                std = np.std(scores)
-                stds[dataset_id, metric_id, clf_id] = std
-                if metric == "F1score":
-                    print(dataset, clf_name, metric, mean_score)
-            except:
-                print("Error loading data!")
+        print(dataset, clf_name, "F1score", mean_scores_fold[dataset_id, metrics_alias.index("F1score"), clf_id])
 
 
 mean_scores_ds = np.mean(mean_scores_fold, axis=0)
@@ -9,6 +9,7 @@ from methods.moo_ensemble_bootstrap_pruned import MooEnsembleSVCbootstrapPruned
 from methods.random_subspace_ensemble import RandomSubspaceEnsemble
 from methods.feature_selection_clf import FeatueSelectionClf
 from utils.load_dataset import find_datasets
+from utils.results_loader import load_raw_results, load_diversity_results
 from utils.plots import scatter_pareto_chart, scatter_plot, diversity_bar_plot
 from utils.wilcoxon_ranking_grid_all import pairs_metrics_multi_grid_all
 from utils.wilcoxon_ranking_grid import pairs_metrics_multi_grid
@@ -49,44 +50,13 @@ n_metrics = len(metrics_alias)
 DATASETS_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)), 'datasets/9higher')
 n_datasets = len(list(enumerate(find_datasets(DATASETS_DIR))))
 
-data_np = np.zeros((n_datasets, n_metrics, n_methods, n_folds))
-mean_scores = np.zeros((n_datasets, n_metrics, n_methods))
-stds = np.zeros((n_datasets, n_metrics, n_methods))
-diversity = np.zeros((n_datasets, 4, n_folds, len(diversity_measures)))
-
-datasets = []
-for dataset_id, dataset in enumerate(find_datasets(DATASETS_DIR)):
-    datasets.append(dataset)
-    for clf_id, clf_name in enumerate(methods):
-        for metric_id, metric in enumerate(metrics_alias):
-            try:
-                filename = "results/experiment_server/experiment5_cross_val_in_opt_9h/raw_results/%s/%s/%s.csv" % (metric, dataset, clf_name)
-                if not os.path.isfile(filename):
-                    # print("File not exist - %s" % filename)
-                    continue
-                scores = np.genfromtxt(filename, delimiter=',', dtype=np.float32)
-                data_np[dataset_id, metric_id, clf_id] = scores
-                mean_score = np.mean(scores)
-                mean_scores[dataset_id, metric_id, clf_id] = mean_score
-                std = np.std(scores)
-                stds[dataset_id, metric_id, clf_id] = std
-            except:
-                print("Error loading data!", dataset, clf_name, metric)
-
-            for div_measure_id, div_measure in enumerate(diversity_measures):
-                try:
-                    filename = "results/experiment_server/experiment5_cross_val_in_opt_9h/diversity_results/%s/%s.csv" % (dataset, clf_name)
-                    if not os.path.isfile(filename):
-                        # print("File not exist - %s" % filename)
-                        continue
-                    diversity_raw = np.genfromtxt(filename, delimiter=' ', dtype=np.float32)
-                    if np.isnan(diversity_raw).all():
-                        pass
-                    else:
-                        diversity_raw = np.nan_to_num(diversity_raw)
-                        diversity[dataset_id, clf_id] = diversity_raw
-                except:
-                    print("Error loading diversity data!", dataset, clf_name, div_measure)
+# Load data from files - all results are read in one pass and cached in results/experiment_server/experiment5_cross_val_in_opt_9h/cache
+datasets = list(find_datasets(DATASETS_DIR))
+data_np = load_raw_results("experiment_server/experiment5_cross_val_in_opt_9h", datasets, methods, metrics_alias, n_folds)
+mean_scores = np.mean(data_np, axis=3)
+stds = np.std(data_np, axis=3)
+# Diversity of the ensemble methods
+diversity = load_diversity_results("experiment_server/experiment5_cross_val_in_opt_9h", datasets, list(methods)[:4], n_folds, n_measures=len(diversity_measures))
 
 diversity_m = np.mean(diversity, axis=2)
 diversity_mean = np.mean(diversity_m, axis=0)
@@ -0,0 +1,61 @@
+import sys
+import warnings
+
+from sklearn.svm import SVC
+from sklearn.feature_selection import chi2
+
+from utils.benchmark import run_benchmark, append_history, load_baseline, save_baseline, find_regressions
+from methods.moo_ensemble_SW import MooEnsembleSVC
+from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
+from methods.moo_ensemble_bootstrap_pruned import MooEnsembleSVCbootstrapPruned
+from methods.random_subspace_ensemble import RandomSubspaceEnsemble
+from methods.feature_selection_clf import FeatueSelectionClf
+
+# Benchmark of fit and predict of all methods on fixed datasets, results are appended to benchmarks/history.jsonl
+# and compared with benchmarks/baseline.json
+#   python benchmark.py                  - run and report regressions against the baseline
+#   python benchmark.py --save-baseline  - run and save the results as the new baseline
+warnings.filterwarnings("ignore")
+
+HISTORY_FILE = "benchmarks/history.jsonl"
+BASELINE_FILE = "benchmarks/baseline.json"
+
+# Fixed, small budget of the optimization, so the benchmark takes minutes, not hours. Prediction cache is off,
+# every predict call is measured
+base_estimator = SVC(probability=True)
+moo_params = dict(cross_val=True, n_eval=100, p_size=20, prediction_cache_size=0)
+methods = {
+    "MooEnsembleSVC": MooEnsembleSVC(base_classifier=base_estimator, **moo_params),
+    "MooEnsembleSVCbootstrap": MooEnsembleSVCbootstrap(base_classifier=base_estimator, n_repeats=2, **moo_params),
+    "MooEnsembleSVCbootstrapPruned": MooEnsembleSVCbootstrapPruned(base_classifier=base_estimator, n_repeats=2, **moo_params),
+    "RandomSubspace": RandomSubspaceEnsemble(base_classifier=base_estimator, prediction_cache_size=0),
+    "FS": FeatueSelectionClf(base_estimator, chi2),
+}
+datasets = [
+    "datasets/9lower/glass1.dat",
+    "datasets/9higher/yeast-2_vs_4.dat",
+    # Synthetic datasets of growing size: n_samples x n_features
+    "synthetic:500x20",
+    "synthetic:2000x20",
+]
+
+# Cases run in spawned processes, which import this module again without running the benchmark
+if __name__ == "__main__":
+    results = run_benchmark(methods, datasets)
+    append_history(HISTORY_FILE, results)
+    for result in results:
+        if result["status"] == "ok":
+            eval_per_s = "-" if result["eval_per_s"] is None else "%.1f" % result["eval_per_s"]
+            print("%-30s %-20s fit %8.2f [s]  predict %8.4f [s]  RSS %7.1f [MB]  eval/s %6s  BAC %.3f" % (result["method"], result["dataset"], result["fit_time"], result["predict_time"], result["peak_rss_mb"], eval_per_s, result["bac"]))
+        else:
+            print("%-30s %-20s ERROR %s" % (result["method"], result["dataset"], result["error"]))
+
+    if "--save-baseline" in sys.argv:
+        save_baseline(BASELINE_FILE, results)
+        print("Baseline saved to %s" % BASELINE_FILE)
+    else:
+        regressions = find_regressions(results, load_baseline(BASELINE_FILE))
+        for method_name, dataset, measure, reference, value in regressions:
+            print("REGRESSION: %s - %s - %s: %s -> %s" % (method_name, dataset, measure, reference, value))
+        if regressions:
+            sys.exit(1)
@@ -14,6 +14,7 @@ from sklearn.preprocessing import MinMaxScaler
 from sklearn.feature_selection import chi2
 
 from utils.load_dataset import load_data, find_datasets
+from utils.pareto_store import ParetoWriter, pareto_filename
 from methods.moo_ensemble import MooEnsembleSVC
 from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
 from methods.random_subspace_ensemble import RandomSubspaceEnsemble
@@ -26,7 +27,7 @@ logging.info("-------                        NEW EXPERIMENT
 logging.info("--------------------------------------------------------------------------------")
 
 
-def compute(dataset_id, dataset, methods, n_folds, metrics, metrics_alias, n_rows_p):
+def compute(dataset_id, dataset, methods, n_folds, metrics, metrics_alias):
     logging.basicConfig(filename='textinfo/experiment0_set_crossmut.log', filemode="a", format='%(asctime)s - %(levelname)s: %(message)s', level='DEBUG')
     try:
         warnings.filterwarnings("ignore")
@@ -42,7 +43,8 @@ def compute(dataset_id, dataset, methods, n_folds, metrics, metrics_alias, n_row
 
         scores = np.zeros((len(metrics), len(methods), n_folds))
         diversity = np.zeros((len(methods), n_folds, 4))
-        pareto_solutions = np.zeros((n_folds, n_rows_p, 2))
+        # Pareto fronts of all folds, one writer per method
+        pareto_writers = {}
 
         for fold_id, (train, test) in enumerate(rskf.split(X, y)):
             X_train, X_test = X[train], X[test]
@@ -65,9 +67,7 @@ def compute(dataset_id, dataset, methods, n_folds, metrics, metrics_alias, n_row
                     diversity[clf_id, fold_id] = None
 
                 if hasattr(clf, 'solutions'):
-                    for sol_id, solution in enumerate(clf.solutions):
-                        for s_id, s in enumerate(solution):
-                            pareto_solutions[fold_id, sol_id, s_id] = s
+                    pareto_writers.setdefault(clf_name, ParetoWriter(n_folds)).add(fold_id, clf.solutions, getattr(clf, "pareto_set", None))
         # Save results to csv
         for clf_id, clf_name in enumerate(methods):
             for metric_id, metric in enumerate(metrics_alias):
@@ -81,14 +81,9 @@ def compute(dataset_id, dataset, methods, n_folds, metrics, metrics_alias, n_row
             if not os.path.exists("results/experiment0_set_crossmut/diversity_results/%s/" % (dataset)):
                 os.makedirs("results/experiment0_set_crossmut/diversity_results/%s/" % (dataset))
             np.savetxt(fname=filename, fmt="%f", X=diversity[clf_id, :, :])
-        # Save results pareto_solutions to csv
-        for fold_id in range(n_folds):
-            for sol_id in range(n_rows_p):
-                if (pareto_solutions[fold_id, sol_id, 0] != 0.0) and (pareto_solutions[fold_id, sol_id, 1] != 0.0):
-                    filename_pareto = "results/experiment0_set_crossmut/pareto_raw/%s/fold%d/sol%d.csv" % (dataset, fold_id, sol_id)
-                    if not os.path.exists("results/experiment0_set_crossmut/pareto_raw/%s/fold%d/" % (dataset, fold_id)):
-                        os.makedirs("results/experiment0_set_crossmut/pareto_raw/%s/fold%d/" % (dataset, fold_id))
-                    np.savetxt(fname=filename_pareto, fmt="%f", X=pareto_solutions[fold_id, sol_id, :])
+        # Save pareto fronts - one file with all folds and solutions for each method
+        for clf_name, pareto_writer in pareto_writers.items():
+            pareto_writer.save(pareto_filename("experiment0_set_crossmut", dataset, clf_name))
 
         end = time.time() - start
         logging.info("DONE - %s (Time: %d [s])" % (dataset, end))
@@ -138,12 +133,10 @@ DATASETS_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)), 'datase
 metrics = [sl.metrics.balanced_accuracy_score, sl.metrics.geometric_mean_score_1, sl.metrics.geometric_mean_score_2, sl.metrics.f1_score, sl.metrics.recall, sl.metrics.specificity, sl.metrics.precision]
 metrics_alias = ["BAC", "Gmean", "Gmean2", "F1score", "Recall", "Specificity", "Precision"]
 
-n_rows_p = 100
-
 # Multithread; n_jobs - number of threads, where -1 all threads, safe for my computer 2
 Parallel(n_jobs=-1)(
                 delayed(compute)
-                (dataset_id, dataset, methods, n_folds, metrics, metrics_alias, n_rows_p)
+                (dataset_id, dataset, methods, n_folds, metrics, metrics_alias)
                 for dataset_id, dataset in enumerate(find_datasets(DATASETS_DIR))
                 )
 
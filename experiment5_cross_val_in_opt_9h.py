@@ -3,7 +3,6 @@ import strlearn as sl
 import warnings
 import os
 import time
-from joblib import Parallel, delayed
 import logging
 import traceback
 
@@ -14,6 +13,9 @@ from sklearn.preprocessing import MinMaxScaler
 from sklearn.feature_selection import chi2
 
 from utils.load_dataset import load_data, find_datasets
+from utils.pareto_store import ParetoWriter, pareto_filename
+from utils.checkpoint import Checkpoint
+from utils.scheduler import Task, TaskTimings, task_costs, run_tasks
 from methods.moo_ensemble_SW import MooEnsembleSVC
 from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
 from methods.moo_ensemble_bootstrap_pruned import MooEnsembleSVCbootstrapPruned
@@ -42,8 +44,6 @@ DATASETS_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)), 'datase
 metrics = [sl.metrics.balanced_accuracy_score, sl.metrics.geometric_mean_score_1, sl.metrics.geometric_mean_score_2, sl.metrics.f1_score, sl.metrics.recall, sl.metrics.specificity, sl.metrics.precision]
 metrics_alias = ["BAC", "Gmean", "Gmean2", "F1score", "Recall", "Specificity", "Precision"]
 
-n_rows_p = 1000
-
 if not os.path.exists("textinfo/"):
     os.makedirs("textinfo/")
 logging.basicConfig(filename='textinfo/experiment5_cross_val_in_opt_9h.log', filemode="a", format='%(asctime)s - %(levelname)s: %(message)s', level='DEBUG')
@@ -52,88 +52,138 @@ logging.info("-------                        NEW EXPERIMENT
 logging.info("--------------------------------------------------------------------------------")
 
 
-def compute(dataset_id, dataset):
+# Data of one fold, folds of the Repeated Stratified K-Fold are the same in every worker (random_state=1234)
+def load_fold(dataset, fold_id):
+    dataset_path = "datasets/9higher/" + dataset + ".dat"
+    X, y, classes = load_data(dataset_path)
+    X = X.to_numpy()
+    # Normalization - transform data to [0, 1]
+    X = MinMaxScaler().fit_transform(X, y)
+    train, test = list(rskf.split(X, y))[fold_id]
+    return X[train], X[test], y[train], y[test]
+
+
+# One method on one fold of one dataset, the result goes to the checkpoint of the dataset
+def compute(task):
     logging.basicConfig(filename='textinfo/experiment5_cross_val_in_opt_9h.log', filemode="a", format='%(asctime)s - %(levelname)s: %(message)s', level='DEBUG')
+    dataset, fold_id, clf_name = task
     try:
         warnings.filterwarnings("ignore")
-        print("START: %s" % (dataset))
-        logging.info("START - %s" % (dataset))
+        # Finished units are saved in the checkpoint, so the interrupted experiment is resumed
+        checkpoint = Checkpoint("results/experiment5_cross_val_in_opt_9h/checkpoints/%s" % (dataset))
+        if checkpoint.is_done() or checkpoint.load(fold_id, clf_name) is not None:
+            return None
+        logging.info("START - %s - fold %d - %s" % (dataset, fold_id, clf_name))
         start = time.time()
 
-        dataset_path = "datasets/9higher/" + dataset + ".dat"
-        X, y, classes = load_data(dataset_path)
-        X = X.to_numpy()
-        # Normalization - transform data to [0, 1]
-        X = MinMaxScaler().fit_transform(X, y)
-
-        scores = np.zeros((len(metrics), len(methods), n_folds))
-        diversity = np.zeros((len(methods), n_folds, 4))
-        pareto_solutions = np.zeros((len(methods), n_folds, n_rows_p, 2))
-
-        for fold_id, (train, test) in enumerate(rskf.split(X, y)):
-            X_train, X_test = X[train], X[test]
-            y_train, y_test = y[train], y[test]
-
+        X_train, X_test, y_train, y_test = load_fold(dataset, fold_id)
+        if clf_name == "FSIRSVM":
             IR = {}
             for class_num in set(y_train):
                 IR[class_num] = np.sum(y_train == class_num)
-            methods["FSIRSVM"] = FeatueSelectionClf(SVC(kernel='linear', class_weight=IR), chi2)
-
-            for clf_id, clf_name in enumerate(methods):
-                clf = clone(methods[clf_name])
-                clf.fit(X_train, y_train)
-                y_pred = clf.predict(X_test)
-                for metric_id, metric in enumerate(metrics):
-                    scores[metric_id, clf_id, fold_id] = metric(y_test, y_pred)
-                    # print(fold_id, clf_name, metric, scores[metric_id, clf_id, fold_id])
-                calculate_diversity = getattr(clf, "calculate_diversity", None)
-                if callable(calculate_diversity):
-                    diversity[clf_id, fold_id] = clf.calculate_diversity()
-                else:
-                    diversity[clf_id, fold_id] = None
-
-                if hasattr(clf, 'solutions'):
-                    for sol_id, solution in enumerate(clf.solutions):
-                        for s_id, s in enumerate(solution):
-                            pareto_solutions[clf_id, fold_id, sol_id, s_id] = s
-        # Save results to csv
-        for clf_id, clf_name in enumerate(methods):
-            for metric_id, metric in enumerate(metrics_alias):
-                # Save metric results
-                filename = "results/experiment5_cross_val_in_opt_9h/raw_results/%s/%s/%s.csv" % (metric, dataset, clf_name)
-                if not os.path.exists("results/experiment5_cross_val_in_opt_9h/raw_results/%s/%s/" % (metric, dataset)):
-                    os.makedirs("results/experiment5_cross_val_in_opt_9h/raw_results/%s/%s/" % (metric, dataset))
-                np.savetxt(fname=filename, fmt="%f", X=scores[metric_id, clf_id, :])
-            # Save diversity results
-            filename = "results/experiment5_cross_val_in_opt_9h/diversity_results/%s/%s.csv" % (dataset, clf_name)
-            if not os.path.exists("results/experiment5_cross_val_in_opt_9h/diversity_results/%s/" % (dataset)):
-                os.makedirs("results/experiment5_cross_val_in_opt_9h/diversity_results/%s/" % (dataset))
-            np.savetxt(fname=filename, fmt="%f", X=diversity[clf_id, :, :])
-
-        # Save results pareto_solutions to csv
-        for clf_id, clf_name in enumerate(methods):
-            for fold_id in range(n_folds):
-                for sol_id in range(n_rows_p):
-                    if (pareto_solutions[clf_id, fold_id, sol_id, 0] != 0.0) and (pareto_solutions[clf_id, fold_id, sol_id, 1] != 0.0):
-                        filename_pareto = "results/experiment5_cross_val_in_opt_9h/pareto_raw/%s/%s/fold%d/sol%d.csv" % (dataset, clf_name, fold_id, sol_id)
-                        if not os.path.exists("results/experiment5_cross_val_in_opt_9h/pareto_raw/%s/%s/fold%d/" % (dataset, clf_name, fold_id)):
-                            os.makedirs("results/experiment5_cross_val_in_opt_9h/pareto_raw/%s/%s/fold%d/" % (dataset, clf_name, fold_id))
-                        np.savetxt(fname=filename_pareto, fmt="%f", X=pareto_solutions[clf_id, fold_id, sol_id, :])
-
+            clf = FeatueSelectionClf(SVC(kernel='linear', class_weight=IR), chi2)
+        else:
+            clf = clone(methods[clf_name])
+        clf.fit(X_train, y_train)
+        y_pred = clf.predict(X_test)
+        scores = np.array([metric(y_test, y_pred) for metric in metrics])
+        calculate_diversity = getattr(clf, "calculate_diversity", None)
+        if callable(calculate_diversity):
+            diversity = np.array(clf.calculate_diversity(), dtype=float)
+        else:
+            diversity = np.full(4, np.nan)
+
+        # Time of the task is saved with its result, so it survives an interrupted run
         end = time.time() - start
-        logging.info("DONE - %s (Time: %d [s])" % (dataset, end))
-        print("DONE - %s (Time: %d [s])" % (dataset, end))
+        result = {"scores": scores, "diversity": diversity, "seconds": np.array(end)}
+        if hasattr(clf, 'solutions'):
+            result["solutions"] = clf.solutions
+            if getattr(clf, "pareto_set", None) is not None:
+                result["pareto_set"] = np.asarray(clf.pareto_set, dtype=float)
+        checkpoint.save(fold_id, clf_name, **result)
+        logging.info("DONE - %s - fold %d - %s (Time: %d [s])" % (dataset, fold_id, clf_name, end))
 
     except Exception as ex:
-        logging.exception("Exception in %s" % (dataset))
-        print("ERROR: %s" % (dataset))
+        logging.exception("Exception in %s - fold %d - %s" % (dataset, fold_id, clf_name))
+        print("ERROR: %s - fold %d - %s" % (dataset, fold_id, clf_name))
         traceback.print_exc()
         print(str(ex))
 
 
-# Multithread; n_jobs - number of threads, where -1 all threads, safe for my computer 2
-Parallel(n_jobs=-1)(
-                delayed(compute)
-                (dataset_id, dataset)
-                for dataset_id, dataset in enumerate(find_datasets(DATASETS_DIR))
-                )
+# Results of all tasks of the dataset from the checkpoint are saved to csv
+def collect(dataset):
+    checkpoint = Checkpoint("results/experiment5_cross_val_in_opt_9h/checkpoints/%s" % (dataset))
+    if checkpoint.is_done():
+        return
+
+    scores = np.zeros((len(metrics), len(methods), n_folds))
+    diversity = np.zeros((len(methods), n_folds, 4))
+    # Pareto fronts of all folds, one writer per method
+    pareto_writers = {}
+    seconds = []
+    for fold_id in range(n_folds):
+        for clf_id, clf_name in enumerate(methods):
+            result = checkpoint.load(fold_id, clf_name)
+            if result is None:
+                logging.info("INCOMPLETE - %s - fold %d - %s is missing" % (dataset, fold_id, clf_name))
+                print("INCOMPLETE: %s" % (dataset))
+                return
+            scores[:, clf_id, fold_id] = result["scores"]
+            diversity[clf_id, fold_id] = result["diversity"]
+            if "seconds" in result:
+                seconds.append((dataset, clf_name, float(result["seconds"])))
+            if "solutions" in result:
+                pareto_writers.setdefault(clf_name, ParetoWriter(n_folds)).add(fold_id, result["solutions"], result.get("pareto_set"))
+
+    # Save results to csv
+    for clf_id, clf_name in enumerate(methods):
+        for metric_id, metric in enumerate(metrics_alias):
+            # Save metric results
+            filename = "results/experiment5_cross_val_in_opt_9h/raw_results/%s/%s/%s.csv" % (metric, dataset, clf_name)
+            if not os.path.exists("results/experiment5_cross_val_in_opt_9h/raw_results/%s/%s/" % (metric, dataset)):
+                os.makedirs("results/experiment5_cross_val_in_opt_9h/raw_results/%s/%s/" % (metric, dataset))
+            np.savetxt(fname=filename, fmt="%f", X=scores[metric_id, clf_id, :])
+        # Save diversity results
+        filename = "results/experiment5_cross_val_in_opt_9h/diversity_results/%s/%s.csv" % (dataset, clf_name)
+        if not os.path.exists("results/experiment5_cross_val_in_opt_9h/diversity_results/%s/" % (dataset)):
+            os.makedirs("results/experiment5_cross_val_in_opt_9h/diversity_results/%s/" % (dataset))
+        np.savetxt(fname=filename, fmt="%f", X=diversity[clf_id, :, :])
+
+    # Save pareto fronts - one file with all folds and solutions for each method
+    for clf_name, pareto_writer in pareto_writers.items():
+        pareto_writer.save(pareto_filename("experiment5_cross_val_in_opt_9h", dataset, clf_name))
+
+    # Times of the tasks go to the timings before the checkpoints are removed
+    for task_time in seconds:
+        timings.record(*task_time)
+    timings.save()
+
+    # All results are saved, checkpoints of units are not needed anymore
+    checkpoint.finish()
+    logging.info("DONE - %s" % (dataset))
+    print("DONE - %s" % (dataset))
+
+
+# Tasks (dataset, fold, method) are run longest first - from the times of earlier runs, otherwise from the size
+# of the dataset. Rough relative costs of the methods, MOO ensembles fit hundreds of SVC
+method_weights = {
+    "MooEnsembleSVC_SW": 1000,
+    "MooEnsembleSVCbootstrap_SW": 5000,
+    "MooEnsembleSVCbootstrapPruned_SW": 5000,
+    "RandomSubspace": 10,
+}
+datasets = list(find_datasets(DATASETS_DIR))
+sizes = {}
+for dataset in datasets:
+    X, y, classes = load_data("datasets/9higher/" + dataset + ".dat")
+    sizes[dataset] = X.shape
+tasks = [Task(dataset, fold_id, clf_name) for dataset in datasets for fold_id in range(n_folds) for clf_name in methods]
+timings = TaskTimings("textinfo/experiment5_cross_val_in_opt_9h_timings.json")
+costs = task_costs(tasks, sizes, timings, method_weights)
+
+# Multiprocess; n_jobs - number of processes, where -1 all cores
+# Times of the tasks are kept in the checkpoints and moved to the timings by collect()
+run_tasks(compute, tasks, costs, n_jobs=-1)
+
+for dataset in datasets:
+    collect(dataset)
@@ -0,0 +1,60 @@
+import numpy as np
+from sklearn.svm import LinearSVC
+from sklearn.kernel_approximation import Nystroem
+
+
+class ApproximateKernel:
+    # Cheap fitness of SVC candidates: the RBF kernel of (C, gamma, selected features) is approximated by random
+    # Fourier features ("rff") or by the Nystroem method ("nystroem") with n_components features, and a linear SVM is
+    # trained on them. It costs O(n_samples * n_components) instead of the n_samples^2 kernel of the exact SVC,
+    # only the final members of the ensemble are exact SVC
+    def __init__(self, folds, method="rff", n_components=256, random_state=0, max_iter=1000):
+
+        # folds - list of (X_train, y_train, X_test, y_test)
+        self.folds = folds
+        self.method = method
+        self.n_components = n_components
+        self.random_state = random_state
+        self.max_iter = max_iter
+        # Frequencies for gamma=1/2 and phases of the random Fourier features, the same for all candidates,
+        # so candidates are not ranked by the noise of different random features
+        random_state = np.random.RandomState(random_state)
+        self.frequencies = random_state.normal(size=(folds[0][0].shape[1], n_components))
+        self.phases = random_state.uniform(0, 2 * np.pi, size=n_components)
+
+    # Random Fourier features of RBF with gamma: sqrt(2 / D) * cos(sqrt(2 * gamma) * x W + b), W ~ N(0, I)
+    def rff(self, projection, gamma):
+        return np.sqrt(2 / self.n_components) * np.cos(np.sqrt(2 * gamma) * projection + self.phases)
+
+    # Features (train, test) of every pair of hyperparameters (C, gamma) with the selected features of the fold
+    def transform(self, fold_id, selected_features, params):
+        X_train, _, X_test, _ = self.folds[fold_id]
+        selected = np.flatnonzero(selected_features)
+        X_train, X_test = X_train[:, selected], X_test[:, selected]
+        if self.method == "rff":
+            # Projection on the frequencies is shared by all gammas of the group
+            projection_train = X_train @ self.frequencies[selected]
+            projection_test = X_test @ self.frequencies[selected]
+            for C, gamma in params:
+                yield self.rff(projection_train, gamma), self.rff(projection_test, gamma)
+        elif self.method == "nystroem":
+            for C, gamma in params:
+                nystroem = Nystroem(gamma=gamma, n_components=min(self.n_components, X_train.shape[0]), random_state=self.random_state)
+                yield nystroem.fit_transform(X_train), nystroem.transform(X_test)
+        else:
+            raise ValueError("Unknown kernel approximation: %s" % self.method)
+
+    # Predictions on the test part of the fold for every pair of hyperparameters (C, gamma), like KernelEngine
+    def fit_predict(self, estimator, fold_id, selected_features, params):
+        _, y_train, _, _ = self.folds[fold_id]
+        class_weight = estimator.get_params().get("class_weight")
+        predictions = []
+        for (C, gamma), (Z_train, Z_test) in zip(params, self.transform(fold_id, selected_features, params)):
+            # With small gamma the features are almost constant: they are centered and scaled by 1/sqrt(gamma),
+            # which gives the same linear SVM with C * gamma, but much better conditioned for liblinear
+            mean = Z_train.mean(axis=0)
+            scale = 1 / np.sqrt(gamma)
+            clf = LinearSVC(C=C * gamma, dual=False, class_weight=class_weight, max_iter=self.max_iter, random_state=self.random_state)
+            clf.fit((Z_train - mean) * scale, y_train)
+            predictions.append(clf.predict((Z_test - mean) * scale))
+        return predictions
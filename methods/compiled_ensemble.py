@@ -0,0 +1,112 @@
+import os
+import json
+import numpy as np
+
+from methods.svc_kernels import is_batchable, squared_distances, platt_proba, unique_support_vectors
+
+
+# Export of a trained ensemble (MooEnsembleSVC, MooEnsembleSVCbootstrap, MooEnsembleSVCbootstrapPruned) to a
+# directory of flat .npy files: support vectors, dual coefficients, gammas, intercepts, Platt parameters and
+# feature masks. Members with the same selected features share one block of support vectors
+def export_ensemble(estimator, path):
+    if not all(is_batchable(member_clf) for member_clf in estimator.ensemble):
+        raise ValueError("Only binary SVC members with kernel='rbf' and probability=True can be exported")
+
+    feature_masks = np.array(estimator.selected_features, dtype=bool)
+    group_features, member_group = np.unique(feature_masks, axis=0, return_inverse=True)
+    member_group = member_group.ravel()
+
+    group_vectors, group_n_vectors = [], []
+    member_columns = [None] * len(estimator.ensemble)
+    for group_id in range(group_features.shape[0]):
+        members = np.flatnonzero(member_group == group_id)
+        unique_vectors, columns = unique_support_vectors([estimator.ensemble[member_id] for member_id in members])
+        group_vectors.append(unique_vectors.ravel())
+        group_n_vectors.append(unique_vectors.shape[0])
+        for member_id, member_column in zip(members, columns):
+            member_columns[member_id] = member_column
+
+    arrays = {
+        "classes": np.asarray(estimator.classes_),
+        "group_features": group_features,
+        "group_n_vectors": np.array(group_n_vectors, dtype=np.int64),
+        "group_vectors": np.concatenate(group_vectors).astype(np.float64),
+        "member_group": member_group.astype(np.int64),
+        "member_n_vectors": np.array([columns.shape[0] for columns in member_columns], dtype=np.int64),
+        "member_columns": np.concatenate(member_columns).astype(np.int64),
+        "dual_coef": np.concatenate([member_clf.dual_coef_[0] for member_clf in estimator.ensemble]).astype(np.float64),
+        "gamma": np.array([member_clf.gamma for member_clf in estimator.ensemble], dtype=np.float64),
+        "intercept": np.array([member_clf.intercept_[0] for member_clf in estimator.ensemble], dtype=np.float64),
+        "prob_a": np.array([member_clf.probA_[0] for member_clf in estimator.ensemble], dtype=np.float64),
+        "prob_b": np.array([member_clf.probB_[0] for member_clf in estimator.ensemble], dtype=np.float64),
+    }
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + ".npy"), array)
+    with open(os.path.join(path, "meta.json"), "w") as file:
+        json.dump({"predict_decision": estimator.predict_decision, "n_features": int(feature_masks.shape[1])}, file)
+
+
+class CompiledEnsemble:
+    # NumPy only predictor of the exported ensemble, arrays are memory-mapped (mmap_mode=None loads them to memory)
+    def __init__(self, path, mmap_mode="r"):
+        with open(os.path.join(path, "meta.json")) as file:
+            meta = json.load(file)
+        self.predict_decision = meta["predict_decision"]
+        self.n_features = meta["n_features"]
+
+        def load(name):
+            return np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+        self.classes_ = np.load(os.path.join(path, "classes.npy"), allow_pickle=True)
+        self.gamma = load("gamma")
+        self.intercept = load("intercept")
+        self.prob_a = load("prob_a")
+        self.prob_b = load("prob_b")
+        group_features = load("group_features")
+        group_n_vectors = load("group_n_vectors")
+        group_vectors = load("group_vectors")
+        member_group = load("member_group")
+        member_n_vectors = load("member_n_vectors")
+        member_columns = load("member_columns")
+        dual_coef = load("dual_coef")
+
+        # Everything needed at prediction time is prepared once per group of members: feature indexes,
+        # support vectors (views of the memory-mapped file), columns, gammas and dual coefficients of members
+        self.groups = []
+        # Blocks of support vectors have different numbers of features, so starts are counted in elements
+        group_sizes = group_n_vectors * np.sum(group_features, axis=1)
+        vector_starts = np.concatenate([[0], np.cumsum(group_sizes)])
+        column_starts = np.concatenate([[0], np.cumsum(member_n_vectors)])
+        for group_id, features in enumerate(group_features):
+            feature_index = np.flatnonzero(features)
+            vectors = group_vectors[vector_starts[group_id]:vector_starts[group_id + 1]].reshape(-1, feature_index.shape[0])
+            members = np.flatnonzero(member_group == group_id)
+            columns = np.concatenate([member_columns[column_starts[m]:column_starts[m + 1]] for m in members])
+            coef = np.concatenate([dual_coef[column_starts[m]:column_starts[m + 1]] for m in members])
+            gammas = np.repeat(self.gamma[members], member_n_vectors[members])
+            # Start of every member in the columns of the group, for np.add.reduceat
+            segments = np.concatenate([[0], np.cumsum(member_n_vectors[members])[:-1]])
+            self.groups.append((feature_index, np.asarray(vectors), members, columns, gammas, coef, segments))
+
+    def decision_function_members(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        decision = np.empty((self.gamma.shape[0], X.shape[0]))
+        for feature_index, vectors, members, columns, gammas, coef, segments in self.groups:
+            distances = squared_distances(X[:, feature_index], vectors)
+            kernel = np.exp(-distances[:, columns] * gammas) * coef
+            decision[members] = np.add.reduceat(kernel, segments, axis=1).T + self.intercept[members][:, np.newaxis]
+        return decision
+
+    def ensemble_support_matrix(self, X):
+        decision = self.decision_function_members(X)
+        return platt_proba(decision, self.prob_a[:, np.newaxis], self.prob_b[:, np.newaxis])
+
+    def predict_proba(self, X):
+        return np.mean(self.ensemble_support_matrix(X), axis=0)
+
+    def predict(self, X):
+        if self.predict_decision == "MV":
+            # Members predict the second class for the positive decision function, as SVC.predict()
+            votes = np.mean(self.decision_function_members(X) > 0, axis=0)
+            return self.classes_[(votes > 0.5).astype(int)]
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
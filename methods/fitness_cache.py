@@ -0,0 +1,38 @@
+import numpy as np
+from collections import OrderedDict
+
+
+class FitnessCache:
+    # Bounded LRU cache of candidate scores (precision, recall) for one optimization problem
+    def __init__(self, max_size=10000, decimals=3):
+        self.max_size = max_size
+        # C and gamma are quantized in log10 scale, e.g. decimals=3 means ~0.2% relative tolerance
+        self.decimals = decimals
+        self.scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # Key: quantized C, quantized gamma and packed binary vector of selected features
+    def key(self, C, gamma, selected_features):
+        return (round(float(np.log10(C)), self.decimals),
+                round(float(np.log10(gamma)), self.decimals),
+                np.packbits(np.asarray(selected_features, dtype=bool)).tobytes())
+
+    def get(self, key):
+        scores = self.scores.get(key)
+        if scores is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # The most recently used key goes to the end, the least recently used is evicted first
+        self.scores.move_to_end(key)
+        return scores
+
+    def put(self, key, scores):
+        self.scores[key] = np.array(scores, dtype=float)
+        self.scores.move_to_end(key)
+        while len(self.scores) > self.max_size:
+            self.scores.popitem(last=False)
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.scores), "max_size": self.max_size}
@@ -0,0 +1,82 @@
+import threading
+import numpy as np
+from scipy.stats import t as student_t
+
+
+# Scores are maximized: a point is dominated if a reference point is not worse in any and better in one objective
+def dominated(points, reference):
+    if reference.shape[0] == 0:
+        return np.zeros(points.shape[0], dtype=bool)
+    not_worse = np.all(reference[None, :, :] >= points[:, None, :], axis=2)
+    better = np.any(reference[None, :, :] > points[:, None, :], axis=2)
+    return np.any(not_worse & better, axis=1)
+
+
+class FoldRacing:
+    # Racing of the folds of the cross-validation: after min_folds folds a candidate whose upper confidence bound of the
+    # mean (precision, recall) is dominated by the archive of fully evaluated candidates is abandoned, its score is the
+    # lower confidence bound - a pessimistic estimate, which is dominated as well and never enters the archive.
+    # The archive is the non-dominated set of the full cross-validation scores of one optimization problem
+    def __init__(self, min_folds=2, confidence=0.95):
+        self.min_folds = min_folds
+        self.confidence = confidence
+        self.archive = np.zeros((0, 2))
+        self.n_candidates = 0
+        self.n_abandoned = 0
+        self.n_folds_run = 0
+        self.n_folds_total = 0
+        # merge_folds() of the problem runs in many threads with the threading backend
+        self.lock = threading.Lock()
+
+    # Worker processes get a copy without the lock
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    # Half width of the Student's t confidence interval of the mean scores (n_candidates x n_folds_run x objectives)
+    def half_width(self, scores):
+        n_folds = scores.shape[1]
+        return student_t.ppf(self.confidence, n_folds - 1) * scores.std(axis=1, ddof=1) / np.sqrt(n_folds)
+
+    # Undefined scores of a fold (precision without any positive prediction is NaN) count as 0
+    def upper_bound(self, scores):
+        scores = np.nan_to_num(scores)
+        return scores.mean(axis=1) + self.half_width(scores)
+
+    # Pessimistic score of an abandoned candidate, scores are never below 0
+    def lower_bound(self, scores):
+        scores = np.nan_to_num(scores)
+        return np.maximum(scores.mean(axis=1) - self.half_width(scores), 0)
+
+    # Candidates (of the active ones) to abandon after the first n_folds folds
+    def abandon(self, scores, n_folds):
+        if n_folds < max(self.min_folds, 2):
+            return np.zeros(scores.shape[0], dtype=bool)
+        return dominated(self.upper_bound(scores[:, :n_folds]), self.archive)
+
+    # The archive is replaced, not modified, so a candidate evaluated in another thread sees either the old or the new
+    # one without the lock, the lock keeps the points of the updates of other threads
+    def update(self, scores):
+        scores = scores[np.all(np.isfinite(scores), axis=1)]
+        with self.lock:
+            points = np.unique(np.vstack([self.archive, scores]), axis=0)
+            self.archive = points[~dominated(points, points)]
+
+    def record(self, folds_run, n_folds):
+        with self.lock:
+            self.n_candidates += len(folds_run)
+            self.n_abandoned += int(np.sum(folds_run < n_folds))
+            self.n_folds_run += int(np.sum(folds_run))
+            self.n_folds_total += len(folds_run) * n_folds
+
+    def info(self):
+        return {"n_candidates": self.n_candidates,
+                "n_abandoned": self.n_abandoned,
+                "n_folds_run": self.n_folds_run,
+                "n_folds_total": self.n_folds_total,
+                "archive_size": self.archive.shape[0]}
@@ -0,0 +1,54 @@
+import numpy as np
+
+from methods.profiler import phase
+
+
+# Minkowski distances between the row X[index] and all rows of X, computed in chunks of chunk_size rows,
+# so at most chunk_size x n_features differences are in memory at once
+def minkowski_row(X, index, p=2, chunk_size=4096):
+    x = X[index]
+    distances = np.empty(X.shape[0])
+    for start in range(0, X.shape[0], chunk_size):
+        diff = np.abs(X[start:start + chunk_size] - x)
+        if p == np.inf:
+            distances[start:start + chunk_size] = np.max(diff, axis=1)
+        elif p == 1:
+            distances[start:start + chunk_size] = np.sum(diff, axis=1)
+        elif p == 2:
+            distances[start:start + chunk_size] = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+        else:
+            distances[start:start + chunk_size] = np.sum(diff ** p, axis=1) ** (1 / p)
+    return distances
+
+
+class GumpSampler:
+    # Bootstrap sampling in GUMP - samples close to the root are drawn with higher probability and every next root
+    # is the sample with the largest mean distance to the previous roots. Only the distance rows of the roots are
+    # computed, instead of the whole n_samples x n_samples matrix
+    def __init__(self, X, p_minkowski=2, chunk_size=4096, profiler=None):
+        self.X = X
+        # p - parameter Minkowski distance, if p=2 Euclidean distance, if p=1 Manhattan distance, if 0<p<1 it's better for more dimenesions
+        self.p_minkowski = p_minkowski
+        self.chunk_size = chunk_size
+        # PhaseProfiler of the estimator or None
+        self.profiler = profiler
+        self.roots = []
+        # Sum of the distance rows of all roots, its argmax is the argmax of the mean
+        self.roots_distances = np.zeros(X.shape[0])
+
+    def next_root(self):
+        if not self.roots:
+            # for the first repeat, it is different way to choose samples
+            return np.random.randint(0, self.X.shape[0]-1)
+        return np.argmax(self.roots_distances)
+
+    # bs_indx - returns indexes of chosen samples
+    def sample(self):
+        root = self.next_root()
+        with phase(self.profiler, "distance_matrix"):
+            distances = minkowski_row(self.X, root, p=self.p_minkowski, chunk_size=self.chunk_size)
+        self.roots.append(root)
+        self.roots_distances += distances
+        n2 = np.max(distances) - distances
+        n2 = n2/np.sum(n2)
+        return np.random.choice(self.X.shape[0], size=int(self.X.shape[0]), replace=True, p=n2)
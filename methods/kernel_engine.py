@@ -0,0 +1,158 @@
+import uuid
+import warnings
+import threading
+import numpy as np
+from collections import OrderedDict
+from sklearn.base import clone
+
+
+# Engine of the last task unpickled in this (worker) process, the next task of the same engine takes over its blocks
+_worker_engines = {}
+
+
+class KernelEngine:
+    # Precomputed RBF kernels for SVC candidates which differ only in C, gamma and the subset of features.
+    # Squared euclidean distance is a sum over features, so the per-feature blocks of squared differences
+    # are computed once per fold and summed over any binary vector of selected features. Blocks are kept in float32,
+    # the sums are float64
+    def __init__(self, folds, max_mb=256, dtype=np.float32):
+
+        # folds - list of (X_train, y_train, X_test, y_test)
+        self.folds = folds
+        self.max_bytes = max_mb * 2 ** 20
+        self.n_features = folds[0][0].shape[1]
+        self.dtype = np.dtype(dtype)
+
+        # LRU cache (fold_id, feature) -> (train x train, test x train) squared differences, the feature None is
+        # the sum over all features of the fold, used when most of the features are selected
+        self.blocks = OrderedDict()
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # Identity of the engine in the worker processes
+        self.engine_id = uuid.uuid4().hex
+
+    # Bytes of one block (train x train and test x train) of the fold
+    def block_bytes(self, fold_id):
+        X_train, _, X_test, _ = self.folds[fold_id]
+        return self.dtype.itemsize * X_train.shape[0] * (X_train.shape[0] + X_test.shape[0])
+
+    # Bytes of all blocks and totals of all folds - nothing is ever evicted with this budget
+    def required_bytes(self):
+        return sum((self.n_features + 1) * self.block_bytes(fold_id) for fold_id in range(len(self.folds)))
+
+    # Bytes needed by one candidate on the largest fold - the total of the fold and one feature block, the other blocks
+    # are evicted and computed again when they are needed
+    def candidate_bytes(self):
+        return max(2 * self.block_bytes(fold_id) for fold_id in range(len(self.folds)))
+
+    # Blocks are not sent to worker processes. A worker process keeps the blocks of the engine between the tasks,
+    # the problem (and the engine) is pickled for every task
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["blocks"], state["n_bytes"], state["lock"] = OrderedDict(), 0, None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        previous = _worker_engines.get(self.engine_id)
+        if previous is not None:
+            self.blocks, self.n_bytes = previous.blocks, previous.n_bytes
+        _worker_engines.clear()
+        _worker_engines[self.engine_id] = self
+
+    def cached_block(self, key, compute):
+        with self.lock:
+            block = self.blocks.get(key)
+            if block is not None:
+                self.hits += 1
+                self.blocks.move_to_end(key)
+                return block
+            self.misses += 1
+
+        block = compute()
+        block_bytes = block[0].nbytes + block[1].nbytes
+        with self.lock:
+            if block_bytes <= self.max_bytes and key not in self.blocks:
+                self.blocks[key] = block
+                self.n_bytes += block_bytes
+                # Evict the least recently used blocks
+                while self.n_bytes > self.max_bytes:
+                    _, (old_train, old_test) = self.blocks.popitem(last=False)
+                    self.n_bytes -= old_train.nbytes + old_test.nbytes
+        return block
+
+    def feature_block(self, fold_id, feature):
+        def compute():
+            X_train, _, X_test, _ = self.folds[fold_id]
+            column_train = X_train[:, feature]
+            column_test = X_test[:, feature]
+            return (np.square(column_train[:, np.newaxis] - column_train[np.newaxis, :]).astype(self.dtype),
+                    np.square(column_test[:, np.newaxis] - column_train[np.newaxis, :]).astype(self.dtype))
+        return self.cached_block((fold_id, feature), compute)
+
+    def total_distances(self, fold_id):
+        def compute():
+            X_train, _, X_test, _ = self.folds[fold_id]
+            total_train = np.zeros((X_train.shape[0], X_train.shape[0]))
+            total_test = np.zeros((X_test.shape[0], X_train.shape[0]))
+            for feature in range(self.n_features):
+                block_train, block_test = self.feature_block(fold_id, feature)
+                total_train += block_train
+                total_test += block_test
+            return total_train.astype(self.dtype), total_test.astype(self.dtype)
+        return self.cached_block((fold_id, None), compute)
+
+    # Squared euclidean distances (train x train, test x train) on the selected features
+    def squared_distances(self, fold_id, selected_features):
+        selected = np.flatnonzero(selected_features)
+        unselected = np.flatnonzero(np.logical_not(selected_features))
+        X_train, _, X_test, _ = self.folds[fold_id]
+
+        if len(unselected) < len(selected):
+            # Most of the features are selected - subtract the unselected ones from the total
+            total_train, total_test = self.total_distances(fold_id)
+            distances_train, distances_test = total_train.astype(np.float64), total_test.astype(np.float64)
+            for feature in unselected:
+                block_train, block_test = self.feature_block(fold_id, feature)
+                distances_train -= block_train
+                distances_test -= block_test
+            np.maximum(distances_train, 0, out=distances_train)
+            np.maximum(distances_test, 0, out=distances_test)
+        else:
+            distances_train = np.zeros((X_train.shape[0], X_train.shape[0]))
+            distances_test = np.zeros((X_test.shape[0], X_train.shape[0]))
+            for feature in selected:
+                block_train, block_test = self.feature_block(fold_id, feature)
+                distances_train += block_train
+                distances_test += block_test
+        return distances_train, distances_test
+
+    # Predictions on the test part of the fold for every pair of hyperparameters (C, gamma)
+    def fit_predict(self, estimator, fold_id, selected_features, params):
+        _, y_train, _, _ = self.folds[fold_id]
+        distances_train, distances_test = self.squared_distances(fold_id, selected_features)
+        predictions = []
+        for C, gamma in params:
+            # Probability calibration does not change the decision function used by predict()
+            clf = clone(estimator).set_params(kernel="precomputed", C=C, probability=False)
+            clf.fit(np.exp(-gamma * distances_train), y_train)
+            predictions.append(clf.predict(np.exp(-gamma * distances_test)))
+        return predictions
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "blocks": len(self.blocks), "mb": self.n_bytes / 2 ** 20}
+
+
+# KernelEngine of the folds or None with a warning, when a single candidate does not fit in max_mb - the total of the
+# fold would be computed again for every candidate, which is slower than the exact SVC. A smaller budget than
+# required_bytes() only means that the least recently used blocks are evicted
+def make_kernel_engine(folds, max_mb=256):
+    engine = KernelEngine(folds, max_mb=max_mb)
+    if engine.candidate_bytes() > engine.max_bytes:
+        warnings.warn("Kernel engine needs %.1f MB for one candidate, more than kernel_cache_mb=%g, the exact SVC is used instead"
+                      % (engine.candidate_bytes() / 2 ** 20, max_mb), RuntimeWarning)
+        return None
+    return engine
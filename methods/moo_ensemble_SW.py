@@ -1,4 +1,5 @@
 import numpy as np
+import strlearn as sl
 from scipy.stats import mode
 from sklearn.base import BaseEstimator, clone
 from sklearn.model_selection import RepeatedStratifiedKFold
@@ -6,16 +7,26 @@ from sklearn.model_selection import RepeatedStratifiedKFold
 from pymoo.algorithms.moo.nsga2 import NSGA2
 from pymoo.optimize import minimize
 from pymoo.factory import get_sampling, get_crossover, get_mutation
+from pymoo.util.nds.non_dominated_sorting import NonDominatedSorting
 from pymoo.operators.mixed_variable_operator import MixedVariableSampling, MixedVariableMutation, MixedVariableCrossover
 
 from methods.optimization_param import OptimizationParam
 from methods.optimization_param_with_cross_val_SW import OptimizationParamCrossVal
+from methods.optimization_param_batch import OptimizationParamBatch
+from methods.fitness_cache import FitnessCache
+from methods.fold_racing import FoldRacing
+from methods.termination import TerminationPolicy
+from methods.warm_start_sampling import WarmStartSampling
+from methods.surrogate_nsga2 import SurrogateModel, SurrogateNSGA2
+from methods.profiler import PhaseProfiler, phase, optimization_hooks
+from methods.svc_kernels import batch_support_matrix
+from methods.prediction_cache import PredictionCache
 from utils.diversity import calc_diversity_measures, calc_diversity_measures2
 
 
 class MooEnsembleSVC(BaseEstimator):
 
-    def __init__(self, base_classifier, scale_features=0.75, n_classifiers=10, test_size=0.5, objectives=2, p_size=100, predict_decision="ASV", p_minkowski=2, mutation_real="real_pm", mutation_bin="bin_bitflip", crossover_real="real_sbx", crossover_bin="bin_two_point", etac=5, etam=5, cross_val=False):
+    def __init__(self, base_classifier, scale_features=0.75, n_classifiers=10, test_size=0.5, objectives=2, p_size=100, predict_decision="ASV", p_minkowski=2, mutation_real="real_pm", mutation_bin="bin_bitflip", crossover_real="real_sbx", crossover_bin="bin_two_point", etac=5, etam=5, cross_val=False, batch_evaluation=False, n_jobs=1, parallel_backend="threading", cache_size=0, cache_decimals=3, kernel_engine=False, kernel_cache_mb=256, n_eval=1000, max_time=None, hv_tol=None, hv_n_last=3, batch_predict=False, incremental=False, incremental_n_eval=None, max_members=None, prediction_cache_size=4, profile=False, profile_memory=False, profile_log=False, approx_kernel=None, approx_components=256, surrogate=False, surrogate_fraction=0.2, surrogate_retrain=1, racing=False, race_min_folds=2, race_confidence=0.95):
 
         self.base_classifier = base_classifier
         self.n_classifiers = n_classifiers
@@ -34,8 +45,64 @@ class MooEnsembleSVC(BaseEstimator):
         self.etac = etac
         self.etam = etam
         self.cross_val = cross_val
+        self.batch_evaluation = batch_evaluation
+        self.n_jobs = n_jobs
+        self.parallel_backend = parallel_backend
+        self.cache_size = cache_size
+        self.cache_decimals = cache_decimals
+        self.kernel_engine = kernel_engine
+        self.kernel_cache_mb = kernel_cache_mb
+        # Termination of NSGA2: max number of evaluations, max time in seconds, hypervolume stagnation
+        self.n_eval = n_eval
+        self.max_time = max_time
+        self.hv_tol = hv_tol
+        self.hv_n_last = hv_n_last
+        # Support matrix of RBF SVC members computed from shared distances to the support vectors
+        self.batch_predict = batch_predict
+        # Number of (data, labels or supports) predictions of the members kept by PredictionCache, 0 turns it off
+        self.prediction_cache_size = prediction_cache_size
+        # profile - wall time, calls and peak memory (profile_memory=True) of the phases of fit and of every generation
+        # in profile_info, profile_log - the same written to the log of the experiment
+        self.profile = profile
+        self.profile_memory = profile_memory
+        self.profile_log = profile_log
+        # approx_kernel - candidates of NSGA2 are scored by a linear SVM on approximated RBF features ("rff" or "nystroem")
+        # with approx_components features instead of the exact SVC, members of the ensemble are always exact SVC
+        self.approx_kernel = approx_kernel
+        self.approx_components = approx_components
+        # surrogate - offspring of NSGA2 are pre-screened by a regressor of (C, gamma, features) -> objectives trained
+        # on the evaluated candidates, only the best surrogate_fraction of them is evaluated by the problem, the regressor
+        # is retrained every surrogate_retrain generations and its accuracy is reported in surrogate_info
+        self.surrogate = surrogate
+        self.surrogate_fraction = surrogate_fraction
+        self.surrogate_retrain = surrogate_retrain
+        # racing - cross-validation (cross_val=True) of a candidate stops after race_min_folds or more folds when the
+        # race_confidence upper bound of its mean scores is dominated by the fully evaluated candidates, see racing_info
+        self.racing = racing
+        self.race_min_folds = race_min_folds
+        self.race_confidence = race_confidence
+        # incremental - partial_fit on a fitted model starts NSGA2 from its pareto set re-scored on the new chunk,
+        # incremental_n_eval - budget of such a run (None means n_eval), max_members - max size of the ensemble
+        self.incremental = incremental
+        self.incremental_n_eval = incremental_n_eval
+        self.max_members = max_members
 
     def partial_fit(self, X, y, classes=None):
+        profiler = PhaseProfiler(trace_memory=self.profile_memory) if self.profile is True else None
+        with phase(profiler, "fit"):
+            self._partial_fit(X, y, classes, profiler)
+        self.profile_info = None
+        if profiler is not None:
+            self.profile_info = profiler.info()
+            if self.profile_log is True:
+                profiler.log(type(self).__name__)
+        return self
+
+    def _partial_fit(self, X, y, classes, profiler):
+        # Update of the fitted model with the new chunk of data instead of the optimization from scratch
+        incremental = self.incremental is True and len(self.ensemble) > 0
+        if incremental and classes is None:
+            classes = self.classes_
         self.X, self.y = X, y
         # Check classes
         self.classes_ = classes
@@ -60,40 +127,76 @@ class MooEnsembleSVC(BaseEstimator):
             "binary": get_mutation(self.mutation_bin)
         })
 
-        cross_validation = RepeatedStratifiedKFold(n_splits=2, n_repeats=5)
-        # Create optimization problem
-        if self.cross_val is True:
-            problem = OptimizationParamCrossVal(X, y, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, cross_validation=cross_validation, objectives=self.objectives)
-        else:
-            problem = OptimizationParam(X, y, test_size=self.test_size, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, objectives=self.objectives, cross_validation=cross_validation)
+        with phase(profiler, "problem_setup"):
+            cross_validation = RepeatedStratifiedKFold(n_splits=2, n_repeats=5)
+            # Scores of already evaluated candidates, cache_size=0 turns the cache off
+            cache = FitnessCache(self.cache_size, self.cache_decimals) if self.cache_size > 0 else None
+            racing = FoldRacing(self.race_min_folds, self.race_confidence) if self.racing is True and self.cross_val is True else None
+            # Create optimization problem
+            if self.cross_val is True:
+                problem = OptimizationParamCrossVal(X, y, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, cross_validation=cross_validation, objectives=self.objectives, cache=cache, kernel_engine=self.kernel_engine, kernel_cache_mb=self.kernel_cache_mb, approx_kernel=self.approx_kernel, approx_components=self.approx_components, racing=racing)
+            else:
+                problem = OptimizationParam(X, y, test_size=self.test_size, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, objectives=self.objectives, cache=cache, kernel_engine=self.kernel_engine, kernel_cache_mb=self.kernel_cache_mb, approx_kernel=self.approx_kernel, approx_components=self.approx_components)
+            # Whole population is evaluated at once instead of one candidate at a time, n_jobs spreads it over workers
+            if self.batch_evaluation is True or self.n_jobs != 1:
+                problem = OptimizationParamBatch(problem, n_jobs=self.n_jobs, backend=self.parallel_backend)
+
+        n_eval = self.n_eval
+        if incremental:
+            # The pareto set of the earlier chunks is in the initial population, so it is scored again on the new chunk
+            sampling = WarmStartSampling(self.pareto_set, sampling)
+            if self.incremental_n_eval is not None:
+                n_eval = self.incremental_n_eval
 
-        algorithm = NSGA2(
+        surrogate_params = {}
+        if self.surrogate is True:
+            surrogate_params = dict(surrogate=SurrogateModel(retrain_every=self.surrogate_retrain, min_samples=self.p_size), screen_fraction=self.surrogate_fraction)
+        algorithm = (SurrogateNSGA2 if self.surrogate is True else NSGA2)(
                        pop_size=self.p_size,
                        sampling=sampling,
                        crossover=crossover,
                        mutation=mutation,
-                       eliminate_duplicates=True)
+                       eliminate_duplicates=True,
+                       **surrogate_params)
 
-        res = minimize(
-                       problem,
-                       algorithm,
-                       ('n_eval', 1000),
-                       seed=1,
-                       verbose=False,
-                       save_history=True)
+        with phase(profiler, "nsga2"):
+            res = minimize(
+                           problem,
+                           algorithm,
+                           TerminationPolicy(n_eval=n_eval, max_time=self.max_time, hv_tol=self.hv_tol, hv_n_last=self.hv_n_last),
+                           seed=1,
+                           verbose=False,
+                           save_history=True,
+                           **optimization_hooks(profiler))
+
+        # Why and when the optimization stopped
+        self.termination_info.append(res.algorithm.termination.info(res.algorithm))
+        if self.surrogate is True:
+            self.surrogate_info.append(res.algorithm.surrogate.info())
+        if cache is not None:
+            self.cache_info.append(cache.info())
+        if racing is not None:
+            self.racing_info.append(racing.info())
 
         # F returns all Pareto front solutions in form [-precision, -recall]
         self.solutions = res.F
+        # Decision vectors of the pareto front (C, gamma, selected features)
+        self.pareto_set = res.X
 
         # X returns values of hyperparameter C, gamma and binary vector of selected features
-        for result_opt in res.X:
-            self.base_classifier = self.base_classifier.set_params(C=result_opt[0], gamma=result_opt[1])
-            sf = result_opt[2:].tolist()
-            self.selected_features.append(sf)
-            # Train new estimator
-            candidate = clone(self.base_classifier).fit(X[:, sf], y)
-            # Add candidate to the ensemble
-            self.ensemble.append(candidate)
+        with phase(profiler, "ensemble_training"):
+            for result_opt in res.X:
+                self.base_classifier = self.base_classifier.set_params(C=result_opt[0], gamma=result_opt[1])
+                sf = result_opt[2:].tolist()
+                self.selected_features.append(sf)
+                # Train new estimator
+                candidate = clone(self.base_classifier).fit(X[:, sf], y)
+                # Add candidate to the ensemble
+                self.ensemble.append(candidate)
+                self.member_batch.append(self.n_batches_)
+        self.n_batches_ += 1
+
+        self.prune_members(X, y, n_new=len(res.X))
 
         """
         # Pruning based on balanced_accuracy_score
@@ -110,14 +213,62 @@ class MooEnsembleSVC(BaseEstimator):
             self.ensemble = self.ensemble_arr.tolist()
         """
 
+        # Members have changed, the predictions of the old ones are not valid anymore
+        self.prediction_cache = PredictionCache(self.prediction_cache_size)
+
         return self
 
+    # Non-dominated rank of the (precision, recall) of the members on the chunk X, y
+    def member_ranks(self, X, y, members):
+        F = []
+        for member_id in members:
+            y_pred = self.ensemble[member_id].predict(X[:, self.selected_features[member_id]])
+            F.append([-sl.metrics.precision(y, y_pred), -sl.metrics.recall(y, y_pred)])
+        return NonDominatedSorting().do(np.nan_to_num(np.array(F)), return_rank=True)[1]
+
+    # Size budget of the ensemble - members of the new chunk go first, members of the earlier chunks fill the rest of
+    # max_members. Both are ranked by non-dominated sorting of their (precision, recall) on the new chunk and the worst
+    # of them are removed, from the same front of the earlier chunks the older member goes first
+    def prune_members(self, X, y, n_new):
+        if self.max_members is None or len(self.ensemble) <= self.max_members:
+            return
+        n_old = len(self.ensemble) - n_new
+        new = np.arange(n_old, len(self.ensemble))
+        if n_new > self.max_members:
+            new = new[np.argsort(self.member_ranks(X, y, new), kind="stable")]
+        keep = new[:self.max_members].tolist()
+        n_keep = self.max_members - len(keep)
+        if n_keep > 0:
+            old = np.arange(n_old)
+            order = np.lexsort((-np.array(self.member_batch[:n_old]), self.member_ranks(X, y, old)))
+            keep += order[:n_keep].tolist()
+        keep = sorted(keep)
+        self.ensemble = [self.ensemble[i] for i in keep]
+        self.selected_features = [self.selected_features[i] for i in keep]
+        self.member_batch = [self.member_batch[i] for i in keep]
+
     def fit(self, X, y, classes=None):
         self.ensemble = []
+        self.selected_features = []
+        # Number of the chunk (partial_fit call) each member was trained on
+        self.member_batch = []
+        self.n_batches_ = 0
+        self.cache_info = []
+        self.termination_info = []
+        self.surrogate_info = []
+        self.racing_info = []
         self.partial_fit(X, y, classes)
 
     def ensemble_support_matrix(self, X):
+        return self.prediction_cache.get(X, "supports", lambda: self.compute_support_matrix(X))
+
+    def member_predictions(self, X):
+        return self.prediction_cache.get(X, "labels", lambda: np.array([member_clf.predict(X[:, sf]) for member_clf, sf in zip(self.ensemble, self.selected_features)]))
+
+    def compute_support_matrix(self, X):
         # Ensemble support matrix
+        if self.batch_predict is True:
+            return batch_support_matrix(self.ensemble, self.selected_features, X)
         return np.array([member_clf.predict_proba(X[:, sf]) for member_clf, sf in zip(self.ensemble, self.selected_features)])
 
     def predict(self, X):
@@ -128,18 +279,17 @@ class MooEnsembleSVC(BaseEstimator):
             prediction = np.argmax(average_support, axis=1)
         # Prediction based on the Majority Voting
         elif self.predict_decision == "MV":
-            predictions = np.array([member_clf.predict(X) for member_clf in self.ensemble_])
+            predictions = self.member_predictions(X)
             prediction = np.squeeze(mode(predictions, axis=0)[0])
         return self.classes_[prediction]
 
     def predict_proba(self, X):
-        probas_ = [clf.predict_proba(X) for clf in self.ensemble]
-        return np.average(probas_, axis=0)
+        return np.mean(self.ensemble_support_matrix(X), axis=0)
 
     def calculate_diversity(self):
         if len(self.ensemble) > 1:
             # All measures for whole ensemble
-            self.entropy_measure_e, self.k0, self.kw, self.disagreement_measure, self.q_statistic_mean = calc_diversity_measures(self.X, self.y, self.ensemble, self.selected_features, p=0.01)
+            self.entropy_measure_e, self.k0, self.kw, self.disagreement_measure, self.q_statistic_mean = calc_diversity_measures(self.X, self.y, self.ensemble, self.selected_features, p=0.01, predictions=self.member_predictions(self.X))
             # entropy_measure_e: E varies between 0 and 1, where 0 indicates no difference and 1 indicates the highest possible diversity.
             # kw - Kohavi-Wolpert variance
             # Q-statistic: <-1, 1>
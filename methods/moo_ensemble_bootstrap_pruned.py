@@ -3,7 +3,6 @@ import random
 from random import randint
 from sklearn.base import BaseEstimator, clone
 from scipy.stats import mode
-from torch import cdist, from_numpy
 from sklearn.model_selection import RepeatedStratifiedKFold
 
 from pymoo.algorithms.moo.nsga2 import NSGA2
@@ -13,12 +12,22 @@ from pymoo.operators.mixed_variable_operator import MixedVariableSampling, Mixed
 
 from methods.optimization_param import OptimizationParam
 from methods.optimization_param_with_cross_val_SW import OptimizationParamCrossVal
+from methods.optimization_param_batch import OptimizationParamBatch
+from methods.fitness_cache import FitnessCache
+from methods.fold_racing import FoldRacing
+from methods.termination import TerminationPolicy
+from methods.svc_kernels import batch_support_matrix
+from methods.prediction_cache import PredictionCache
+from methods.warm_start_sampling import WarmStartSampling
+from methods.surrogate_nsga2 import SurrogateModel, SurrogateNSGA2
+from methods.gump_sampler import GumpSampler
+from methods.profiler import PhaseProfiler, phase, optimization_hooks
 from utils.diversity import calc_diversity_measures, calc_diversity_measures2
 
 
 class MooEnsembleSVCbootstrapPruned(BaseEstimator):
 
-    def __init__(self, base_classifier, scale_features=0.75, n_repeats=5, test_size=0.5, objectives=2, p_size=100, predict_decision="ASV", p_minkowski=2, mutation_real="real_pm", mutation_bin="bin_bitflip", crossover_real="real_sbx", crossover_bin="bin_two_point", etac=5, etam=5, cross_val=False):
+    def __init__(self, base_classifier, scale_features=0.75, n_repeats=5, test_size=0.5, objectives=2, p_size=100, predict_decision="ASV", p_minkowski=2, mutation_real="real_pm", mutation_bin="bin_bitflip", crossover_real="real_sbx", crossover_bin="bin_two_point", etac=5, etam=5, cross_val=False, batch_evaluation=False, n_jobs=1, parallel_backend="threading", cache_size=0, cache_decimals=3, kernel_engine=False, kernel_cache_mb=256, n_eval=1000, max_time=None, hv_tol=None, hv_n_last=3, warm_start=False, warm_n_eval=None, distance_chunk_size=4096, batch_predict=False, prediction_cache_size=4, profile=False, profile_memory=False, profile_log=False, approx_kernel=None, approx_components=256, surrogate=False, surrogate_fraction=0.2, surrogate_retrain=1, racing=False, race_min_folds=2, race_confidence=0.95):
 
         self.base_classifier = base_classifier
         self.n_repeats = n_repeats
@@ -37,8 +46,61 @@ class MooEnsembleSVCbootstrapPruned(BaseEstimator):
         self.etac = etac
         self.etam = etam
         self.cross_val = cross_val
+        self.batch_evaluation = batch_evaluation
+        self.n_jobs = n_jobs
+        self.parallel_backend = parallel_backend
+        self.cache_size = cache_size
+        self.cache_decimals = cache_decimals
+        self.kernel_engine = kernel_engine
+        self.kernel_cache_mb = kernel_cache_mb
+        # Termination of NSGA2: max number of evaluations, max time in seconds, hypervolume stagnation
+        self.n_eval = n_eval
+        self.max_time = max_time
+        self.hv_tol = hv_tol
+        self.hv_n_last = hv_n_last
+        # warm_start - every repeat after the first starts from the pareto set of the previous one,
+        # warm_n_eval - budget of the warm started repeats, None means n_eval
+        self.warm_start = warm_start
+        self.warm_n_eval = warm_n_eval
+        # Number of samples in one chunk of the distance computation in the bootstrap
+        self.distance_chunk_size = distance_chunk_size
+        # Support matrix of RBF SVC members computed from shared distances to the support vectors
+        self.batch_predict = batch_predict
+        # Number of (data, labels or supports) predictions of the members kept by PredictionCache, 0 turns it off
+        self.prediction_cache_size = prediction_cache_size
+        # profile - wall time, calls and peak memory (profile_memory=True) of the phases of fit and of every generation
+        # in profile_info, profile_log - the same written to the log of the experiment
+        self.profile = profile
+        self.profile_memory = profile_memory
+        self.profile_log = profile_log
+        # approx_kernel - candidates of NSGA2 are scored by a linear SVM on approximated RBF features ("rff" or "nystroem")
+        # with approx_components features instead of the exact SVC, members of the ensemble are always exact SVC
+        self.approx_kernel = approx_kernel
+        self.approx_components = approx_components
+        # surrogate - offspring of NSGA2 are pre-screened by a regressor of (C, gamma, features) -> objectives trained
+        # on the evaluated candidates, only the best surrogate_fraction of them is evaluated by the problem, the regressor
+        # is retrained every surrogate_retrain generations and its accuracy is reported in surrogate_info
+        self.surrogate = surrogate
+        self.surrogate_fraction = surrogate_fraction
+        self.surrogate_retrain = surrogate_retrain
+        # racing - cross-validation (cross_val=True) of a candidate stops after race_min_folds or more folds when the
+        # race_confidence upper bound of its mean scores is dominated by the fully evaluated candidates, see racing_info
+        self.racing = racing
+        self.race_min_folds = race_min_folds
+        self.race_confidence = race_confidence
 
     def partial_fit(self, X, y, classes=None):
+        profiler = PhaseProfiler(trace_memory=self.profile_memory) if self.profile is True else None
+        with phase(profiler, "fit"):
+            self._partial_fit(X, y, classes, profiler)
+        self.profile_info = None
+        if profiler is not None:
+            self.profile_info = profiler.info()
+            if self.profile_log is True:
+                profiler.log(type(self).__name__)
+        return self
+
+    def _partial_fit(self, X, y, classes, profiler):
         self.X, self.y = X, y
         # Check classes
         self.classes_ = classes
@@ -64,23 +126,15 @@ class MooEnsembleSVCbootstrapPruned(BaseEstimator):
         })
 
         # Bootstraping - GUMP
-        self.roots = []
-        # Distances n_samples x n_samples
-        # p - parameter Minkowski distance, if p=2 Euclidean distance, if p=1 Manhattan distance, if 0<p<1 it's better for more dimenesions
-        self.distances = cdist(from_numpy(self.X), from_numpy(self.X), p=self.p_minkowski).numpy()
-        # All samples
-        indxs = np.array(list(range(self.X.shape[0])))
+        sampler = GumpSampler(self.X, p_minkowski=self.p_minkowski, chunk_size=self.distance_chunk_size, profiler=profiler)
+        self.roots = sampler.roots
 
+        # Pareto set of the previous repeat
+        X_warm = None
         for repeat in range(self.n_repeats):
             self.solutions_bs = None
-            if repeat == 0:
-                # for the first repeat, it is different way to choose samples
-                root = np.random.randint(0, self.X.shape[0]-1)
-                self.roots.append(root)
-                n2 = np.max(self.distances[root]) - self.distances[root]
-                n2 = n2/np.sum(n2)
-                # bs_indx - returns indexes of chosen samples
-                bs_indx = np.random.choice(indxs, size=int(self.X.shape[0]), replace=True, p=n2)
+            with phase(profiler, "bootstrap_sampling"):
+                bs_indx = sampler.sample()
                 bs_X = self.X[bs_indx, :]
                 bs_y = self.y[bs_indx]
 
@@ -101,34 +155,67 @@ class MooEnsembleSVCbootstrapPruned(BaseEstimator):
                     min_indx = random.choice(min_indexes)
                     bs_y[maj_indx] = y[min_indx]
 
+            with phase(profiler, "problem_setup"):
                 cross_validation = RepeatedStratifiedKFold(n_splits=2, n_repeats=5)
+                # Scores of already evaluated candidates, cache_size=0 turns the cache off
+                cache = FitnessCache(self.cache_size, self.cache_decimals) if self.cache_size > 0 else None
+                racing = FoldRacing(self.race_min_folds, self.race_confidence) if self.racing is True and self.cross_val is True else None
                 # Create optimization problem
                 if self.cross_val is True:
-                    problem = OptimizationParamCrossVal(bs_X, bs_y, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, cross_validation=cross_validation, objectives=self.objectives)
+                    problem = OptimizationParamCrossVal(bs_X, bs_y, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, cross_validation=cross_validation, objectives=self.objectives, cache=cache, kernel_engine=self.kernel_engine, kernel_cache_mb=self.kernel_cache_mb, approx_kernel=self.approx_kernel, approx_components=self.approx_components, racing=racing)
                 else:
-                    problem = OptimizationParam(bs_X, bs_y, test_size=self.test_size, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, objectives=self.objectives)
-                algorithm = NSGA2(
-                               pop_size=self.p_size,
-                               sampling=sampling,
-                               crossover=crossover,
-                               mutation=mutation,
-                               eliminate_duplicates=True)
+                    problem = OptimizationParam(bs_X, bs_y, test_size=self.test_size, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, objectives=self.objectives, cache=cache, kernel_engine=self.kernel_engine, kernel_cache_mb=self.kernel_cache_mb, approx_kernel=self.approx_kernel, approx_components=self.approx_components)
+                # Whole population is evaluated at once instead of one candidate at a time, n_jobs spreads it over workers
+                if self.batch_evaluation is True or self.n_jobs != 1:
+                    problem = OptimizationParamBatch(problem, n_jobs=self.n_jobs, backend=self.parallel_backend)
+            # Bootstrap samples overlap, so the previous pareto set is a good starting point
+            n_eval = self.n_eval
+            repeat_sampling = sampling
+            if self.warm_start is True and X_warm is not None:
+                repeat_sampling = WarmStartSampling(X_warm, sampling)
+                if self.warm_n_eval is not None:
+                    n_eval = self.warm_n_eval
+            surrogate_params = {}
+            if self.surrogate is True:
+                surrogate_params = dict(surrogate=SurrogateModel(retrain_every=self.surrogate_retrain, min_samples=self.p_size), screen_fraction=self.surrogate_fraction)
+            algorithm = (SurrogateNSGA2 if self.surrogate is True else NSGA2)(
+                           pop_size=self.p_size,
+                           sampling=repeat_sampling,
+                           crossover=crossover,
+                           mutation=mutation,
+                           eliminate_duplicates=True,
+                           **surrogate_params)
 
+            with phase(profiler, "nsga2"):
                 res = minimize(
                                problem,
                                algorithm,
-                               # termination criterion (n_eval lub n_gen)
-                               ('n_eval', 1000),
+                               # termination criterion - n_eval, max_time or hypervolume stagnation
+                               TerminationPolicy(n_eval=n_eval, max_time=self.max_time, hv_tol=self.hv_tol, hv_n_last=self.hv_n_last),
                                seed=1,
                                verbose=False,
-                               save_history=True)
+                               save_history=True,
+                               **optimization_hooks(profiler, run=repeat))
 
-                self.solutions_bs = res.F
-                # Unique solutions from the pareto front is a way to prune the ensemble
-                unique_solutions, unique_indexes = np.unique(self.solutions_bs, return_index=True, axis=0)
-                # self.solutions = unique_solutions
-                self.solutions = self.solutions_bs
+            # Why and when the optimization stopped
+            self.termination_info.append(res.algorithm.termination.info(res.algorithm))
+            if self.surrogate is True:
+                self.surrogate_info.append(res.algorithm.surrogate.info())
+            if cache is not None:
+                self.cache_info.append(cache.info())
+            if racing is not None:
+                self.racing_info.append(racing.info())
+            X_warm = res.X
 
+            self.solutions_bs = res.F
+            # Unique solutions from the pareto front is a way to prune the ensemble
+            unique_solutions, unique_indexes = np.unique(self.solutions_bs, return_index=True, axis=0)
+            # self.solutions = unique_solutions
+            self.solutions = self.solutions_bs
+            # Decision vectors of the pareto front (C, gamma, selected features)
+            self.pareto_set = res.X
+
+            with phase(profiler, "ensemble_training"):
                 # Pruning based on unique solutions of precision and recall from pareto front
                 if np.shape(unique_indexes)[0] == 1:
                     self.base_classifier = self.base_classifier.set_params(C=res.X[0, 0], gamma=res.X[0, 1])
@@ -147,86 +234,30 @@ class MooEnsembleSVCbootstrapPruned(BaseEstimator):
                         candidate = clone(self.base_classifier).fit(X[:, sf], y)
                         # Add candidate to the ensemble
                         self.ensemble.append(candidate)
-            else:
-                bs_dist = np.mean(self.distances[self.roots], axis=0)
-                max_dist = np.argmax(bs_dist)
-                self.roots.append(max_dist)
-                n2 = np.max(self.distances[max_dist]) - self.distances[max_dist]
-                n2 = n2/np.sum(n2)
-                bs_indx = np.random.choice(indxs, size=int(self.X.shape[0]), replace=True, p=n2)
-                bs_X = self.X[bs_indx, :]
-                bs_y = self.y[bs_indx]
-
-                minority_samples = sum(1 for i in bs_y if i == 1)
-                min_indexes = np.where(y == 1)
-                min_indexes = min_indexes[0]
-                if minority_samples == 0:
-                    maj_indx_a = randint(0, len(bs_y) - 1)
-                    maj_indx_b = randint(0, len(bs_y) - 1)
-                    min_indx_a = random.choice(min_indexes)
-                    min_indx_b = random.choice(min_indexes)
-                    bs_y[maj_indx_a] = y[min_indx_a]
-                    bs_y[maj_indx_b] = y[min_indx_b]
-                elif minority_samples == 1:
-                    maj_indexes = np.where(bs_y == 0)
-                    maj_indexes = maj_indexes[0]
-                    maj_indx = random.choice(maj_indexes)
-                    min_indx = random.choice(min_indexes)
-                    bs_y[maj_indx] = y[min_indx]
-
-                cross_validation = RepeatedStratifiedKFold(n_splits=2, n_repeats=5)
-                # Create optimization problem
-                if self.cross_val is True:
-                    problem = OptimizationParamCrossVal(bs_X, bs_y, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, cross_validation=cross_validation, objectives=self.objectives)
-                else:
-                    problem = OptimizationParam(bs_X, bs_y, test_size=self.test_size, estimator=self.base_classifier, scale_features=self.scale_features, n_features=n_features, objectives=self.objectives)
 
-                algorithm = NSGA2(
-                               pop_size=self.p_size,
-                               sampling=sampling,
-                               crossover=crossover,
-                               mutation=mutation,
-                               eliminate_duplicates=True)
+        # Members have changed, the predictions of the old ones are not valid anymore
+        self.prediction_cache = PredictionCache(self.prediction_cache_size)
 
-                res = minimize(
-                               problem,
-                               algorithm,
-                               ('n_eval', 1000),
-                               seed=1,
-                               verbose=False,
-                               save_history=True)
-
-                self.solutions_bs = res.F
-                unique_solutions, unique_indexes = np.unique(self.solutions_bs, return_index=True, axis=0)
-                self.solutions = self.solutions_bs
-                # self.solutions = np.append(self.solutions, unique_solutions, axis=0)
-
-                # Pruning based on unique solutions of precision and recall from pareto front
-                if np.shape(unique_indexes)[0] == 1:
-                    self.base_classifier = self.base_classifier.set_params(C=res.X[0, 0], gamma=res.X[0, 1])
-                    sf = res.X[0, 2:].tolist()
-                    self.selected_features.append(sf)
-                    # Train new estimator
-                    candidate = clone(self.base_classifier).fit(X[:, sf], y)
-                    # Add candidate to the ensemble
-                    self.ensemble.append(candidate)
-                elif np.shape(unique_indexes)[0] > 1:
-                    for indx in unique_indexes:
-                        self.base_classifier = self.base_classifier.set_params(C=res.X[0, 0], gamma=res.X[0, 1])
-                        sf = res.X[0, 2:].tolist()
-                        self.selected_features.append(sf)
-                        # Train new estimator
-                        candidate = clone(self.base_classifier).fit(X[:, sf], y)
-                        # Add candidate to the ensemble
-                        self.ensemble.append(candidate)
         return self
 
     def fit(self, X, y, classes=None):
         self.ensemble = []
+        self.cache_info = []
+        self.termination_info = []
+        self.surrogate_info = []
+        self.racing_info = []
         self.partial_fit(X, y, classes)
 
     def ensemble_support_matrix(self, X):
+        return self.prediction_cache.get(X, "supports", lambda: self.compute_support_matrix(X))
+
+    def member_predictions(self, X):
+        return self.prediction_cache.get(X, "labels", lambda: np.array([member_clf.predict(X[:, sf]) for member_clf, sf in zip(self.ensemble, self.selected_features)]))
+
+    def compute_support_matrix(self, X):
         # Ensemble support matrix
+        if self.batch_predict is True:
+            return batch_support_matrix(self.ensemble, self.selected_features, X)
         return np.array([member_clf.predict_proba(X[:, sf]) for member_clf, sf in zip(self.ensemble, self.selected_features)])
 
     def predict(self, X):
@@ -237,18 +268,17 @@ class MooEnsembleSVCbootstrapPruned(BaseEstimator):
             prediction = np.argmax(average_support, axis=1)
         # Prediction based on the Majority Voting
         elif self.predict_decision == "MV":
-            predictions = np.array([member_clf.predict(X) for member_clf in self.ensemble_])
+            predictions = self.member_predictions(X)
             prediction = np.squeeze(mode(predictions, axis=0)[0])
         return self.classes_[prediction]
 
     def predict_proba(self, X):
-        probas_ = [clf.predict_proba(X) for clf in self.ensemble]
-        return np.average(probas_, axis=0)
+        return np.mean(self.ensemble_support_matrix(X), axis=0)
 
     def calculate_diversity(self):
         if len(self.ensemble) > 1:
             # All measures for whole ensemble
-            self.entropy_measure_e, self.k0, self.kw, self.disagreement_measure, self.q_statistic_mean = calc_diversity_measures(self.X, self.y, self.ensemble, self.selected_features, p=0.01)
+            self.entropy_measure_e, self.k0, self.kw, self.disagreement_measure, self.q_statistic_mean = calc_diversity_measures(self.X, self.y, self.ensemble, self.selected_features, p=0.01, predictions=self.member_predictions(self.X))
             # entropy_measure_e: E varies between 0 and 1, where 0 indicates no difference and 1 indicates the highest possible diversity.
             # kw - Kohavi-Wolpert variance
             # Q-statistic: <-1, 1>
@@ -6,9 +6,12 @@ from sklearn.base import clone
 # from pymoo.model.problem import Problem
 from pymoo.core.problem import ElementwiseProblem
 
+from methods.kernel_engine import make_kernel_engine
+from methods.approximate_kernel import ApproximateKernel
+
 
 class OptimizationParam(ElementwiseProblem):
-    def __init__(self, X, y, test_size, estimator, scale_features, n_features, n_param=2, objectives=2, random_state=0, feature_names=None):
+    def __init__(self, X, y, test_size, estimator, scale_features, n_features, n_param=2, objectives=2, random_state=0, feature_names=None, cache=None, kernel_engine=False, kernel_cache_mb=256, approx_kernel=None, approx_components=256):
 
         self.estimator = estimator
         self.test_size = test_size
@@ -16,6 +19,8 @@ class OptimizationParam(ElementwiseProblem):
         self.n_param = n_param
         self.scale_features = scale_features
         self.n_features = n_features
+        # FitnessCache of already evaluated candidates or None
+        self.cache = cache
 
         self.X = X
         self.y = y
@@ -24,6 +29,17 @@ class OptimizationParam(ElementwiseProblem):
         else:
             self.X_train, self.X_test, self.y_train, self.y_test = np.copy(self.X), np.copy(self.y), np.copy(self.X), np.copy(self.y)
 
+        # RBF kernels of candidates are built from cached per-feature blocks and fitted as precomputed kernels,
+        # None if the blocks do not fit in kernel_cache_mb
+        self.kernel_engine = None
+        fold = (np.ascontiguousarray(self.X_train, dtype=np.float64), self.y_train, np.ascontiguousarray(self.X_test, dtype=np.float64), self.y_test)
+        if kernel_engine is True and self.estimator.get_params().get("kernel") == "rbf":
+            self.kernel_engine = make_kernel_engine([fold], max_mb=kernel_cache_mb)
+        # Candidates are scored by a linear SVM on approximated RBF features ("rff" or "nystroem"), None - exact SVC
+        self.approx_kernel = None
+        if approx_kernel is not None:
+            self.approx_kernel = ApproximateKernel([fold], method=approx_kernel, n_components=approx_components)
+
         # Lower and upper bounds for x - 1d array with length equal to number of variable
         xl_real = [1E6, 1E-7]
         xl_binary = [0] * n_features
@@ -35,23 +51,45 @@ class OptimizationParam(ElementwiseProblem):
 
         super().__init__(n_var=n_variable, n_obj=objectives,
                          n_constr=1, xl=xl, xu=xu)
+        # The cache stays in the main process, it is not pickled for worker processes
+        self.exclude_from_serialization = self.exclude_from_serialization + ["cache"]
+
+    # Data of the problem does not change during the optimization, so the saved history of the algorithm shares it
+    def __deepcopy__(self, memo):
+        return self
 
     # x: a two dimensional matrix where each row is a point to evaluate and each column a variable
     def validation(self, x):
         C = x[0]
         gamma = x[1]
-        selected_features = x[2:]
-        selected_features = selected_features.tolist()
+        selected_features = np.array(x[2:].tolist(), dtype=bool)
+        if self.cache is not None:
+            key = self.cache.key(C, gamma, selected_features)
+            metrics = self.cache.get(key)
+            if metrics is not None:
+                return metrics.tolist()
+        metrics = self.validation_group(selected_features, np.array([[C, gamma]], dtype=float))[0]
+        if self.cache is not None:
+            self.cache.put(key, metrics)
+        return metrics.tolist()
 
-        # If at least one element in x are True
-        if True in selected_features:
-            clf = None
-            clf = clone(self.estimator.set_params(C=C, gamma=gamma))
-            clf.fit(self.X_train[:, selected_features], self.y_train)
-            y_pred = clf.predict(self.X_test[:, selected_features])
-            metrics = [sl.metrics.precision(self.y_test, y_pred), sl.metrics.recall(self.y_test, y_pred)]
-        else:
-            metrics = [0, 0]
+    # Evaluate many pairs of hyperparameters (C, gamma) which share the same binary vector of selected features
+    def validation_group(self, selected_features, params):
+        metrics = np.zeros((params.shape[0], 2))
+        # If at least one element in selected_features are True
+        engine = self.approx_kernel if self.approx_kernel is not None else self.kernel_engine
+        if np.any(selected_features) and engine is not None:
+            for param_id, y_pred in enumerate(engine.fit_predict(self.estimator, 0, selected_features, params)):
+                metrics[param_id] = [sl.metrics.precision(self.y_test, y_pred), sl.metrics.recall(self.y_test, y_pred)]
+        elif np.any(selected_features):
+            # The feature subset is taken only once for the whole group
+            X_train = self.X_train[:, selected_features]
+            X_test = self.X_test[:, selected_features]
+            for param_id, (C, gamma) in enumerate(params):
+                clf = clone(self.estimator).set_params(C=C, gamma=gamma)
+                clf.fit(X_train, self.y_train)
+                y_pred = clf.predict(X_test)
+                metrics[param_id] = [sl.metrics.precision(self.y_test, y_pred), sl.metrics.recall(self.y_test, y_pred)]
         return metrics
 
     def _evaluate(self, x, out, *args, **kwargs):
@@ -0,0 +1,94 @@
+import numpy as np
+from joblib import Parallel, delayed
+from pymoo.core.problem import Problem
+
+
+class OptimizationParamBatch(Problem):
+    # Batch version of OptimizationParam and OptimizationParamCrossVal - it receives the whole population at once
+    def __init__(self, problem, n_jobs=1, backend="threading"):
+
+        # Elementwise problem which provides data, estimator and validation_group()
+        self.problem = problem
+        # n_jobs - number of workers evaluating the groups of candidates, where -1 all cores
+        # backend - "threading" shares the training arrays between threads (libsvm releases the GIL during fit),
+        # "loky" uses processes and joblib memory-maps the training arrays instead of pickling them for every task
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.scale_features = problem.scale_features
+        self.n_features = problem.n_features
+
+        super().__init__(n_var=problem.n_var, n_obj=problem.n_obj,
+                         n_constr=problem.n_constr, xl=problem.xl, xu=problem.xu)
+
+    # Candidates which share the same binary vector of selected features are evaluated together
+    def group_by_features(self, X):
+        params = X[:, :2].astype(float)
+        selected_features = X[:, 2:].astype(bool)
+        unique_features, inverse = np.unique(selected_features, axis=0, return_inverse=True)
+        groups = [(features, np.flatnonzero(inverse.ravel() == group_id)) for group_id, features in enumerate(unique_features)]
+        return params, selected_features, groups
+
+    def validation(self, X):
+        cache = self.problem.cache
+        if cache is None:
+            return self.validation_groups(X)
+
+        # Only candidates missing from the cache are evaluated, the same key in one population is evaluated once
+        scores = np.zeros((X.shape[0], 2))
+        pending = {}
+        for candidate_id, x in enumerate(X):
+            key = cache.key(x[0], x[1], x[2:].astype(bool))
+            if key in pending:
+                # Repeated candidate of the population gets the scores of the first one, it counts as a hit
+                cache.hits += 1
+                pending[key].append(candidate_id)
+                continue
+            cached_scores = cache.get(key)
+            if cached_scores is None:
+                pending[key] = [candidate_id]
+            else:
+                scores[candidate_id] = cached_scores
+        if pending:
+            pending_scores = self.validation_groups(X[[ids[0] for ids in pending.values()]])
+            for (key, ids), candidate_scores in zip(pending.items(), pending_scores):
+                cache.put(key, candidate_scores)
+                scores[ids] = candidate_scores
+        return scores
+
+    def validation_groups(self, X):
+        params, selected_features, groups = self.group_by_features(X)
+        scores = np.zeros((X.shape[0], 2))
+        if self.n_jobs == 1:
+            for features, members in groups:
+                scores[members] = self.problem.validation_group(features, params[members])
+        elif self.backend != "threading" and getattr(self.problem, "racing", None) is not None:
+            # Worker processes get copies of the racing archive, so they only return the scores of the folds
+            # and the archive of the parent is updated here
+            groups = [(features, members) for features, members in groups if np.any(features)]
+            groups_folds = Parallel(n_jobs=self.n_jobs, backend=self.backend)(
+                           delayed(self.problem.validation_folds)
+                           (features, params[members])
+                           for features, members in groups
+                           )
+            for (features, members), (fold_scores, folds_run) in zip(groups, groups_folds):
+                scores[members] = self.problem.merge_folds(fold_scores, folds_run)
+        else:
+            groups_scores = Parallel(n_jobs=self.n_jobs, backend=self.backend)(
+                            delayed(self.problem.validation_group)
+                            (features, params[members])
+                            for features, members in groups
+                            )
+            for (features, members), group_scores in zip(groups, groups_scores):
+                scores[members] = group_scores
+        return scores
+
+    # X: a two dimensional matrix where each row is a point to evaluate and each column a variable
+    def _evaluate(self, X, out, *args, **kwargs):
+        scores = self.validation(X)
+
+        # Function F is always minimize, but the minus sign (-) before F means maximize
+        out["F"] = -1 * scores
+
+        # Function constraint to select specific numbers of features:
+        number = int((1 - self.scale_features) * self.n_features)
+        out["G"] = (self.n_features - np.sum(X[:, 2:].astype(bool), axis=1) - number) ** 2
@@ -4,9 +4,12 @@ import autograd.numpy as anp
 from sklearn.base import clone
 from pymoo.core.problem import ElementwiseProblem
 
+from methods.kernel_engine import make_kernel_engine
+from methods.approximate_kernel import ApproximateKernel
+
 
 class OptimizationParamCrossVal(ElementwiseProblem):
-    def __init__(self, X, y, estimator, scale_features, n_features, cross_validation, n_param=2, objectives=2):
+    def __init__(self, X, y, estimator, scale_features, n_features, cross_validation, n_param=2, objectives=2, cache=None, kernel_engine=False, kernel_cache_mb=256, approx_kernel=None, approx_components=256, racing=None):
 
         self.X = X
         self.y = y
@@ -16,6 +19,29 @@ class OptimizationParamCrossVal(ElementwiseProblem):
         self.cross_validation = cross_validation
         self.n_param = n_param
         self.objectives = objectives
+        # FitnessCache of already evaluated candidates or None
+        self.cache = cache
+        # FoldRacing which abandons candidates dominated after the first folds or None - all folds are always run
+        self.racing = racing
+
+        # Folds are computed once per problem, so every candidate is validated on the same splits.
+        # Fold matrices are stored C-contiguous in float64 - the feature subset of a fold is then a single copy
+        # which SVC takes without any further conversion
+        self.folds = []
+        for train, test in self.cross_validation.split(self.X, self.y):
+            X_train = np.ascontiguousarray(self.X[train], dtype=np.float64)
+            X_test = np.ascontiguousarray(self.X[test], dtype=np.float64)
+            self.folds.append((X_train, self.y[train], X_test, self.y[test]))
+
+        # RBF kernels of candidates are built from cached per-feature blocks and fitted as precomputed kernels,
+        # None if the blocks do not fit in kernel_cache_mb
+        self.kernel_engine = None
+        if kernel_engine is True and self.estimator.get_params().get("kernel") == "rbf":
+            self.kernel_engine = make_kernel_engine(self.folds, max_mb=kernel_cache_mb)
+        # Candidates are scored by a linear SVM on approximated RBF features ("rff" or "nystroem"), None - exact SVC
+        self.approx_kernel = None
+        if approx_kernel is not None:
+            self.approx_kernel = ApproximateKernel(self.folds, method=approx_kernel, n_components=approx_components)
 
         # Lower and upper bounds for x - 1d array with length equal to number of variable
         xl_real = [1E6, 1E-7]
@@ -28,31 +54,88 @@ class OptimizationParamCrossVal(ElementwiseProblem):
 
         super().__init__(n_var=n_variable, n_obj=objectives,
                          n_constr=1, xl=xl, xu=xu)
+        # The cache stays in the main process, it is not pickled for worker processes
+        self.exclude_from_serialization = self.exclude_from_serialization + ["cache"]
+
+    # Data of the problem does not change during the optimization, so the saved history of the algorithm shares it
+    def __deepcopy__(self, memo):
+        return self
+
+    def fold_subset(self, fold_id, selected_features):
+        X_train, y_train, X_test, y_test = self.folds[fold_id]
+        if np.all(selected_features):
+            return X_train, y_train, X_test, y_test
+        feature_index = np.flatnonzero(selected_features)
+        return X_train[:, feature_index], y_train, X_test[:, feature_index], y_test
 
     # x: a two dimensional matrix where each row is a point to evaluate and each column a variable
     def validation(self, x):
         C = x[0]
         gamma = x[1]
-        selected_features = x[2:]
-        selected_features = selected_features.tolist()
-        scores = np.zeros((self.cross_validation.get_n_splits(), self.objectives))
-
-        for fold_id, (train, test) in enumerate(self.cross_validation.split(self.X, self.y)):
-            if True in selected_features:
-                X_train = self.X[train]
-                y_train = self.y[train]
-                X_test = self.X[test]
-                y_test = self.y[test]
-                clf = None
-                clf = clone(self.estimator.set_params(C=C, gamma=gamma))
-                clf.fit(X_train[:, selected_features], y_train)
-                y_pred = clf.predict(X_test[:, selected_features])
-
-                scores[fold_id] = [sl.metrics.precision(y_test, y_pred), sl.metrics.recall(y_test, y_pred)]
-            else:
-                scores = [0, 0]
-
-        return np.mean(scores, axis=0)
+        selected_features = np.array(x[2:].tolist(), dtype=bool)
+        if not np.any(selected_features):
+            return [0, 0]
+        if self.cache is not None:
+            key = self.cache.key(C, gamma, selected_features)
+            scores = self.cache.get(key)
+            if scores is not None:
+                return scores
+        scores = self.validation_group(selected_features, np.array([[C, gamma]], dtype=float))[0]
+        if self.cache is not None:
+            self.cache.put(key, scores)
+        return scores
+
+    # Evaluate many pairs of hyperparameters (C, gamma) which share the same binary vector of selected features
+    def validation_group(self, selected_features, params):
+        # If at least one element in selected_features are True
+        if not np.any(selected_features):
+            return np.zeros((params.shape[0], self.objectives))
+        return self.merge_folds(*self.validation_folds(selected_features, params))
+
+    # Scores of every fold (n_params x n_folds x objectives) and the number of folds run for every pair of
+    # hyperparameters. It does not change the racing archive, so it can run in a worker process and the parent
+    # merges the results with merge_folds()
+    def validation_folds(self, selected_features, params):
+        scores = np.zeros((params.shape[0], len(self.folds), self.objectives))
+        # Number of folds run for every pair of hyperparameters, candidates abandoned by racing run fewer folds
+        n_folds = len(self.folds)
+        folds_run = np.full(params.shape[0], n_folds)
+        for fold_id in range(n_folds):
+            active = np.flatnonzero(folds_run > fold_id)
+            if self.racing is not None and fold_id > 0:
+                abandoned = active[self.racing.abandon(scores[active], fold_id)]
+                folds_run[abandoned] = fold_id
+                active = np.setdiff1d(active, abandoned)
+            if active.shape[0] == 0:
+                break
+
+            engine = self.approx_kernel if self.approx_kernel is not None else self.kernel_engine
+            if engine is not None:
+                y_test = self.folds[fold_id][3]
+                for param_id, y_pred in zip(active, engine.fit_predict(self.estimator, fold_id, selected_features, params[active])):
+                    scores[param_id, fold_id] = [sl.metrics.precision(y_test, y_pred), sl.metrics.recall(y_test, y_pred)]
+                continue
+
+            # The feature subset of the fold is taken only once for the whole group
+            X_train, y_train, X_test, y_test = self.fold_subset(fold_id, selected_features)
+            for param_id in active:
+                C, gamma = params[param_id]
+                clf = clone(self.estimator).set_params(C=C, gamma=gamma)
+                clf.fit(X_train, y_train)
+                y_pred = clf.predict(X_test)
+                scores[param_id, fold_id] = [sl.metrics.precision(y_test, y_pred), sl.metrics.recall(y_test, y_pred)]
+
+        return scores, folds_run
+
+    def merge_folds(self, scores, folds_run):
+        n_folds = len(self.folds)
+        if self.racing is None:
+            return np.mean(scores, axis=1)
+        # Full candidates get the mean of all folds, abandoned ones the lower confidence bound of the folds run
+        racing_scores = np.array([scores[param_id].mean(axis=0) if folds_run[param_id] == n_folds else self.racing.lower_bound(scores[[param_id], :folds_run[param_id]])[0] for param_id in range(scores.shape[0])])
+        self.racing.record(folds_run, n_folds)
+        self.racing.update(racing_scores[folds_run == n_folds])
+        return racing_scores
 
     def _evaluate(self, x, out, *args, **kwargs):
         scores = self.validation(x)
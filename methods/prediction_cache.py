@@ -0,0 +1,39 @@
+import hashlib
+import numpy as np
+from collections import OrderedDict
+
+
+class PredictionCache:
+    # Predictions of all members (labels or supports) for the last max_entries (data, kind) pairs, keyed by the content
+    # of the data, so predict, predict_proba and calculate_diversity on the same data call the members only once.
+    # The estimator makes a new cache every time its members change
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, X, kind):
+        X = np.ascontiguousarray(X)
+        return (kind, X.shape, X.dtype.str, hashlib.md5(X).hexdigest())
+
+    def get(self, X, kind, compute):
+        if self.max_entries <= 0:
+            return compute()
+        key = self.key(X, kind)
+        value = self.entries.get(key)
+        if value is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return value
+        self.misses += 1
+        value = np.asarray(compute())
+        # Cached arrays are shared by the callers, so they are read-only
+        value.flags.writeable = False
+        self.entries[key] = value
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return value
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries), "max_entries": self.max_entries}
@@ -0,0 +1,134 @@
+import time
+import logging
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pymoo.core.callback import Callback
+from pymoo.core.evaluator import Evaluator
+
+
+class PhaseProfiler:
+    # Wall time, number of calls and peak memory of the named phases of fit and statistics of every NSGA2 generation.
+    # Peak memory (allocations of Python and NumPy, not the ones inside libsvm) is traced by tracemalloc only with
+    # trace_memory=True, because tracing slows the fit down
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.generations = []
+        self.stack = []
+        self.started_tracing = False
+        # Traced memory at the start of the current generation and its peak before the last reset of the peak
+        self.generation_memory = 0
+        self.generation_peak = 0
+
+    # The profiler is shared, not copied, by the deep copies of the algorithm made in minimize() and for its history
+    def __deepcopy__(self, memo):
+        return self
+
+    @contextmanager
+    def phase(self, name):
+        memory = 0
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            self.reset_peak()
+            memory = tracemalloc.get_traced_memory()[0]
+        entry = {"start": time.perf_counter(), "memory": memory, "peak": 0}
+        self.stack.append(entry)
+        try:
+            yield
+        finally:
+            self.stack.pop()
+            stats = self.phases.setdefault(name, {"time": 0.0, "calls": 0, "peak_mb": 0.0})
+            stats["time"] += time.perf_counter() - entry["start"]
+            stats["calls"] += 1
+            if self.trace_memory:
+                peak = max(entry["peak"], tracemalloc.get_traced_memory()[1])
+                stats["peak_mb"] = max(stats["peak_mb"], (peak - entry["memory"]) / 2 ** 20)
+                if not self.stack and self.started_tracing:
+                    tracemalloc.stop()
+                    self.started_tracing = False
+
+    # The peak of the outer phases and of the generation is kept before the peak is reset for the inner one
+    def reset_peak(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        for entry in self.stack:
+            entry["peak"] = max(entry["peak"], peak)
+        self.generation_peak = max(self.generation_peak, peak)
+        tracemalloc.reset_peak()
+
+    # Peak traced memory [MB] since the start of the generation (0 without tracing), the next generation starts now
+    def next_generation(self):
+        if not (self.trace_memory and tracemalloc.is_tracing()):
+            return 0.0
+        peak = max(self.generation_peak, tracemalloc.get_traced_memory()[1])
+        self.reset_peak()
+        peak_mb = (peak - self.generation_memory) / 2 ** 20
+        self.generation_memory = tracemalloc.get_traced_memory()[0]
+        self.generation_peak = 0
+        return peak_mb
+
+    def time(self, name):
+        return self.phases.get(name, {}).get("time", 0.0)
+
+    def info(self):
+        return {"phases": {name: dict(stats) for name, stats in self.phases.items()}, "generations": list(self.generations)}
+
+    def log(self, title=""):
+        for name, stats in self.phases.items():
+            logging.info("PROFILE %s - %s: %.3f [s], %d calls, %.1f [MB]" % (title, name, stats["time"], stats["calls"], stats["peak_mb"]))
+        for generation in self.generations:
+            logging.debug("PROFILE %s - run %d, generation %d: %d evaluations, %.3f [s] (evaluation %.3f [s]), %.1f [MB]" % (title, generation["run"], generation["n_gen"], generation["n_eval"], generation["time"], generation["evaluation_time"], generation["peak_mb"]))
+
+
+# Phase of the profiler or nothing if profiling is off (profiler is None)
+def phase(profiler, name):
+    return nullcontext() if profiler is None else profiler.phase(name)
+
+
+class ProfiledEvaluator(Evaluator):
+    # Evaluation of the candidates (fits of SVC in the optimization problem) is the "evaluation" phase
+    def __init__(self, profiler, **kwargs):
+        super().__init__(**kwargs)
+        self.profiler = profiler
+
+    def eval(self, problem, pop, **kwargs):
+        with self.profiler.phase("evaluation"):
+            return super().eval(problem, pop, **kwargs)
+
+
+class GenerationProfiler(Callback):
+    # Time of every generation of NSGA2, split into the evaluation of candidates and the rest (genetic operators,
+    # survival, saving the history), and its peak memory with trace_memory=True; run - number of the minimize() call,
+    # e.g. the bootstrap repeat. It is created right before minimize(), which starts the first generation
+    def __init__(self, profiler, run=0):
+        super().__init__()
+        self.profiler = profiler
+        self.run = run
+        # The same clock as the phases
+        self.last_time = time.perf_counter()
+        self.last_evaluation_time = profiler.time("evaluation")
+        profiler.next_generation()
+
+    def notify(self, algorithm, **kwargs):
+        now = time.perf_counter()
+        evaluation_time = self.profiler.time("evaluation")
+        generation_time = now - self.last_time
+        self.profiler.generations.append({
+            "run": self.run,
+            "n_gen": algorithm.n_gen,
+            "n_eval": algorithm.evaluator.n_eval,
+            "time": generation_time,
+            "evaluation_time": evaluation_time - self.last_evaluation_time,
+            "operators_time": generation_time - (evaluation_time - self.last_evaluation_time),
+            "peak_mb": self.profiler.next_generation(),
+        })
+        self.last_time = now
+        self.last_evaluation_time = evaluation_time
+
+
+# Keyword arguments of minimize() which record the generations and the evaluation time, none if profiling is off
+def optimization_hooks(profiler, run=0):
+    if profiler is None:
+        return {}
+    return {"callback": GenerationProfiler(profiler, run=run), "evaluator": ProfiledEvaluator(profiler)}
@@ -1,13 +1,16 @@
 from sklearn.base import BaseEstimator, clone
 import numpy as np
+from methods.prediction_cache import PredictionCache
 from utils.diversity import calc_diversity_measures, calc_diversity_measures2
 
 
 class RandomSubspaceEnsemble(BaseEstimator):
-    def __init__(self, base_classifier, n_members=100, subspace_size=3):
+    def __init__(self, base_classifier, n_members=100, subspace_size=3, prediction_cache_size=4):
         self.base_classifier = base_classifier
         self.n_members = n_members
         self.subspace_size = subspace_size
+        # Number of (data, labels or supports) predictions of the members kept by PredictionCache, 0 turns it off
+        self.prediction_cache_size = prediction_cache_size
 
     def fit(self, X, y):
         self.X, self.y = X, y
@@ -20,17 +23,22 @@ class RandomSubspaceEnsemble(BaseEstimator):
         for subspace in self.subspaces:
             clf = clone(self.base_classifier).fit(X[:, subspace], y)
             self.ensemble.append(clf)
+        # New members, the predictions of the old ones are not valid anymore
+        self.prediction_cache = PredictionCache(self.prediction_cache_size)
 
         return self
 
+    def member_predictions(self, X):
+        return self.prediction_cache.get(X, "labels", lambda: np.array([clf.predict(X[:, self.subspaces[i]]) for i, clf in enumerate(self.ensemble)]))
+
     def predict_proba(self, X):
         esm = np.mean(
-            np.array(
+            self.prediction_cache.get(X, "supports", lambda: np.array(
                 [
                     clf.predict_proba(X[:, self.subspaces[i]])
                     for i, clf in enumerate(self.ensemble)
                 ]
-            ),
+            )),
             axis=0,
         )
 
@@ -46,7 +54,7 @@ class RandomSubspaceEnsemble(BaseEstimator):
     def calculate_diversity(self):
         if len(self.ensemble) > 1:
             # All measures for whole ensemble
-            self.entropy_measure_e, self.k0, self.kw, self.disagreement_measure, self.q_statistic_mean = calc_diversity_measures(self.X, self.y, self.ensemble, self.subspaces, p=0.01)
+            self.entropy_measure_e, self.k0, self.kw, self.disagreement_measure, self.q_statistic_mean = calc_diversity_measures(self.X, self.y, self.ensemble, self.subspaces, p=0.01, predictions=self.member_predictions(self.X))
             # entropy_measure_e: E varies between 0 and 1, where 0 indicates no difference and 1 indicates the highest possible diversity.
             # kw - Kohavi-Wolpert variance
             # Q-statistic: <-1, 1>
@@ -0,0 +1,144 @@
+import math
+import numpy as np
+from scipy.stats import kendalltau
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+
+from pymoo.algorithms.moo.nsga2 import NSGA2, RankAndCrowdingSurvival
+from pymoo.core.population import Population
+
+
+class SurrogateModel:
+    # Regressor of (C, gamma, selected features) -> (F, G) trained online on the candidates evaluated by the problem.
+    # It is retrained every retrain_every generations, once at least min_samples candidates are known. Its accuracy is
+    # measured on every screened generation before retraining: mean absolute error and Kendall tau of the predicted
+    # and the real objectives of the evaluated offspring
+    def __init__(self, regressor=None, retrain_every=1, min_samples=10, random_state=0):
+        self.regressor = regressor
+        self.retrain_every = retrain_every
+        self.min_samples = min_samples
+        self.random_state = random_state
+
+        self.model = None
+        self.X_archive = []
+        self.y_archive = []
+        self.n_new = 0
+        self.n_retrain = 0
+        self.n_candidates = 0
+        self.n_screened_out = 0
+        self.generations = []
+
+    # The model is shared, not copied, by the deep copies of the algorithm made in minimize() and for its history
+    def __deepcopy__(self, memo):
+        return self
+
+    # log10 of C and gamma, the number of selected features (the constraint depends on it) and the feature mask
+    def features(self, X):
+        X = np.asarray(X)
+        params = np.log10(X[:, :2].astype(float))
+        mask = X[:, 2:].astype(float)
+        return np.column_stack([params, mask.sum(axis=1), mask])
+
+    def targets(self, pop):
+        G = pop.get("G")
+        if G is None or G.size == 0:
+            return pop.get("F").astype(float)
+        return np.column_stack([pop.get("F"), G]).astype(float)
+
+    # Candidates with non-finite scores (e.g. undefined precision) are not used for training
+    def add(self, pop):
+        targets = self.targets(pop)
+        finite = np.all(np.isfinite(targets), axis=1)
+        self.X_archive.append(self.features(pop.get("X"))[finite])
+        self.y_archive.append(targets[finite])
+        self.n_new += 1
+        n_samples = sum(X.shape[0] for X in self.X_archive)
+        if n_samples >= self.min_samples and (self.model is None or self.n_new >= self.retrain_every):
+            self.fit()
+
+    def fit(self):
+        regressor = self.regressor
+        if regressor is None:
+            regressor = RandomForestRegressor(n_estimators=50, min_samples_leaf=2, random_state=self.random_state)
+        self.model = clone(regressor).fit(np.vstack(self.X_archive), np.vstack(self.y_archive))
+        self.n_new = 0
+        self.n_retrain += 1
+
+    def predict(self, X):
+        return self.model.predict(self.features(X)).reshape(len(X), -1)
+
+    # Accuracy of the predictions of the evaluated offspring
+    def record(self, generation, n_candidates, predicted, real):
+        n_evaluated = real.shape[0]
+        finite = np.all(np.isfinite(real), axis=1)
+        predicted, real = predicted[finite], real[finite]
+        n_obj = predicted.shape[1]
+        tau = []
+        for obj_id in range(n_obj):
+            if real.shape[0] > 1 and np.ptp(real[:, obj_id]) > 0 and np.ptp(predicted[:, obj_id]) > 0:
+                tau.append(float(kendalltau(predicted[:, obj_id], real[:, obj_id])[0]))
+            else:
+                tau.append(None)
+        self.n_candidates += n_candidates
+        self.n_screened_out += n_candidates - n_evaluated
+        self.generations.append({"n_gen": generation,
+                                 "n_candidates": n_candidates,
+                                 "n_evaluated": n_evaluated,
+                                 "mae": np.abs(predicted - real).mean(axis=0).tolist() if real.shape[0] > 0 else None,
+                                 "tau": tau})
+
+    def info(self):
+        mae = [generation["mae"] for generation in self.generations if generation["mae"] is not None]
+        return {"n_retrain": self.n_retrain,
+                "n_candidates": self.n_candidates,
+                "n_screened_out": self.n_screened_out,
+                "mae": np.mean(mae, axis=0).tolist() if mae else None,
+                "generations": self.generations}
+
+
+class SurrogateNSGA2(NSGA2):
+    # NSGA2 with pre-screening of the offspring: every generation the mating produces n_offsprings candidates, the
+    # surrogate predicts their objectives and constraint, and only the best screen_fraction of them (by the rank and
+    # crowding of the predictions) is evaluated by the problem. Predicted constraint violation below cv_tol counts as
+    # feasible - G of the SEMOOS problems is a square of an integer. Until the surrogate is trained all offspring are
+    # evaluated
+    def __init__(self, surrogate=None, screen_fraction=0.2, cv_tol=0.5, **kwargs):
+        super().__init__(**kwargs)
+        self.surrogate = surrogate if surrogate is not None else SurrogateModel(min_samples=self.pop_size)
+        self.screen_fraction = screen_fraction
+        self.cv_tol = cv_tol
+
+    def _initialize_advance(self, infills=None, **kwargs):
+        self.surrogate.add(infills)
+        super()._initialize_advance(infills=infills, **kwargs)
+
+    def _infill(self):
+        off = super()._infill()
+        if off is None or self.surrogate.model is None:
+            return off
+
+        n_select = max(1, int(math.ceil(self.screen_fraction * len(off))))
+        predicted = self.surrogate.predict(off.get("X"))
+        off.set("F_surrogate", predicted)
+        self.n_candidates = len(off)
+        if n_select >= len(off):
+            return off
+
+        # Copies with the predicted values, so the offspring reach the problem without F
+        screened = Population.new("X", off.get("X"))
+        screened.set("F", predicted[:, :self.problem.n_obj])
+        if self.problem.n_constr > 0:
+            G = predicted[:, self.problem.n_obj:]
+            CV = np.maximum(G, 0).sum(axis=1)
+            CV[CV < self.cv_tol] = 0
+            screened.set("G", G, "CV", CV[:, None], "feasible", (CV <= 0)[:, None])
+        selected = RankAndCrowdingSurvival().do(self.problem, screened, n_survive=n_select, return_indices=True)
+        return off[selected]
+
+    def _advance(self, infills=None, **kwargs):
+        if infills is not None:
+            predicted = infills.get("F_surrogate")
+            if predicted is not None and predicted.dtype != object:
+                self.surrogate.record(self.n_gen, self.n_candidates, predicted, self.surrogate.targets(infills))
+            self.surrogate.add(infills)
+        super()._advance(infills=infills, **kwargs)
@@ -0,0 +1,81 @@
+import numbers
+import numpy as np
+
+
+# Binary SVC with RBF kernel and Platt scaling can be evaluated directly from its support vectors
+def is_batchable(clf):
+    return (getattr(clf, "kernel", None) == "rbf" and getattr(clf, "probability", False) is True
+            and hasattr(clf, "support_vectors_") and len(clf.classes_) == 2 and isinstance(clf.gamma, numbers.Real))
+
+
+# Squared euclidean distances between rows of X and rows of S
+def squared_distances(X, S):
+    distances = np.einsum("ij,ij->i", X, X)[:, np.newaxis] + np.einsum("ij,ij->i", S, S)[np.newaxis, :] - 2 * X @ S.T
+    return np.maximum(distances, 0, out=distances)
+
+
+# Support of the classes from the decision function, the same sigmoid as in libsvm (with the opposite sign of
+# the decision function, which sklearn flips for binary problems)
+def platt_proba(decision, prob_a, prob_b):
+    fApB = -decision * prob_a + prob_b
+    # Numerically stable 1 / (1 + exp(fApB))
+    p = np.where(fApB >= 0, np.exp(-np.abs(fApB)) / (1 + np.exp(-np.abs(fApB))), 1 / (1 + np.exp(-np.abs(fApB))))
+    r = np.clip(p, 1e-7, 1 - 1e-7)
+    return pairwise_proba(r.ravel()).reshape(r.shape + (2,))
+
+
+# multiclass_probability() of libsvm for two classes - the same fixed point iterations with the same stopping
+# condition, so the result is equal to predict_proba() and not only to the pairwise probability r
+def pairwise_proba(r, max_iter=100, eps=0.005 / 2):
+    Q = np.array([[(1 - r) ** 2, -(1 - r) * r], [-(1 - r) * r, r ** 2]])
+    p = np.full((2, r.shape[0]), 0.5)
+    active = np.ones(r.shape[0], dtype=bool)
+    for _ in range(max_iter):
+        Qp = np.einsum("tjn,jn->tn", Q, p)
+        pQp = np.sum(p * Qp, axis=0)
+        active &= np.max(np.abs(Qp - pQp), axis=0) >= eps
+        if not np.any(active):
+            break
+        for t in range(2):
+            diff = np.where(active, (-Qp[t] + pQp) / Q[t, t], 0)
+            p[t] += diff
+            pQp = (pQp + diff * (diff * Q[t, t] + 2 * Qp[t])) / (1 + diff) / (1 + diff)
+            Qp = (Qp + diff * Q[t]) / (1 + diff)
+            p /= 1 + diff
+    return p.T
+
+
+# Support vectors of the members sharing the same features without duplicates and the columns of every member in them.
+# Members can be trained on different data (bootstrap samples, chunks of partial_fit), so the vectors are compared
+# by their values, not by the indexes of the training samples
+def unique_support_vectors(members):
+    support_vectors = np.concatenate([member_clf.support_vectors_ for member_clf in members])
+    unique_vectors, inverse = np.unique(support_vectors, axis=0, return_inverse=True)
+    starts = np.cumsum([0] + [member_clf.support_vectors_.shape[0] for member_clf in members])
+    inverse = inverse.ravel()
+    return unique_vectors, [inverse[start:stop] for start, stop in zip(starts[:-1], starts[1:])]
+
+
+# Ensemble support matrix (n_members x n_samples x n_classes) computed member after member for the members
+# sharing the same features: columns of X are taken once per subset of features and distances to the support
+# vectors of all these members are computed in one pass, then each member only takes its own columns
+def batch_support_matrix(ensemble, selected_features, X):
+    supports = [None] * len(ensemble)
+    groups = {}
+    for member_id, (member_clf, sf) in enumerate(zip(ensemble, selected_features)):
+        if is_batchable(member_clf):
+            groups.setdefault(np.packbits(np.asarray(sf, dtype=bool)).tobytes(), []).append(member_id)
+        else:
+            supports[member_id] = member_clf.predict_proba(X[:, sf])
+
+    for members in groups.values():
+        X_sf = np.ascontiguousarray(X[:, selected_features[members[0]]], dtype=np.float64)
+        unique_vectors, member_columns = unique_support_vectors([ensemble[member_id] for member_id in members])
+        distances = squared_distances(X_sf, unique_vectors)
+
+        for member_id, columns in zip(members, member_columns):
+            member_clf = ensemble[member_id]
+            kernel = np.exp(-member_clf.gamma * distances[:, columns])
+            decision = kernel @ member_clf.dual_coef_[0] + member_clf.intercept_[0]
+            supports[member_id] = platt_proba(decision, member_clf.probA_[0], member_clf.probB_[0])
+    return np.array(supports)
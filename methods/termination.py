@@ -0,0 +1,68 @@
+import time
+import numpy as np
+from pymoo.core.termination import Termination
+
+
+# Hypervolume of a two objective front (minimization) with respect to the reference point
+def hypervolume_2d(F, ref_point=(0, 0)):
+    F = np.asarray(F, dtype=float)
+    F = F[np.all(np.isfinite(F), axis=1) & np.all(F < ref_point, axis=1)]
+    hv = 0
+    prev_f2 = ref_point[1]
+    for f1, f2 in F[np.lexsort((F[:, 1], F[:, 0]))]:
+        if f2 < prev_f2:
+            hv += (ref_point[0] - f1) * (prev_f2 - f2)
+            prev_f2 = f2
+    return hv
+
+
+class TerminationPolicy(Termination):
+    # Stops NSGA2 after n_eval evaluations, after max_time seconds or when the hypervolume of the front
+    # did not improve by more than hv_tol over the last hv_n_last generations; reason keeps the cause
+    def __init__(self, n_eval=1000, max_time=None, hv_tol=None, hv_n_last=3):
+        super().__init__()
+        self.n_eval = n_eval
+        self.max_time = max_time
+        self.hv_tol = hv_tol
+        self.hv_n_last = hv_n_last
+
+        self.start = None
+        self.hv_history = []
+        self.reason = None
+
+    def do_continue(self, algorithm):
+        # Mating could not produce any new offspring
+        if self.force_termination:
+            self.reason = self.reason or "no_offspring"
+            return False
+        return self._do_continue(algorithm)
+
+    def _do_continue(self, algorithm):
+        if self.start is None:
+            self.start = algorithm.start_time
+
+        if self.n_eval is not None and algorithm.evaluator.n_eval >= self.n_eval:
+            self.reason = "n_eval"
+            return False
+
+        if self.max_time is not None and time.time() - self.start >= self.max_time:
+            self.reason = "max_time"
+            return False
+
+        if self.hv_tol is not None and algorithm.opt is not None:
+            # Objectives are [-precision, -recall], so (0, 0) is the worst possible point
+            self.hv_history.append(hypervolume_2d(algorithm.opt.get("F")))
+            if len(self.hv_history) > self.hv_n_last:
+                improvement = max(self.hv_history[-self.hv_n_last:]) - self.hv_history[-self.hv_n_last - 1]
+                if improvement <= self.hv_tol:
+                    self.reason = "hv_stagnation"
+                    return False
+
+        return True
+
+    def info(self, algorithm):
+        return {"reason": self.reason,
+                "n_eval": algorithm.evaluator.n_eval,
+                "n_gen": algorithm.n_gen,
+                "time": time.time() - self.start if self.start is not None else 0,
+                "hv": self.hv_history[-1] if self.hv_history else hypervolume_2d(algorithm.opt.get("F"))}
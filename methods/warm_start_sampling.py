@@ -0,0 +1,19 @@
+import numpy as np
+from pymoo.core.sampling import Sampling
+
+
+class WarmStartSampling(Sampling):
+    # Initial population made of the pareto set of the previous run, the rest is filled by the random sampling
+    def __init__(self, X_warm, sampling):
+        super().__init__()
+        self.X_warm = X_warm
+        self.sampling = sampling
+
+    def _do(self, problem, n_samples, **kwargs):
+        X_warm = self.X_warm[:n_samples]
+        n_random = n_samples - X_warm.shape[0]
+        if n_random <= 0:
+            return X_warm.copy()
+        # Random part is sampled inside minimize(), so it depends on the seed of the run as before
+        X_random = self.sampling._do(problem, n_random, **kwargs)
+        return np.vstack([X_warm, X_random.astype(X_warm.dtype)])
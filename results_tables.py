@@ -9,6 +9,7 @@ from methods.moo_ensemble_bootstrap_pruned import MooEnsembleSVCbootstrapPruned
 from methods.random_subspace_ensemble import RandomSubspaceEnsemble
 from methods.feature_selection_clf import FeatueSelectionClf
 from utils.load_dataset import find_datasets, calc_imbalance_ratio
+from utils.results_loader import load_raw_results
 
 
 warnings.filterwarnings("ignore")
@@ -56,25 +57,16 @@ for dir_id, dir in enumerate(directories):
     for dataset_id, dataset in enumerate(find_datasets(DATASETS_DIR)):
         datasets.append(dataset)
 
-mean_scores = np.zeros((n_datasets, n_metrics, n_methods))
-stds = np.zeros((n_datasets, n_metrics, n_methods))
 experiments_paths = ["experiment5_cross_val_in_opt_9l", "experiment5_cross_val_in_opt_9h"]
+# Load data from files - all results of each experiment are read in one pass and cached, every dataset is
+# taken from the experiment which has its files
+data_np = np.full((n_datasets, n_metrics, n_methods, n_folds), np.nan)
 for exp in experiments_paths:
-    for dataset_id, dataset in enumerate(datasets):
-        for clf_id, clf_name in enumerate(methods):
-            for metric_id, metric in enumerate(metrics_alias):
-                try:
-                    filename = "results/experiment_server/%s/raw_results/%s/%s/%s.csv" % (exp, metric, dataset, clf_name)
-                    if not os.path.isfile(filename):
-                        # print("File not exist - %s" % filename)
-                        continue
-                    scores = np.genfromtxt(filename, delimiter=',', dtype=np.float32)
-                    mean_score = np.mean(scores)
-                    mean_scores[dataset_id, metric_id, clf_id] = mean_score
-                    std = np.std(scores)
-                    stds[dataset_id, metric_id, clf_id] = std
-                except:
-                    print("Error loading dataset - %s!" % dataset)
+    data_exp = load_raw_results("experiment_server/%s" % exp, datasets, methods, metrics_alias, n_folds, fill_value=np.nan)
+    data_np = np.where(np.isnan(data_exp), data_np, data_exp)
+data_np = np.nan_to_num(data_np)
+mean_scores = np.mean(data_np, axis=3)
+stds = np.std(data_np, axis=3)
 
 IR = calc_imbalance_ratio(directories)
 IR_argsorted = np.argsort(IR)
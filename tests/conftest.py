@@ -0,0 +1,24 @@
+import os
+import sys
+import warnings
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+ROOT = os.path.realpath(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.load_dataset import load_data
+
+
+# iris0 - small (150 x 4) imbalanced KEEL dataset, features scaled like in the experiments
+@pytest.fixture(scope="session")
+def iris0():
+    X, y, classes = load_data(os.path.join(ROOT, "datasets/9lower/iris0.dat"), cache=False)
+    return MinMaxScaler().fit_transform(X.to_numpy()), y
+
+
+@pytest.fixture(autouse=True)
+def ignore_warnings():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        yield
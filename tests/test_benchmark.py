@@ -0,0 +1,16 @@
+import os
+import numpy as np
+from sklearn.svm import SVC
+
+from conftest import ROOT
+from utils.benchmark import run_isolated, peak_rss_mb
+
+
+# The peak RSS of the case does not include the memory of the process running the benchmark
+def test_isolated_peak_rss_excludes_parent():
+    memory = np.ones(50_000_000)
+    result = run_isolated(SVC(), os.path.join(ROOT, "datasets/9lower/iris0.dat"))
+    assert result["status"] == "ok"
+    assert peak_rss_mb() > memory.nbytes / 2 ** 20
+    assert result["peak_rss_mb"] < memory.nbytes / 2 ** 20
+    assert result["bac"] == 1
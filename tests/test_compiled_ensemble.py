@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+from methods.moo_ensemble_SW import MooEnsembleSVC
+from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
+from methods.moo_ensemble_bootstrap_pruned import MooEnsembleSVCbootstrapPruned
+from methods.compiled_ensemble import export_ensemble, CompiledEnsemble
+
+
+def fit_estimator(estimator, X, y, **kwargs):
+    params = dict(n_eval=20, p_size=10, **kwargs)
+    if estimator is not MooEnsembleSVC:
+        params["n_repeats"] = 2
+    np.random.seed(0)
+    clf = estimator(SVC(probability=True), **params)
+    clf.fit(X, y)
+    return clf
+
+
+@pytest.mark.parametrize("estimator", [MooEnsembleSVC, MooEnsembleSVCbootstrap, MooEnsembleSVCbootstrapPruned])
+def test_compiled_predictions_equal_estimator(iris0, tmp_path, estimator):
+    X, y = iris0
+    clf = fit_estimator(estimator, X, y)
+    export_ensemble(clf, str(tmp_path))
+    for mmap_mode in ["r", None]:
+        compiled = CompiledEnsemble(str(tmp_path), mmap_mode=mmap_mode)
+        assert np.allclose(compiled.ensemble_support_matrix(X), clf.ensemble_support_matrix(X), atol=1e-8)
+        assert np.allclose(compiled.predict_proba(X), clf.predict_proba(X), atol=1e-8)
+        assert np.array_equal(compiled.predict(X), clf.predict(X))
+
+
+def test_compiled_majority_voting(iris0, tmp_path):
+    X, y = iris0
+    clf = fit_estimator(MooEnsembleSVC, X, y, predict_decision="MV")
+    export_ensemble(clf, str(tmp_path))
+    assert np.array_equal(CompiledEnsemble(str(tmp_path)).predict(X), clf.predict(X))
+
+
+def test_export_needs_probability(iris0, tmp_path):
+    X, y = iris0
+    clf = fit_estimator(MooEnsembleSVC, X, y)
+    clf.ensemble[0] = SVC().fit(X, y)
+    with pytest.raises(ValueError):
+        export_ensemble(clf, str(tmp_path))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+from utils.diversity import pairwise_counts, make_relationship_tables, calc_diversity_measures, Q_statistic, disagreement_measure
+from methods.moo_ensemble_SW import MooEnsembleSVC
+
+
+# Relationship tables pair by pair, like before pairwise_counts()
+def naive_relationship_table(d_pred):
+    rt = np.zeros(shape=(2, 2))
+    for idx, val in zip(*np.unique(d_pred.T, axis=0, return_counts=True)):
+        rt[tuple(idx)] = val
+    return rt
+
+
+def naive_relationship_tables(predictions, full_matrix=False):
+    pool_len = len(predictions)
+    if full_matrix:
+        return np.array([[naive_relationship_table(predictions[(i, k), :]) for k in range(pool_len)] for i in range(pool_len)]).T
+    return np.array([naive_relationship_table(predictions[(i, k), :]) for i in range(pool_len) for k in range(i + 1, pool_len)]).T
+
+
+@pytest.mark.parametrize("n_classifiers", [2, 3, 10])
+def test_tables_equal_naive(n_classifiers):
+    random_state = np.random.RandomState(n_classifiers)
+    predictions = (random_state.uniform(size=(n_classifiers, 50)) < random_state.uniform(0.1, 0.9, (n_classifiers, 1))).astype(int)
+    # Classifiers which are always right and always wrong
+    predictions[0] = 1
+    predictions[-1] = 0
+    for full_matrix in [False, True]:
+        tables = make_relationship_tables(predictions, full_matrix=full_matrix)
+        assert tables.shape == naive_relationship_tables(predictions, full_matrix=full_matrix).shape
+        assert np.array_equal(tables, naive_relationship_tables(predictions, full_matrix=full_matrix))
+    assert np.array_equal(pairwise_counts(predictions).sum(axis=(0, 1)), np.full((n_classifiers, n_classifiers), 50))
+
+
+def test_diversity_of_estimator(iris0):
+    X, y = iris0
+    np.random.seed(0)
+    clf = MooEnsembleSVC(SVC(probability=True), n_eval=20, p_size=10)
+    clf.fit(X, y)
+    predictions = np.array([member_clf.predict(X[:, sf]) for member_clf, sf in zip(clf.ensemble, clf.selected_features)])
+    tables = naive_relationship_tables(np.equal(predictions, y).astype(int))
+    e, k, kw, dis, q = calc_diversity_measures(X, y, clf.ensemble, clf.selected_features, p=0.01)
+    assert np.isclose(q, Q_statistic(tables).mean())
+    assert np.isclose(dis, disagreement_measure(tables).mean())
+    assert np.allclose(clf.calculate_diversity(), (e, kw, dis, q))
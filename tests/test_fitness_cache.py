@@ -0,0 +1,47 @@
+import numpy as np
+
+from methods.fitness_cache import FitnessCache
+from methods.optimization_param_batch import OptimizationParamBatch
+from test_optimization_param_batch import make_problem, make_population, evaluate
+
+
+def test_lru_eviction():
+    cache = FitnessCache(max_size=2)
+    keys = [cache.key(10 ** 6 * (i + 1), 1e-5, [True, False]) for i in range(3)]
+    cache.put(keys[0], [0.1, 0.2])
+    cache.put(keys[1], [0.3, 0.4])
+    assert cache.get(keys[0]).tolist() == [0.1, 0.2]
+    # keys[1] is the least recently used one
+    cache.put(keys[2], [0.5, 0.6])
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.info() == {"hits": 3, "misses": 1, "size": 2, "max_size": 2}
+
+
+def test_key_tolerance():
+    cache = FitnessCache(decimals=3)
+    assert cache.key(1e7, 1e-5, [1, 0, 1]) == cache.key(1e7 * (1 + 1e-5), 1e-5 * (1 - 1e-5), [1, 0, 1])
+    assert cache.key(1e7, 1e-5, [1, 0, 1]) != cache.key(1.1e7, 1e-5, [1, 0, 1])
+    assert cache.key(1e7, 1e-5, [1, 0, 1]) != cache.key(1e7, 1e-5, [1, 1, 1])
+
+
+# Repeated candidates are evaluated once and get the scores of the evaluation without the cache. The empty mask is
+# left out, the elementwise cross-validated problem returns zeros for it without the cache
+def test_cached_scores_are_exact(iris0):
+    X, y = iris0
+    population = make_population(12)
+    population = population[np.any(population[:, 2:].astype(bool), axis=1)]
+    repeated = np.vstack([population, population[::2], population])
+    for cross_val in [True, False]:
+        F, G = evaluate(make_problem(X, y, cross_val=cross_val), repeated)
+        for batch in [False, True]:
+            cache = FitnessCache()
+            problem = make_problem(X, y, cross_val=cross_val, cache=cache)
+            if batch:
+                problem = OptimizationParamBatch(problem)
+            F_cached, G_cached = evaluate(problem, repeated)
+            assert np.allclose(F, F_cached, equal_nan=True)
+            assert np.array_equal(G.ravel(), G_cached.ravel())
+            info = cache.info()
+            assert info["misses"] == info["size"] == population.shape[0]
+            assert info["hits"] == repeated.shape[0] - population.shape[0]
@@ -0,0 +1,105 @@
+import pickle
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.svm import SVC
+from sklearn.model_selection import RepeatedStratifiedKFold
+
+from methods.fold_racing import FoldRacing, dominated
+from methods.optimization_param_with_cross_val_SW import OptimizationParamCrossVal
+from methods.optimization_param_batch import OptimizationParamBatch
+from methods.moo_ensemble_SW import MooEnsembleSVC
+
+
+def make_problem(X, y, racing=None):
+    return OptimizationParamCrossVal(X, y, estimator=SVC(), scale_features=0.75, n_features=X.shape[1], cross_validation=RepeatedStratifiedKFold(n_splits=2, n_repeats=5, random_state=0), racing=racing)
+
+
+# iris0 is separable with all features, candidates on the sepal features only with small C * gamma are clearly worse
+def make_candidates(strong):
+    params = [(1e7, 1e-7), (1e6, 1e-6), (1e7, 1e-6), (1e8, 1e-6), (1e9, 1e-4)]
+    masks = [[1, 1, 1, 1]] if strong else [[1, 0, 0, 0], [0, 1, 0, 0]]
+    return np.array([[C, gamma] + mask for C, gamma in params for mask in masks], dtype=object)
+
+
+def test_archive_is_non_dominated_set():
+    racing = FoldRacing()
+    racing.update(np.array([[0.5, 0.5], [0.4, 0.4], [0.9, 0.1]]))
+    racing.update(np.array([[0.6, 0.6], [0.6, 0.6], [0.1, 0.2]]))
+    assert sorted(map(tuple, racing.archive)) == [(0.6, 0.6), (0.9, 0.1)]
+    assert not np.any(dominated(racing.archive, racing.archive))
+
+
+def test_abandoned_score_is_lower_bound():
+    racing = FoldRacing(min_folds=2)
+    racing.update(np.array([[0.9, 0.9]]))
+    scores = np.array([[[0.2, 0.3], [0.25, 0.3], [0.3, 0.3]], [[0.9, 0.95], [0.95, 0.9], [0.9, 0.9]]])
+    assert racing.abandon(scores, 3).tolist() == [True, False]
+    assert np.all(racing.lower_bound(scores[:1]) <= scores[:1].mean(axis=1))
+    assert np.all(racing.lower_bound(scores[:1]) >= 0)
+
+
+def test_racing_scores_of_full_candidates_are_exact(iris0):
+    X, y = iris0
+    strong, weak = make_candidates(True), make_candidates(False)
+    exact = OptimizationParamBatch(make_problem(X, y)).validation(weak)
+    racing = FoldRacing()
+    problem = OptimizationParamBatch(make_problem(X, y, racing))
+    assert np.allclose(problem.validation(strong), 1)
+    raced = problem.validation(weak)
+
+    info = racing.info()
+    assert info["n_candidates"] == len(strong) + len(weak)
+    assert info["n_abandoned"] > 0
+    assert info["n_folds_run"] < info["n_folds_total"]
+    assert not np.any(dominated(racing.archive, racing.archive))
+    # Abandoned candidates get a pessimistic estimate, full ones the exact mean
+    assert np.all(np.nan_to_num(raced) <= np.nan_to_num(exact) + 1e-12)
+    assert np.sum(np.all(np.isclose(raced, exact, equal_nan=True), axis=1)) == len(weak) - info["n_abandoned"]
+
+
+# Worker processes get copies of the archive, the parent merges their folds
+def test_racing_with_process_backend(iris0):
+    X, y = iris0
+    racing = FoldRacing()
+    problem = OptimizationParamBatch(make_problem(X, y, racing), n_jobs=2, backend="loky")
+    problem.validation(make_candidates(True))
+    problem.validation(make_candidates(False))
+    info = racing.info()
+    assert info["n_candidates"] == 15
+    assert info["n_abandoned"] > 0
+    assert racing.archive.tolist() == [[1, 1]]
+
+
+def test_estimator_reports_racing(iris0):
+    X, y = iris0
+    clf = MooEnsembleSVC(SVC(probability=True), cross_val=True, n_eval=30, p_size=10, racing=True)
+    clf.fit(X, y)
+    assert len(clf.racing_info) == 1
+    assert clf.racing_info[0]["n_candidates"] > 0
+
+
+# Updates of many threads at once keep every point and every count
+def test_concurrent_updates():
+    racing = FoldRacing()
+    points = np.column_stack([np.linspace(0, 1, 400), np.linspace(1, 0, 400)])
+
+    def merge(thread_id):
+        for point in points[thread_id::8]:
+            racing.record(np.array([3, 10]), 10)
+            racing.update(point[np.newaxis])
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(merge, range(8)))
+    assert racing.archive.shape[0] == points.shape[0]
+    assert racing.info()["n_candidates"] == 2 * points.shape[0]
+    assert racing.info()["n_folds_run"] == 13 * points.shape[0]
+    assert pickle.loads(pickle.dumps(racing)).archive.shape == racing.archive.shape
+
+
+def test_racing_with_threads(iris0):
+    X, y = iris0
+    racing = FoldRacing()
+    problem = OptimizationParamBatch(make_problem(X, y, racing), n_jobs=4, backend="threading")
+    problem.validation(make_candidates(True))
+    problem.validation(make_candidates(False))
+    assert racing.info()["n_candidates"] == 15
+    assert racing.archive.tolist() == [[1, 1]]
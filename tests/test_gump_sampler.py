@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from methods.gump_sampler import GumpSampler, minkowski_row
+
+
+# GUMP bootstrap with the whole n_samples x n_samples distance matrix, like before the sampler
+def reference_bootstrap(X, p, n_repeats):
+    diff = np.abs(X[:, np.newaxis] - X[np.newaxis, :])
+    distances = np.max(diff, axis=2) if p == np.inf else np.sum(diff ** p, axis=2) ** (1 / p)
+    roots, samples = [], []
+    for repeat in range(n_repeats):
+        if repeat == 0:
+            root = np.random.randint(0, X.shape[0]-1)
+        else:
+            root = np.argmax(np.mean(distances[roots], axis=0))
+        roots.append(root)
+        n2 = np.max(distances[root]) - distances[root]
+        n2 = n2/np.sum(n2)
+        samples.append(np.random.choice(np.arange(X.shape[0]), size=int(X.shape[0]), replace=True, p=n2))
+    return roots, samples
+
+
+@pytest.mark.parametrize("p", [0.5, 1, 2, 3, np.inf])
+def test_roots_and_samples_equal_full_matrix(iris0, p):
+    X, _ = iris0
+    np.random.seed(0)
+    roots, samples = reference_bootstrap(X, p, n_repeats=5)
+
+    np.random.seed(0)
+    # Chunks smaller than the dataset
+    sampler = GumpSampler(X, p_minkowski=p, chunk_size=7)
+    for sample in samples:
+        assert np.array_equal(sampler.sample(), sample)
+    assert [int(root) for root in sampler.roots] == [int(root) for root in roots]
+
+
+def test_minkowski_row(iris0):
+    X, _ = iris0
+    for p in [0.5, 1, 2, 3, np.inf]:
+        expected = np.linalg.norm(X - X[3], ord=p, axis=1) if p >= 1 else np.sum(np.abs(X - X[3]) ** p, axis=1) ** (1 / p)
+        assert np.allclose(minkowski_row(X, 3, p=p, chunk_size=16), expected)
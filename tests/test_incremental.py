@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+import methods.moo_ensemble_SW as moo_ensemble_SW
+from methods.moo_ensemble_SW import MooEnsembleSVC
+from methods.warm_start_sampling import WarmStartSampling
+
+
+# Warm started initial populations of the runs, (X_warm, initial population)
+@pytest.fixture
+def warm_starts(monkeypatch):
+    records = []
+
+    class RecordingSampling(WarmStartSampling):
+        def _do(self, problem, n_samples, **kwargs):
+            X = super()._do(problem, n_samples, **kwargs)
+            records.append((self.X_warm, X))
+            return X
+    monkeypatch.setattr(moo_ensemble_SW, "WarmStartSampling", RecordingSampling)
+    return records
+
+
+@pytest.mark.parametrize("max_members", [1, 3])
+def test_member_budget_and_pareto_reuse(iris0, warm_starts, max_members):
+    X, y = iris0
+    chunks = np.array_split(np.random.RandomState(0).permutation(y.shape[0]), 3)
+    np.random.seed(0)
+    clf = MooEnsembleSVC(SVC(probability=True), n_eval=20, p_size=10, incremental=True, max_members=max_members, prediction_cache_size=0)
+    for batch, chunk in enumerate(chunks):
+        chunk = np.sort(chunk)
+        pareto_set = getattr(clf, "pareto_set", None)
+        if batch == 0:
+            clf.fit(X[chunk], y[chunk])
+        else:
+            clf.partial_fit(X[chunk], y[chunk])
+            # The pareto set of the earlier chunks starts the run
+            X_warm, population = warm_starts[-1]
+            assert len(warm_starts) == batch
+            assert np.array_equal(X_warm, pareto_set)
+            assert np.array_equal(population[:len(pareto_set)], pareto_set)
+
+        assert len(clf.ensemble) <= max_members
+        assert len(clf.ensemble) == len(clf.selected_features) == len(clf.member_batch)
+        # Members of the new chunk go first, the earlier ones fill the rest of the budget
+        assert clf.member_batch.count(batch) == min(len(clf.pareto_set), max_members)
+        assert clf.member_batch == sorted(clf.member_batch)
+        assert set(clf.member_batch) <= set(range(batch + 1))
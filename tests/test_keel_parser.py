@@ -0,0 +1,86 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import OrdinalEncoder, LabelEncoder
+
+from conftest import ROOT
+from utils.load_dataset import load_data
+from utils import keel_parser
+from utils.keel_parser import parse_keel, MISSING_VALUES
+
+# Missing values (cleveland), undeclared nominal values (kddcup), numbers declared as nominal values (kr-vs-k, zoo)
+DATASETS = ["9lower/iris0", "9higher/cleveland-0_vs_4", "9higher/kddcup-land_vs_satan", "9higher/kr-vs-k-zero_vs_eight", "9higher/zoo-3"]
+
+
+def path(name):
+    return os.path.join(ROOT, "datasets", name + ".dat")
+
+
+# Parsing of the .dat files with pandas used by load_data before parse_keel
+def pandas_reference(filename):
+    with open(filename) as file:
+        for line in file:
+            if line.startswith("@data"):
+                break
+        df = pd.read_csv(file, header=None)
+    features = df.iloc[:, 0:-1]
+    categorical_id = [key for key in dict(features.dtypes) if dict(features.dtypes)[key] in ['object']]
+    features[categorical_id] = OrdinalEncoder().fit_transform(features[categorical_id])
+    return features, LabelEncoder().fit_transform(df.iloc[:, -1].values.astype(str))
+
+
+@pytest.mark.parametrize("name", DATASETS)
+def test_load_data_equals_pandas_encoding(name):
+    features, labels = pandas_reference(path(name))
+    X, y, classes = load_data(path(name), cache=False)
+    assert list(X.dtypes) == list(features.dtypes)
+    assert np.array_equal(X.to_numpy(), features.to_numpy())
+    assert np.array_equal(y, labels)
+    assert np.array_equal(classes, np.unique(labels))
+
+
+@pytest.mark.parametrize("name", DATASETS)
+def test_chunks_and_memmap_equal_whole_file(name, tmp_path):
+    X, y, classes, columns = parse_keel(path(name))
+    X_chunks, y_chunks, _, columns_chunks = parse_keel(path(name), chunk_size=7, out=str(tmp_path / "data"))
+    assert columns_chunks == columns
+    assert np.array_equal(X_chunks, X) and np.array_equal(y_chunks, y)
+    assert np.array_equal(np.load(str(tmp_path / "data_X.npy"), mmap_mode="r"), X)
+
+
+def test_missing_value_policies():
+    filename = path("9higher/cleveland-0_vs_4")
+    with open(filename) as file:
+        data = file.read().split("@data")[1]
+    n_missing = sum(data.count(token) for token in MISSING_VALUES)
+    X_nan, _, _, columns = parse_keel(filename, missing="nan")
+    assert np.sum(np.isnan(X_nan)) == n_missing > 0
+    assert all(kind != "nominal" for _, kind, _ in columns[:-1])
+    X_mean, _, _, _ = parse_keel(filename, missing="mean")
+    assert not np.any(np.isnan(X_mean))
+    missing = np.isnan(X_nan)
+    assert np.array_equal(X_mean[~missing], X_nan[~missing])
+    assert np.allclose(X_mean[missing], np.nanmean(X_nan, axis=0)[np.nonzero(missing)[1]])
+    # The default policy has no NaN, load_data of other policies is cached separately
+    assert not np.any(np.isnan(load_data(filename, cache=False)[0].to_numpy()))
+    with pytest.raises(ValueError):
+        parse_keel(filename, missing="drop")
+
+
+# Files are read once, only the columns whose tokens are not the declared numbers ("?" of cleveland with the policy
+# "category") are read once more
+@pytest.mark.parametrize("name, missing, n_passes", [("9lower/iris0", "category", 1), ("9higher/kddcup-land_vs_satan", "category", 1),
+                                                    ("9higher/kr-vs-k-zero_vs_eight", "category", 1), ("9higher/cleveland-0_vs_4", "nan", 1),
+                                                    ("9higher/cleveland-0_vs_4", "category", 2)])
+def test_file_passes(monkeypatch, name, missing, n_passes):
+    passes = []
+    read_chunks = keel_parser.read_chunks
+
+    def counting_read_chunks(filename, chunk_size):
+        passes.append(chunk_size)
+        return read_chunks(filename, chunk_size)
+    monkeypatch.setattr(keel_parser, "read_chunks", counting_read_chunks)
+    X, _, _, _ = parse_keel(path(name), chunk_size=7, missing=missing)
+    assert len(passes) == n_passes
+    assert X.dtype == np.float32
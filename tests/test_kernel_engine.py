@@ -0,0 +1,90 @@
+import pickle
+import warnings
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+from sklearn.model_selection import RepeatedStratifiedKFold
+
+from methods.kernel_engine import KernelEngine
+from methods.optimization_param_with_cross_val_SW import OptimizationParamCrossVal
+from methods.optimization_param_batch import OptimizationParamBatch
+
+
+def make_problem(X, y, **params):
+    return OptimizationParamCrossVal(X, y, estimator=SVC(), scale_features=0.75, n_features=X.shape[1], cross_validation=RepeatedStratifiedKFold(n_splits=2, n_repeats=5, random_state=0), **params)
+
+
+def make_candidates(n_features, n_candidates=12, random_state=0):
+    random_state = np.random.RandomState(random_state)
+    masks = random_state.rand(n_candidates, n_features) < 0.5
+    masks[:, 0] = True
+    return np.column_stack([10 ** random_state.uniform(6, 9, n_candidates), 10 ** random_state.uniform(-7, -4, n_candidates), masks]).astype(object)
+
+
+def test_engine_scores_equal_exact_svc(iris0):
+    X, y = iris0
+    candidates = make_candidates(X.shape[1])
+    exact = OptimizationParamBatch(make_problem(X, y)).validation(candidates)
+    problem = make_problem(X, y, kernel_engine=True)
+    assert problem.kernel_engine is not None
+    assert np.allclose(OptimizationParamBatch(problem).validation(candidates), exact, equal_nan=True)
+
+
+# Totals of the folds are blocks of the LRU cache as well, the cache never exceeds its budget
+def test_engine_budget_counts_totals(iris0):
+    X, y = iris0
+    problem = make_problem(X, y, kernel_engine=True)
+    engine = problem.kernel_engine
+    engine.max_bytes = engine.required_bytes() // 3
+    for fold_id in range(len(problem.folds)):
+        engine.squared_distances(fold_id, np.array([True, True, True, False]))
+        assert engine.n_bytes <= engine.max_bytes
+    assert any(feature is None for _, feature in engine.blocks)
+    assert engine.n_bytes == sum(train.nbytes + test.nbytes for train, test in engine.blocks.values())
+
+
+# Blocks of all folds do not fit, the least recently used ones are evicted and computed again
+def test_engine_with_small_budget_equals_exact_svc(iris0):
+    X, y = iris0
+    candidates = make_candidates(X.shape[1], n_candidates=24)
+    exact = OptimizationParamBatch(make_problem(X, y)).validation(candidates)
+    engine = make_problem(X, y, kernel_engine=True).kernel_engine
+    kernel_cache_mb = 2 * engine.candidate_bytes() / 2 ** 20
+    problem = make_problem(X, y, kernel_engine=True, kernel_cache_mb=kernel_cache_mb)
+    engine = problem.kernel_engine
+    assert engine is not None and engine.max_bytes < engine.required_bytes()
+    assert np.allclose(OptimizationParamBatch(problem).validation(candidates), exact, equal_nan=True)
+    assert engine.n_bytes <= engine.max_bytes
+    assert engine.misses > len(problem.folds) * (X.shape[1] + 1)
+
+
+def test_blocks_are_float32(iris0):
+    X, y = iris0
+    engine = make_problem(X, y, kernel_engine=True).kernel_engine
+    block_train, block_test = engine.feature_block(0, 1)
+    assert block_train.dtype == np.float32 and block_test.dtype == np.float32
+    assert engine.n_bytes == engine.block_bytes(0)
+
+
+# A candidate needs the total of the fold and one feature block
+def test_engine_falls_back_to_exact_svc(iris0):
+    X, y = iris0
+    engine = make_problem(X, y, kernel_engine=True).kernel_engine
+    with pytest.warns(RuntimeWarning):
+        warnings.simplefilter("always")
+        problem = make_problem(X, y, kernel_engine=True, kernel_cache_mb=0.9 * engine.candidate_bytes() / 2 ** 20)
+    assert problem.kernel_engine is None
+
+
+# The problem is pickled for every task of a process worker, the worker keeps the blocks between the tasks
+def test_worker_keeps_blocks_between_tasks(iris0):
+    X, y = iris0
+    engine = make_problem(X, y, kernel_engine=True).kernel_engine
+    first = pickle.loads(pickle.dumps(engine))
+    assert len(first.blocks) == 0
+    first.feature_block(0, 1)
+    second = pickle.loads(pickle.dumps(engine))
+    assert (0, 1) in second.blocks
+    assert second.n_bytes == first.n_bytes
+    other = pickle.loads(pickle.dumps(KernelEngine(engine.folds)))
+    assert len(other.blocks) == 0
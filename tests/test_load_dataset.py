@@ -0,0 +1,53 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import ROOT
+from utils.load_dataset import load_data, cache_paths
+
+
+# iris0 has only real columns, new-thyroid1 integer and real ones, cleveland-0_vs_4 missing values
+@pytest.mark.parametrize("dataset", ["9lower/iris0", "9lower/new-thyroid1", "9higher/cleveland-0_vs_4"])
+def test_cache_equals_parse(tmp_path, dataset):
+    filename = str(tmp_path / os.path.basename(dataset)) + ".dat"
+    shutil.copy(os.path.join(ROOT, "datasets", dataset + ".dat"), filename)
+    cache_dir = str(tmp_path / "cache")
+    X, y, classes = load_data(filename, cache=False)
+
+    X_written, y_written, _ = load_data(filename, cache_dir=cache_dir)
+    assert all(os.path.exists(path) for path in cache_paths(filename, cache_dir))
+    X_cached, y_cached, classes_cached = load_data(filename, cache_dir=cache_dir)
+    # The cache is read memory-mapped, not parsed again
+    assert isinstance(np.load(cache_paths(filename, cache_dir)[0], mmap_mode="r"), np.memmap)
+    for X_loaded, y_loaded in [(X_written, y_written), (X_cached, y_cached)]:
+        pd.testing.assert_frame_equal(X_loaded, X)
+        assert np.array_equal(y_loaded, y) and y_loaded.dtype == y.dtype
+    assert np.array_equal(classes_cached, classes)
+
+
+def test_changed_file_is_parsed_again(tmp_path):
+    filename = str(tmp_path / "iris0.dat")
+    shutil.copy(os.path.join(ROOT, "datasets/9lower/iris0.dat"), filename)
+    cache_dir = str(tmp_path / "cache")
+    X, y, _ = load_data(filename, cache_dir=cache_dir)
+
+    # The last sample is removed
+    with open(filename) as file:
+        lines = [line for line in file if line.strip()]
+    with open(filename, "w") as file:
+        file.writelines(lines[:-1])
+    X_changed, y_changed, _ = load_data(filename, cache_dir=cache_dir)
+    assert X_changed.shape[0] == X.shape[0] - 1
+    pd.testing.assert_frame_equal(X_changed, load_data(filename, cache=False)[0])
+
+
+# Cached files of the missing value policies are separate
+def test_missing_policies_have_own_cache(tmp_path):
+    filename = os.path.join(ROOT, "datasets/9higher/cleveland-0_vs_4.dat")
+    cache_dir = str(tmp_path / "cache")
+    for missing in ["category", "mean", "category", "mean"]:
+        X, _, _ = load_data(filename, cache_dir=cache_dir, missing=missing)
+        pd.testing.assert_frame_equal(X, load_data(filename, cache=False, missing=missing)[0])
+    assert cache_paths(filename, cache_dir) != cache_paths(filename, cache_dir, "mean")
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+from methods.moo_ensemble_SW import MooEnsembleSVC
+from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
+from methods.moo_ensemble_bootstrap_pruned import MooEnsembleSVCbootstrapPruned
+
+ESTIMATORS = [
+    (MooEnsembleSVC, {}),
+    (MooEnsembleSVCbootstrap, {"n_repeats": 2}),
+    (MooEnsembleSVCbootstrapPruned, {"n_repeats": 2}),
+]
+
+
+# Holdout validation (cross_val=False) of the candidates, exact and with the approximated kernel
+@pytest.mark.parametrize("estimator, params", ESTIMATORS)
+@pytest.mark.parametrize("approx_kernel", [None, "rff"])
+def test_fit_predict_holdout(iris0, estimator, params, approx_kernel):
+    X, y = iris0
+    clf = estimator(SVC(probability=True), cross_val=False, n_eval=20, p_size=10, approx_kernel=approx_kernel, **params)
+    clf.fit(X, y)
+    assert len(clf.ensemble) > 0
+    assert clf.predict(X).shape == y.shape
+    assert np.allclose(clf.predict_proba(X).sum(axis=1), 1)
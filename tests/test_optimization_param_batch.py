@@ -0,0 +1,53 @@
+import numpy as np
+from sklearn.svm import SVC
+from sklearn.model_selection import RepeatedStratifiedKFold
+
+from methods.optimization_param import OptimizationParam
+from methods.optimization_param_with_cross_val_SW import OptimizationParamCrossVal
+from methods.optimization_param_batch import OptimizationParamBatch
+
+
+def make_problem(X, y, cross_val=True, **kwargs):
+    if cross_val:
+        return OptimizationParamCrossVal(X, y, estimator=SVC(), scale_features=0.75, n_features=X.shape[1], cross_validation=RepeatedStratifiedKFold(n_splits=2, n_repeats=5, random_state=0), **kwargs)
+    np.random.seed(0)
+    return OptimizationParam(X, y, test_size=0.5, estimator=SVC(), scale_features=0.75, n_features=X.shape[1], **kwargs)
+
+
+# Population of the problem bounds on the masks of iris0, the sepal features alone give scores below 1 and the empty
+# mask gives zeros. Masks repeat, so the groups have several pairs of (C, gamma)
+MASKS = np.array([[0, 0, 0, 0], [1, 0, 0, 0], [0, 1, 0, 0], [1, 1, 0, 0], [1, 0, 1, 0], [1, 1, 1, 1]], dtype=bool)
+
+
+def make_population(n_candidates=24, random_state=0):
+    random_state = np.random.RandomState(random_state)
+    C = 10 ** random_state.uniform(6, 9, n_candidates)
+    gamma = 10 ** random_state.uniform(-7, -4, n_candidates)
+    masks = MASKS[random_state.randint(0, MASKS.shape[0], n_candidates)]
+    return np.array([[c, g] + mask.tolist() for c, g, mask in zip(C, gamma, masks)], dtype=object)
+
+
+def evaluate(problem, X):
+    return problem.evaluate(X, return_values_of=["F", "G"])
+
+
+def test_batch_equals_elementwise(iris0):
+    X, y = iris0
+    population = make_population()
+    for cross_val in [True, False]:
+        problem = make_problem(X, y, cross_val=cross_val)
+        F, G = evaluate(problem, population)
+        F_batch, G_batch = evaluate(OptimizationParamBatch(problem), population)
+        assert np.allclose(F, F_batch, equal_nan=True)
+        assert np.array_equal(G.ravel(), G_batch.ravel())
+
+
+def test_workers_give_the_same_scores(iris0):
+    X, y = iris0
+    population = make_population()
+    problem = make_problem(X, y)
+    F, G = evaluate(OptimizationParamBatch(problem), population)
+    for backend in ["threading", "loky"]:
+        F_parallel, G_parallel = evaluate(OptimizationParamBatch(problem, n_jobs=2, backend=backend), population)
+        assert np.allclose(F, F_parallel, equal_nan=True)
+        assert np.array_equal(G, G_parallel)
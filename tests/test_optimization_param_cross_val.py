@@ -0,0 +1,39 @@
+import copy
+import numpy as np
+import strlearn as sl
+from sklearn.svm import SVC
+
+from test_optimization_param_batch import make_problem, make_population
+
+
+# Scores of the cross-validation with the splits made for the candidate, like before the folds were precomputed
+def reference_scores(problem, x):
+    selected_features = x[2:].astype(bool)
+    if not np.any(selected_features):
+        return np.zeros(2)
+    scores = []
+    for train, test in problem.cross_validation.split(problem.X, problem.y):
+        clf = SVC(C=x[0], gamma=x[1]).fit(problem.X[train][:, selected_features], problem.y[train])
+        y_pred = clf.predict(problem.X[test][:, selected_features])
+        scores.append([sl.metrics.precision(problem.y[test], y_pred), sl.metrics.recall(problem.y[test], y_pred)])
+    return np.mean(scores, axis=0)
+
+
+def test_folds_are_the_splits(iris0):
+    X, y = iris0
+    problem = make_problem(X, y)
+    splits = list(problem.cross_validation.split(X, y))
+    assert len(problem.folds) == len(splits)
+    for (X_train, y_train, X_test, y_test), (train, test) in zip(problem.folds, splits):
+        assert X_train.flags["C_CONTIGUOUS"] and X_train.dtype == np.float64
+        assert np.array_equal(X_train, X[train]) and np.array_equal(y_train, y[train])
+        assert np.array_equal(X_test, X[test]) and np.array_equal(y_test, y[test])
+    # The history of the algorithm shares the folds
+    assert copy.deepcopy(problem) is problem
+
+
+def test_scores_equal_fresh_splits(iris0):
+    X, y = iris0
+    problem = make_problem(X, y)
+    for x in make_population(12):
+        assert np.allclose(problem.validation(x), reference_scores(problem, x), equal_nan=True)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from collections import Counter
+from sklearn.svm import SVC
+
+from methods.moo_ensemble_SW import MooEnsembleSVC
+from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
+
+
+# Calls of predict and predict_proba of all members
+def count_member_calls(clf):
+    calls = Counter()
+    for member_clf in clf.ensemble:
+        for name in ["predict", "predict_proba"]:
+            def counted(X, method=getattr(member_clf, name), name=name):
+                calls[name] += 1
+                return method(X)
+            setattr(member_clf, name, counted)
+    return calls
+
+
+def fit_estimator(estimator, X, y):
+    params = dict(n_eval=20, p_size=10)
+    if estimator is not MooEnsembleSVC:
+        params["n_repeats"] = 2
+    np.random.seed(0)
+    clf = estimator(SVC(probability=True), **params)
+    clf.fit(X, y)
+    return clf
+
+
+@pytest.mark.parametrize("estimator", [MooEnsembleSVC, MooEnsembleSVCbootstrap])
+def test_one_member_pass(iris0, estimator):
+    X, y = iris0
+    clf = fit_estimator(estimator, X, y)
+    calls = count_member_calls(clf)
+    y_pred = clf.predict(X)
+    proba = clf.predict_proba(X)
+    diversity = clf.calculate_diversity()
+    # calculate_diversity predicts the training data, which is X
+    assert calls == {"predict_proba": len(clf.ensemble), "predict": len(clf.ensemble)}
+    assert np.array_equal(clf.predict(X), y_pred)
+    assert np.array_equal(clf.predict_proba(X), proba)
+    assert np.allclose(clf.calculate_diversity(), diversity)
+    clf.predict_decision = "MV"
+    clf.predict(X)
+    assert calls == {"predict_proba": len(clf.ensemble), "predict": len(clf.ensemble)}
+    # Other data are predicted by the members again
+    clf.predict_proba(X[::2])
+    assert calls["predict_proba"] == 2 * len(clf.ensemble)
+
+
+# A new fit drops the predictions of the old members
+@pytest.mark.parametrize("estimator", [MooEnsembleSVC, MooEnsembleSVCbootstrap])
+def test_cache_is_dropped_on_refit(iris0, estimator):
+    X, y = iris0
+    clf = fit_estimator(estimator, X, y)
+    supports = clf.ensemble_support_matrix(X)
+    # Mirrored features - other data of the same shape
+    clf.fit(1 - X, y)
+    refit_supports = clf.ensemble_support_matrix(X)
+    expected = np.array([member_clf.predict_proba(X[:, sf]) for member_clf, sf in zip(clf.ensemble, clf.selected_features)])
+    assert np.array_equal(refit_supports, expected)
+    assert refit_supports.shape != supports.shape or not np.allclose(refit_supports, supports)
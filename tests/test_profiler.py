@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+from methods.moo_ensemble_SW import MooEnsembleSVC
+from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
+
+
+@pytest.mark.parametrize("estimator", [MooEnsembleSVC, MooEnsembleSVCbootstrap])
+def test_profile_info(iris0, estimator):
+    X, y = iris0
+    params = dict(n_eval=30, p_size=10, profile=True, profile_memory=True)
+    if estimator is not MooEnsembleSVC:
+        params["n_repeats"] = 2
+    np.random.seed(0)
+    clf = estimator(SVC(probability=True), **params)
+    clf.fit(X, y)
+    phases = clf.profile_info["phases"]
+    n_runs = len(clf.termination_info)
+    assert n_runs == params.get("n_repeats", 1)
+    assert phases["fit"]["calls"] == 1
+    assert phases["nsga2"]["calls"] == n_runs
+    # One evaluation of the population in every generation
+    assert phases["evaluation"]["calls"] == sum(info["n_gen"] for info in clf.termination_info)
+    assert phases["fit"]["time"] >= phases["nsga2"]["time"] >= phases["evaluation"]["time"] > 0
+    assert phases["fit"]["peak_mb"] > 0
+
+    generations = clf.profile_info["generations"]
+    for run, info in enumerate(clf.termination_info):
+        run_generations = [generation for generation in generations if generation["run"] == run]
+        assert [generation["n_gen"] for generation in run_generations] == list(range(1, info["n_gen"] + 1))
+        assert run_generations[-1]["n_eval"] == info["n_eval"]
+    for generation in generations:
+        assert 0 <= generation["evaluation_time"] <= generation["time"]
+        assert generation["peak_mb"] >= 0
+    assert max(generation["peak_mb"] for generation in generations) > 0
+    assert sum(generation["time"] for generation in generations) <= phases["nsga2"]["time"]
+
+
+def test_profile_without_memory(iris0):
+    X, y = iris0
+    clf = MooEnsembleSVC(SVC(probability=True), n_eval=20, p_size=10, profile=True)
+    clf.fit(X, y)
+    assert all(generation["peak_mb"] == 0 for generation in clf.profile_info["generations"])
+    assert clf.profile_info["phases"]["fit"]["peak_mb"] == 0
@@ -0,0 +1,48 @@
+import math
+import numpy as np
+from sklearn.svm import SVC
+
+from pymoo.core.population import Population
+from methods.surrogate_nsga2 import SurrogateModel
+from methods.moo_ensemble_SW import MooEnsembleSVC
+
+
+def make_population(n_candidates, random_state=0):
+    random_state = np.random.RandomState(random_state)
+    X = np.array([[10 ** random_state.uniform(6, 9), 10 ** random_state.uniform(-7, -4)] + random_state.randint(0, 2, 4).astype(bool).tolist() for _ in range(n_candidates)], dtype=object)
+    F = -random_state.uniform(size=(n_candidates, 2))
+    G = random_state.randint(0, 3, (n_candidates, 1)).astype(float) ** 2
+    return Population.new("X", X, "F", F, "G", G)
+
+
+def test_model_is_trained_on_finite_candidates():
+    surrogate = SurrogateModel(min_samples=10)
+    surrogate.add(make_population(6))
+    assert surrogate.model is None
+    pop = make_population(6, random_state=1)
+    F = pop.get("F")
+    F[0] = np.inf
+    F[1, 0] = np.nan
+    pop.set("F", F)
+    surrogate.add(pop)
+    assert surrogate.model is not None and surrogate.n_retrain == 1
+    assert sum(X.shape[0] for X in surrogate.X_archive) == 10
+    assert surrogate.predict(make_population(3).get("X")).shape == (3, 3)
+
+
+def test_screening_evaluates_fraction_of_offspring(iris0):
+    X, y = iris0
+    p_size, fraction = 10, 0.2
+    np.random.seed(0)
+    clf = MooEnsembleSVC(SVC(probability=True), n_eval=60, p_size=p_size, surrogate=True, surrogate_fraction=fraction)
+    clf.fit(X, y)
+    info = clf.surrogate_info[0]
+    termination = clf.termination_info[0]
+    assert info["n_retrain"] >= 1
+    assert len(info["generations"]) > 0
+    for generation in info["generations"]:
+        assert generation["n_evaluated"] == math.ceil(fraction * generation["n_candidates"])
+    assert info["n_screened_out"] == info["n_candidates"] - sum(generation["n_evaluated"] for generation in info["generations"])
+    # The first generation is evaluated whole, the next ones only the screened offspring
+    assert termination["n_eval"] == p_size + sum(generation["n_evaluated"] for generation in info["generations"])
+    assert termination["n_gen"] > (termination["n_eval"] - p_size) / p_size + 1
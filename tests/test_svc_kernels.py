@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+from methods.moo_ensemble_SW import MooEnsembleSVC
+from methods.moo_ensemble_bootstrap import MooEnsembleSVCbootstrap
+from methods.moo_ensemble_bootstrap_pruned import MooEnsembleSVCbootstrapPruned
+from methods.svc_kernels import batch_support_matrix, is_batchable
+from methods.compiled_ensemble import export_ensemble, CompiledEnsemble
+
+
+def member_supports(clf, X):
+    return np.array([member_clf.predict_proba(X[:, sf]) for member_clf, sf in zip(clf.ensemble, clf.selected_features)])
+
+
+# Members of different chunks of partial_fit share masks, but not the training samples of the support vectors
+def test_batch_and_compiled_supports_after_partial_fit(iris0, tmp_path):
+    X, y = iris0
+    order = np.random.RandomState(0).permutation(y.shape[0])
+    first, second = np.sort(order[:75]), np.sort(order[75:])
+    clf = MooEnsembleSVC(SVC(probability=True), cross_val=True, n_eval=20, p_size=10, incremental=True, prediction_cache_size=0)
+    clf.fit(X[first], y[first])
+    clf.partial_fit(X[second], y[second])
+    assert set(clf.member_batch) == {0, 1}
+
+    expected = member_supports(clf, X)
+    assert np.allclose(batch_support_matrix(clf.ensemble, clf.selected_features, X), expected, atol=1e-8)
+    export_ensemble(clf, str(tmp_path))
+    compiled = CompiledEnsemble(str(tmp_path))
+    assert np.allclose(compiled.ensemble_support_matrix(X), expected, atol=1e-8)
+    assert np.allclose(compiled.predict_proba(X), np.mean(expected, axis=0), atol=1e-8)
+
+
+def test_single_member_equals_predict_proba(iris0):
+    X, y = iris0
+    for C, gamma in [(1, 1), (1e6, 1e-6), (1e9, 1e-4)]:
+        member_clf = SVC(C=C, gamma=gamma, probability=True, random_state=0).fit(X[:, :2], y)
+        assert is_batchable(member_clf)
+        assert np.allclose(batch_support_matrix([member_clf], [[True, True, False, False]], X)[0], member_clf.predict_proba(X[:, :2]), atol=1e-8)
+
+
+# Bootstrap members are trained on resampled data, so their support vectors repeat
+@pytest.mark.parametrize("estimator", [MooEnsembleSVC, MooEnsembleSVCbootstrap, MooEnsembleSVCbootstrapPruned])
+def test_batch_predict_equals_members(iris0, estimator):
+    X, y = iris0
+    params = dict(n_eval=20, p_size=10, prediction_cache_size=0)
+    if estimator is not MooEnsembleSVC:
+        params["n_repeats"] = 2
+    np.random.seed(0)
+    clf = estimator(SVC(probability=True), **params)
+    clf.fit(X, y)
+    expected = member_supports(clf, X)
+    clf.batch_predict = True
+    assert np.allclose(clf.ensemble_support_matrix(X), expected, atol=1e-8)
+    assert np.array_equal(clf.predict(X), clf.classes_[np.argmax(np.mean(expected, axis=0), axis=1)])
@@ -0,0 +1,24 @@
+import os
+import numpy as np
+
+from utils.load_dataset import load_data, find_datasets
+from utils.synthetic_datasets import dataset_spec, dataset_name, make_imbalanced, find_synthetic_datasets
+
+
+def test_names_survive_find_datasets(tmp_path):
+    specs = [dataset_spec(200, 6, imbalance_ratio=4.5, informative=0.5), dataset_spec(200, 6, n_categorical=2)]
+    names = list(find_synthetic_datasets(str(tmp_path), specs))
+    assert all("." not in name for name in names)
+    assert "inf0p5" in names[0] and "ir4p5" in names[0]
+    assert sorted(find_datasets(str(tmp_path))) == sorted(names)
+
+
+def test_written_dataset_reads_back(tmp_path):
+    spec = dataset_spec(300, 5, imbalance_ratio=9, n_categorical=1)
+    name = next(find_synthetic_datasets(str(tmp_path), [spec]))
+    X, y, classes = load_data(os.path.join(str(tmp_path), name + ".dat"), cache=False)
+    X_spec, y_spec, categorical = make_imbalanced(spec)
+    assert X.shape == X_spec.shape
+    # "negative" and "positive" are encoded as 0 and 1, like the majority and the minority class of the spec
+    assert np.array_equal(y, y_spec)
+    assert np.allclose(X.to_numpy()[:, 1:].astype(float), X_spec[:, 1:], rtol=1e-5)
@@ -0,0 +1,41 @@
+import numpy as np
+from sklearn.svm import SVC
+
+from methods.termination import hypervolume_2d
+from methods.moo_ensemble_SW import MooEnsembleSVC
+
+
+def test_hypervolume_2d():
+    assert np.isclose(hypervolume_2d([[-1, -0.5], [-0.5, -1]]), 0.75)
+    # Dominated, non-finite and points outside of the reference point do not count
+    assert np.isclose(hypervolume_2d([[-1, -0.5], [-0.5, -1], [-0.4, -0.4], [np.nan, -1], [0.5, -2]]), 0.75)
+    assert hypervolume_2d(np.zeros((0, 2))) == 0
+
+
+def fit_termination(iris0, **kwargs):
+    X, y = iris0
+    np.random.seed(0)
+    clf = MooEnsembleSVC(SVC(probability=True), p_size=10, **kwargs)
+    clf.fit(X, y)
+    assert len(clf.termination_info) == 1
+    return clf.termination_info[0]
+
+
+def test_n_eval(iris0):
+    info = fit_termination(iris0, n_eval=30)
+    assert info["reason"] == "n_eval"
+    assert 30 <= info["n_eval"] < 40
+
+
+def test_max_time(iris0):
+    info = fit_termination(iris0, n_eval=10000, max_time=0)
+    assert info["reason"] == "max_time"
+    assert info["n_gen"] == 1
+
+
+# iris0 is separable, the front reaches the hypervolume 1 in a few generations and does not improve any more
+def test_hv_stagnation(iris0):
+    info = fit_termination(iris0, n_eval=10000, hv_tol=0, hv_n_last=2)
+    assert info["reason"] == "hv_stagnation"
+    assert info["n_eval"] < 10000
+    assert np.isclose(info["hv"], 1)
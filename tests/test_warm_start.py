@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from sklearn.svm import SVC
+
+import methods.moo_ensemble_bootstrap as moo_ensemble_bootstrap
+import methods.moo_ensemble_bootstrap_pruned as moo_ensemble_bootstrap_pruned
+from methods.warm_start_sampling import WarmStartSampling
+
+
+def test_sampling_fills_population():
+    class RandomSampling:
+        def _do(self, problem, n_samples, **kwargs):
+            return np.full((n_samples, 3), 2.0)
+    X_warm = np.arange(6, dtype=float).reshape(2, 3)
+    X = WarmStartSampling(X_warm, RandomSampling())._do(None, 5)
+    assert np.array_equal(X[:2], X_warm) and np.all(X[2:] == 2)
+    assert np.array_equal(WarmStartSampling(X_warm, RandomSampling())._do(None, 1), X_warm[:1])
+
+
+# Initial populations and pareto sets of all repeats
+@pytest.fixture
+def runs(monkeypatch):
+    records = {"warm": [], "pareto_sets": []}
+
+    class RecordingSampling(WarmStartSampling):
+        def _do(self, problem, n_samples, **kwargs):
+            X = super()._do(problem, n_samples, **kwargs)
+            records["warm"].append((self.X_warm, X))
+            return X
+
+    for module in [moo_ensemble_bootstrap, moo_ensemble_bootstrap_pruned]:
+        minimize = module.minimize
+
+        def recording_minimize(*args, minimize=minimize, **kwargs):
+            res = minimize(*args, **kwargs)
+            records["pareto_sets"].append(res.X)
+            return res
+        monkeypatch.setattr(module, "WarmStartSampling", RecordingSampling)
+        monkeypatch.setattr(module, "minimize", recording_minimize)
+    return records
+
+
+@pytest.mark.parametrize("estimator", [moo_ensemble_bootstrap.MooEnsembleSVCbootstrap, moo_ensemble_bootstrap_pruned.MooEnsembleSVCbootstrapPruned])
+def test_repeats_start_from_previous_pareto_set(iris0, runs, estimator):
+    X, y = iris0
+    n_repeats, p_size, n_eval, warm_n_eval = 3, 10, 60, 20
+    np.random.seed(0)
+    clf = estimator(SVC(probability=True), n_repeats=n_repeats, p_size=p_size, n_eval=n_eval, warm_start=True, warm_n_eval=warm_n_eval)
+    clf.fit(X, y)
+
+    assert len(runs["pareto_sets"]) == n_repeats
+    assert len(runs["warm"]) == n_repeats - 1
+    for repeat, (X_warm, population) in enumerate(runs["warm"]):
+        pareto_set = runs["pareto_sets"][repeat]
+        assert np.array_equal(X_warm, pareto_set)
+        assert np.array_equal(population[:len(pareto_set)], pareto_set)
+
+    # The first repeat has the whole budget, the warm started ones warm_n_eval (the last generation may exceed it)
+    assert clf.termination_info[0]["n_eval"] >= n_eval
+    for info in clf.termination_info[1:]:
+        assert info["reason"] == "n_eval"
+        assert warm_n_eval <= info["n_eval"] < warm_n_eval + p_size
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import random
+import resource
+import datetime
+import subprocess
+import multiprocessing
+import numpy as np
+import strlearn as sl
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import MinMaxScaler
+
+from utils.load_dataset import load_data
+from utils.synthetic_datasets import dataset_spec, make_imbalanced
+
+
+# KEEL dataset (path to the .dat file) or a synthetic one: "synthetic:<n_samples>x<n_features>"
+def benchmark_data(dataset, random_state=0):
+    if dataset.startswith("synthetic:"):
+        n_samples, n_features = [int(size) for size in dataset[len("synthetic:"):].split("x")]
+        # Imbalanced binary problem, 10% of the minority class
+        X, y, categorical = make_imbalanced(dataset_spec(n_samples, n_features, imbalance_ratio=9, random_state=random_state))
+    else:
+        X, y, classes = load_data(dataset)
+        X = X.to_numpy()
+    X = MinMaxScaler().fit_transform(X, y)
+    # The first fold of the fixed split - the same train and test set in every run
+    train, test = next(StratifiedKFold(n_splits=2, shuffle=True, random_state=random_state).split(X, y))
+    return X[train], X[test], y[train], y[test]
+
+
+# Peak resident set size of this process in MB. On Linux VmHWM of /proc/self/status - ru_maxrss is kept over fork and
+# exec, so it would include the memory of the parent process. Elsewhere ru_maxrss (in kB on Linux, in bytes on macOS)
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Fit time, median predict latency, peak RSS and evaluations per second (MOO methods) of one method on one dataset
+def run_case(clf, dataset, n_predict=5, random_state=0):
+    X_train, X_test, y_train, y_test = benchmark_data(dataset, random_state)
+    np.random.seed(random_state)
+    random.seed(random_state)
+
+    start = time.perf_counter()
+    clf.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    predict_times = []
+    for _ in range(n_predict):
+        start = time.perf_counter()
+        y_pred = clf.predict(X_test)
+        predict_times.append(time.perf_counter() - start)
+
+    # Number of evaluated candidates of all NSGA2 runs of fit
+    n_eval = None
+    if hasattr(clf, "termination_info"):
+        n_eval = int(sum(info["n_eval"] for info in clf.termination_info))
+    return {
+        "n_samples": int(X_train.shape[0]),
+        "n_features": int(X_train.shape[1]),
+        "fit_time": fit_time,
+        "predict_time": float(np.median(predict_times)),
+        "peak_rss_mb": peak_rss_mb(),
+        "n_eval": n_eval,
+        "eval_per_s": None if n_eval is None else n_eval / fit_time,
+        "bac": float(sl.metrics.balanced_accuracy_score(y_test, y_pred)),
+    }
+
+
+def _run_case(args):
+    clf, dataset, n_predict, random_state = args
+    try:
+        return dict(run_case(clf, dataset, n_predict, random_state), status="ok")
+    except Exception as ex:
+        return {"status": "error", "error": "%s: %s" % (type(ex).__name__, ex)}
+
+
+# Every case runs in a new spawned process, so one case does not warm up the next and the peak RSS does not include
+# the memory of this process, only the interpreter and the imports of the child which are the same for every case
+def run_isolated(clf, dataset, n_predict=5, random_state=0):
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run_case, ((clf, dataset, n_predict, random_state),))
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(methods, datasets, n_predict=5, random_state=0):
+    timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+    commit = git_commit()
+    results = []
+    for dataset in datasets:
+        for method_name, clf in methods.items():
+            result = {"timestamp": timestamp, "commit": commit, "method": method_name, "dataset": os.path.basename(dataset)}
+            result.update(run_isolated(clf, dataset, n_predict, random_state))
+            results.append(result)
+    return results
+
+
+# History of all runs - one json line per (run, method, dataset)
+def append_history(filename, results):
+    directory = os.path.dirname(filename)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(filename, "a") as file:
+        for result in results:
+            file.write(json.dumps(result) + "\n")
+
+
+def load_history(filename):
+    if not os.path.exists(filename):
+        return []
+    with open(filename) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_baseline(filename, results):
+    directory = os.path.dirname(filename)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    baseline = {"%s/%s" % (result["method"], result["dataset"]): result for result in results if result["status"] == "ok"}
+    with open(filename, "w") as file:
+        json.dump(baseline, file, indent=1)
+
+
+def load_baseline(filename):
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as file:
+        return json.load(file)
+
+
+# Regressions against the baseline: times or peak RSS larger by more than tolerance (0.2 - 20%), balanced accuracy
+# lower by more than bac_tolerance, and cases which worked in the baseline but fail now
+def find_regressions(results, baseline, tolerance=0.2, bac_tolerance=0.02):
+    regressions = []
+    for result in results:
+        reference = baseline.get("%s/%s" % (result["method"], result["dataset"]))
+        if reference is None:
+            continue
+        if result["status"] != "ok":
+            regressions.append((result["method"], result["dataset"], "status", reference["status"], result["status"]))
+            continue
+        for measure in ["fit_time", "predict_time", "peak_rss_mb"]:
+            if result[measure] > reference[measure] * (1 + tolerance):
+                regressions.append((result["method"], result["dataset"], measure, reference[measure], result[measure]))
+        if result["bac"] < reference["bac"] - bac_tolerance:
+            regressions.append((result["method"], result["dataset"], "bac", reference["bac"], result["bac"]))
+    return regressions
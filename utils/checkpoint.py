@@ -0,0 +1,47 @@
+import os
+import numpy as np
+
+
+class Checkpoint:
+    # Results of single (fold, method) units of one dataset, saved atomically as .npz files in directory,
+    # so an interrupted experiment starts again from the first unit without results
+    def __init__(self, directory):
+        self.directory = directory
+
+    def filename(self, fold_id, clf_name):
+        return os.path.join(self.directory, "%s_fold%d.npz" % (clf_name, fold_id))
+
+    def load(self, fold_id, clf_name):
+        filename = self.filename(fold_id, clf_name)
+        if not os.path.exists(filename):
+            return None
+        try:
+            with np.load(filename) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            # Damaged file, the unit is computed again
+            return None
+
+    def save(self, fold_id, clf_name, **arrays):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        filename = self.filename(fold_id, clf_name)
+        # Written to a temporary file and renamed, a crash never leaves a half-written checkpoint
+        tmp_filename = "%s.%d.tmp" % (filename, os.getpid())
+        with open(tmp_filename, "wb") as file:
+            np.savez(file, **arrays)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_filename, filename)
+
+    # The whole dataset is done - the marker is written first, then unit files are removed
+    def finish(self):
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        open(os.path.join(self.directory, "done"), "w").close()
+        for filename in os.listdir(self.directory):
+            if filename != "done":
+                os.remove(os.path.join(self.directory, filename))
+
+    def is_done(self):
+        return os.path.exists(os.path.join(self.directory, "done"))
@@ -19,31 +19,29 @@ def entropy_measure_e(ensemble, X, y):
     )
 
 
-def _make_relationship_table(d_pred):
-    rt = np.zeros(shape=(2, 2))
-
-    for idx, val in zip(*np.unique(d_pred.T, axis=0, return_counts=True)):
-        rt[tuple(idx)] = val
-
-    return rt
-
-
+# Tables of all pairs at once from the binary correctness matrix (1 - correct, 0 - wrong):
+# tables[a, b][i, k] - number of samples where classifier i is a and classifier k is b
+def pairwise_counts(predictions):
+    predictions = np.asarray(predictions, dtype=float)
+    n_samples = predictions.shape[1]
+    n_correct = predictions.sum(axis=1)
+    n11 = predictions @ predictions.T
+    n10 = n_correct[:, np.newaxis] - n11
+    n01 = n_correct[np.newaxis, :] - n11
+    n00 = n_samples - n11 - n10 - n01
+    return np.array([[n00, n01], [n10, n11]])
+
+
+# Layout as before: full_matrix - (2, 2, L, L) with [b, a, k, i] for the pair (i, k), otherwise (2, 2, L*(L-1)/2)
+# with [b, a, pair] for the pairs i < k in order
 def make_relationship_tables(predictions, full_matrix=False):
-    pool_len = len(predictions)
+    tables = pairwise_counts(predictions).transpose(1, 0, 2, 3)
 
     if full_matrix:
-        return np.array([
-            [
-                _make_relationship_table(predictions[(i, k), :])
-                for k in range(pool_len)
-            ]
-            for i in range(pool_len)
-        ]).T
+        return tables.transpose(0, 1, 3, 2)
 
-    return np.array([
-        _make_relationship_table(predictions[(i, k), :])
-        for i in range(pool_len) for k in range(i + 1, pool_len)
-    ]).T
+    i, k = np.triu_indices(len(predictions), k=1)
+    return tables[:, :, i, k]
 
 
 def Q_statistic(relationship_tables):
@@ -144,10 +142,12 @@ def calc_diversity_measures2(X, y, classifier_pool, subspaces, p=0, measure=None
 
 
 # Subspaces -- If you need diversity for random subspace
-def calc_diversity_measures(X, y, classifier_pool, subspaces, p=0):
+# predictions - labels already predicted by the members on X (members x samples), otherwise the members predict them
+def calc_diversity_measures(X, y, classifier_pool, subspaces, p=0, predictions=None):
     L = len(classifier_pool)
-    predictions = np.array([np.equal(_.predict(X[:, subspaces[i]]), y).astype(np.int) for i, _ in enumerate(classifier_pool)])
-    tables = make_relationship_tables(predictions)
+    if predictions is None:
+        predictions = np.array([_.predict(X[:, subspaces[i]]) for i, _ in enumerate(classifier_pool)])
+    tables = make_relationship_tables(np.equal(predictions, y).astype(np.int))
 
     q = Q_statistic(tables).mean()
     dis = disagreement_measure(tables).mean()
@@ -158,7 +158,7 @@ def calc_diversity_measures(X, y, classifier_pool, subspaces, p=0):
             L // 2
             - np.abs(
                 np.sum(
-                    y[np.newaxis, :] == np.array([member_clf.predict(X[:, subspaces[clf_ind]]) for clf_ind, member_clf in enumerate(classifier_pool)]),
+                    y[np.newaxis, :] == predictions,
                     axis=0,
                 )
                 - L // 2
@@ -0,0 +1,270 @@
+import struct
+import numpy as np
+
+# Tokens of the missing values in KEEL files
+MISSING_VALUES = ["?", "<null>"]
+
+# What happens to the missing values:
+#   "category" - like pandas in load_data: a column with missing values is nominal, "?" is one more category
+#   "mean"     - numeric columns get the mean and nominal ones the most frequent value of the observed values
+#   "nan"      - missing values are NaN (SVC does not accept them)
+MISSING_POLICIES = ["category", "mean", "nan"]
+
+# Kinds of the columns from the most to the least specific one
+KINDS = ["integer", "real", "nominal"]
+
+
+# Attribute declarations of the KEEL header: name, type ("real", "integer" or "nominal") and values of nominal ones
+def parse_attribute(line):
+    declaration = line[len("@attribute"):].strip()
+    if "{" in declaration:
+        name = declaration[:declaration.index("{")].strip()
+        values = [value.strip() for value in declaration[declaration.index("{") + 1:declaration.rindex("}")].split(",")]
+        return name, "nominal", values
+    name, attribute_type = declaration.split()[:2]
+    return name, attribute_type.lower(), None
+
+
+def parse_header(file):
+    attributes = []
+    outputs = None
+    for line in file:
+        stripped = line.strip()
+        if stripped.lower().startswith("@attribute"):
+            attributes.append(parse_attribute(stripped))
+        elif stripped.lower().startswith("@outputs"):
+            outputs = stripped[len("@outputs"):].strip()
+        elif stripped.lower().startswith("@data"):
+            break
+    # The class is declared in @outputs, otherwise it is the last attribute
+    class_id = len(attributes) - 1
+    if outputs is not None:
+        class_id = [name for name, _, _ in attributes].index(outputs)
+    return attributes, class_id
+
+
+# Rows of the data section as arrays of stripped tokens, chunk_size rows at a time
+def read_chunks(filename, chunk_size):
+    with open(filename) as file:
+        parse_header(file)
+        lines = []
+        for line in file:
+            if not line.strip() or line.startswith("%"):
+                continue
+            lines.append([token.strip() for token in line.split(",")])
+            if len(lines) == chunk_size:
+                yield np.array(lines)
+                lines = []
+        if lines:
+            yield np.array(lines)
+
+
+# Kind of a column before its data is read: numeric declarations and nominal ones with only numbers as values (e.g.
+# kr-vs-k) are "integer" and become "real" when the tokens are not integers, other nominal ones are "nominal"
+def declared_kind(attribute):
+    _, attribute_type, values = attribute
+    if attribute_type == "nominal":
+        try:
+            np.array(values).astype(np.float64)
+        except ValueError:
+            return "nominal"
+    return "integer"
+
+
+# Numbers of the tokens like the type inference of pandas.read_csv: integers, other numbers, or None if the tokens
+# are not numbers; with the kind of the column after these tokens
+def parse_numbers(tokens, kind):
+    if kind == "integer":
+        try:
+            return tokens.astype(np.int64), "integer"
+        except (ValueError, OverflowError):
+            pass
+    try:
+        return tokens.astype(np.float64), "real"
+    except ValueError:
+        return None, "nominal"
+
+
+class NominalCodes:
+    # Codes of the nominal values in the order of their first occurrence and the counts of the values. Once the whole
+    # file is read, remap() gives the codes of load_data - positions of the values in the sorted observed values
+    def __init__(self):
+        self.codes = {}
+        self.counts = np.zeros(0)
+
+    def encode(self, tokens):
+        values, inverse, counts = np.unique(tokens, return_inverse=True, return_counts=True)
+        value_codes = np.array([self.codes.setdefault(str(value), len(self.codes)) for value in values], dtype=np.int64)
+        self.counts = np.pad(self.counts, (0, len(self.codes) - self.counts.shape[0]))
+        np.add.at(self.counts, value_codes, counts)
+        return value_codes[inverse.ravel()]
+
+    def values(self):
+        return sorted(self.codes)
+
+    def permutation(self):
+        permutation = np.empty(len(self.codes), dtype=np.int64)
+        for code, value in enumerate(self.values()):
+            permutation[self.codes[value]] = code
+        return permutation
+
+    # Missing values (NaN) stay missing
+    def remap(self, column, permutation):
+        observed = ~np.isnan(column)
+        column[observed] = permutation[column[observed].astype(np.int64)]
+        return column
+
+    # Code of the most frequent value, the smallest one of the ties
+    def most_frequent(self):
+        counts = np.zeros(self.counts.shape[0])
+        counts[self.permutation()] = self.counts
+        return np.argmax(counts) if counts.shape[0] > 0 else np.nan
+
+
+class ColumnParser:
+    # One feature column: numbers while its tokens are numbers, codes of the nominal values otherwise. Missing values of
+    # the policies other than "category" are NaN, the sum and the number of the observed numbers give their mean
+    def __init__(self, kind, missing):
+        self.kind = kind
+        self.missing = missing
+        self.codes = NominalCodes() if kind == "nominal" else None
+        self.has_missing = False
+        self.total = 0.0
+        self.n_observed = 0
+        # Tokens of a numeric column were not numbers - the earlier chunks are lost, the column is read again
+        self.reparse = False
+
+    def parse(self, tokens):
+        column = np.full(tokens.shape[0], np.nan)
+        if self.reparse:
+            return column
+        observed = np.ones(tokens.shape[0], dtype=bool)
+        if self.missing != "category":
+            observed = ~np.isin(tokens, MISSING_VALUES)
+            self.has_missing |= not np.all(observed)
+        tokens = tokens[observed]
+        if self.kind == "nominal":
+            column[observed] = self.codes.encode(tokens)
+            return column
+        numbers, self.kind = parse_numbers(tokens, self.kind)
+        if numbers is None:
+            self.reparse = True
+            return column
+        column[observed] = numbers
+        self.total += float(np.sum(numbers, dtype=np.float64))
+        self.n_observed += numbers.shape[0]
+        return column
+
+    # Value of the missing values of the policy "mean"
+    def mean(self):
+        if self.kind == "nominal":
+            return self.codes.most_frequent()
+        return self.total / self.n_observed if self.n_observed > 0 else np.nan
+
+
+# Header of a .npy file of the given size, so it can be written before the number of rows is known
+def npy_header(dtype, shape, size=128):
+    header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (np.lib.format.dtype_to_descr(np.dtype(dtype)), shape)
+    header = header.ljust(size - 11) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class RowBuffer:
+    # Rows of an output array written chunk after chunk, the number of rows is known only at the end of the file:
+    # in memory the array grows (in place when possible), with filename the rows are written to a .npy file after
+    # a header of a fixed size, which gets the final shape in finish()
+    def __init__(self, n_columns, dtype, filename=None):
+        self.n_columns = n_columns
+        self.dtype = np.dtype(dtype)
+        self.filename = filename
+        self.n_rows = 0
+        if filename is None:
+            self.array = np.empty(self.shape(0), dtype=self.dtype)
+        else:
+            self.file = open(filename, "wb")
+            self.file.write(npy_header(self.dtype, self.shape(0)))
+
+    # n_columns None - one dimensional array
+    def shape(self, n_rows):
+        return (n_rows,) if self.n_columns is None else (n_rows, self.n_columns)
+
+    def append(self, rows):
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if self.filename is None:
+            if self.n_rows + rows.shape[0] > self.array.shape[0]:
+                self.array.resize(self.shape(max(2 * self.array.shape[0], self.n_rows + rows.shape[0])), refcheck=False)
+            self.array[self.n_rows:self.n_rows + rows.shape[0]] = rows
+        else:
+            self.file.write(rows.tobytes())
+        self.n_rows += rows.shape[0]
+
+    def finish(self):
+        if self.filename is None:
+            self.array.resize(self.shape(self.n_rows), refcheck=False)
+            return self.array
+        self.file.seek(0)
+        self.file.write(npy_header(self.dtype, self.shape(self.n_rows)))
+        self.file.close()
+        if self.n_rows == 0:
+            return np.load(self.filename)
+        return np.load(self.filename, mmap_mode="r+")
+
+
+# Parser of KEEL .dat files which reads the file once, chunk_size rows at a time, straight into the output arrays
+# (float32 by default, load_data uses float64). The kinds of the columns come from the @attribute declarations and
+# are checked on the data: integer columns keep their values, nominal columns and the class are coded by their sorted
+# observed values like in load_data (kr-vs-k declares numbers as nominal values, kddcup declares values which are
+# never observed). Only the columns whose tokens are not the declared numbers (e.g. "?" of the policy "category")
+# are read once more, as nominal ones. Missing values are handled by the missing policy. With out=<prefix> the arrays
+# are .npy memmaps <prefix>_X.npy and <prefix>_y.npy, so the dataset does not have to fit in memory.
+# Returns X, y, classes and the columns - (name, kind, sorted values of the nominal ones) of the features and the class
+def parse_keel(filename, dtype=np.float32, chunk_size=100000, out=None, missing="category"):
+    if missing not in MISSING_POLICIES:
+        raise ValueError("Unknown missing value policy %s, expected one of %s" % (missing, MISSING_POLICIES))
+    with open(filename) as file:
+        attributes, class_id = parse_header(file)
+    feature_ids = [attribute_id for attribute_id in range(len(attributes)) if attribute_id != class_id]
+    parsers = [ColumnParser(declared_kind(attributes[attribute_id]), missing) for attribute_id in feature_ids]
+    class_codes = NominalCodes()
+
+    X_buffer = RowBuffer(len(feature_ids), dtype, None if out is None else out + "_X.npy")
+    y_buffer = RowBuffer(None, np.int32, None if out is None else out + "_y.npy")
+    for rows in read_chunks(filename, chunk_size):
+        X_buffer.append(np.column_stack([parser.parse(rows[:, attribute_id]) for parser, attribute_id in zip(parsers, feature_ids)])
+                        if feature_ids else np.empty((rows.shape[0], 0)))
+        y_buffer.append(class_codes.encode(rows[:, class_id]))
+    X, y = X_buffer.finish(), y_buffer.finish()
+
+    # The declaration did not fit the data, these columns are nominal
+    reparsed = [column_id for column_id, parser in enumerate(parsers) if parser.reparse]
+    if reparsed:
+        for column_id in reparsed:
+            parsers[column_id] = ColumnParser("nominal", missing)
+        start = 0
+        for rows in read_chunks(filename, chunk_size):
+            for column_id in reparsed:
+                X[start:start + rows.shape[0], column_id] = parsers[column_id].parse(rows[:, feature_ids[column_id]])
+            start += rows.shape[0]
+
+    # Codes of the sorted values and the values of the missing ones (the policy "category" has none - "?" is a value)
+    permutations = {column_id: parser.codes.permutation() for column_id, parser in enumerate(parsers) if parser.kind == "nominal"}
+    fill = {column_id: parser.mean() for column_id, parser in enumerate(parsers) if missing == "mean" and parser.has_missing}
+    if permutations or fill:
+        for start in range(0, X.shape[0], chunk_size):
+            block = X[start:start + chunk_size]
+            for column_id, permutation in permutations.items():
+                block[:, column_id] = parsers[column_id].codes.remap(block[:, column_id].astype(np.float64), permutation)
+            for column_id, value in fill.items():
+                block[np.isnan(block[:, column_id]), column_id] = value
+    y[:] = class_codes.permutation()[y]
+    if out is not None:
+        X.flush()
+        y.flush()
+
+    # Numeric columns with missing values are real, like integer columns of pandas with NaN
+    columns = []
+    for parser, attribute_id in zip(parsers, feature_ids):
+        kind = "real" if parser.kind == "integer" and parser.has_missing else parser.kind
+        columns.append((attributes[attribute_id][0], kind, parser.codes.values() if kind == "nominal" else None))
+    columns.append((attributes[class_id][0], "nominal", class_codes.values()))
+    return X, y, np.unique(y), columns
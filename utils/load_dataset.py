@@ -1,41 +1,100 @@
 import numpy as np
 import pandas as pd
 import os
-from sklearn.preprocessing import OrdinalEncoder, LabelEncoder
+import json
+import hashlib
+
+from utils.keel_parser import parse_keel
 
 
 DATASETS_DIR = os.path.join(os.path.realpath(os.path.dirname(__file__)), 'datasets/test')
 
 
-def load_data(filename):
-    # Load from file
-    with open(filename) as file:
-        attr_count = 0
-        for line in file:
-            if line.startswith("@attribute Class"):
-                continue
-            elif line.startswith("@attribute"):
-                attr_count += 1
-            elif line.startswith("@data"):
-                break
-
-        df = pd.read_csv(file, header=None)
-
-        features = df.iloc[:, 0:-1]
-        # Index of the categorical variables in features
-        categorical_id = [key for key in dict(features.dtypes) if dict(features.dtypes)[key] in ['object']]
-        # Encoding categorical variables into numbers
-        encoder = OrdinalEncoder()
-        features[categorical_id] = encoder.fit_transform(features[categorical_id])
-
-        labels = df.iloc[:, -1].values.astype(str)
-        classes = np.unique(labels)
-        # Enocoding class names into binary
-        class_encoder = LabelEncoder()
-        labels = class_encoder.fit_transform(labels)
-        classes = np.unique(labels)
-
-        return features, labels, classes
+# Binary copies of the parsed .dat files - features and labels as .npy files read memory-mapped
+DATASETS_CACHE_DIR = os.path.join(os.path.realpath(os.path.dirname(os.path.dirname(__file__))), 'datasets_cache')
+
+
+# Features (integer columns as int64, other numeric ones as float64, nominal ones as codes of their sorted values),
+# labels encoded as codes of the sorted class names, classes and the metadata of the binary cache
+def parse_data(filename, missing="category"):
+    X, labels, classes, columns = parse_keel(filename, dtype=np.float64, missing=missing)
+    features = pd.DataFrame(X)
+    features = features.astype({column_id: np.int64 for column_id, (_, kind, _) in enumerate(columns[:-1]) if kind == "integer"})
+    categorical_id = [column_id for column_id, (_, kind, _) in enumerate(columns[:-1]) if kind == "nominal"]
+
+    meta = {
+        "dtypes": [str(dtype) for dtype in features.dtypes],
+        "categorical_id": categorical_id,
+        "categories": [columns[column_id][2] for column_id in categorical_id],
+        "class_names": columns[-1][2],
+        "missing": missing,
+    }
+    return features, labels.astype(np.int64), classes.astype(np.int64), meta
+
+
+def cache_paths(filename, cache_dir, missing="category"):
+    name = os.path.splitext(os.path.basename(filename))[0]
+    digest = hashlib.md5(os.path.realpath(filename).encode()).hexdigest()[:8]
+    prefix = os.path.join(cache_dir, "%s_%s" % (name, digest))
+    # Other missing value policies give other data, the default one keeps the old names of the cached files
+    if missing != "category":
+        prefix += "_" + missing
+    return prefix + "_X.npy", prefix + "_y.npy", prefix + ".json"
+
+
+# Parsed dataset from the binary cache, or None if it does not exist or the .dat file was changed
+def read_cache(filename, cache_dir, mmap_mode="r", missing="category"):
+    X_path, y_path, meta_path = cache_paths(filename, cache_dir, missing)
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path) as file:
+            meta = json.load(file)
+        stat = os.stat(filename)
+        if meta["mtime_ns"] != stat.st_mtime_ns or meta["size"] != stat.st_size:
+            return None
+        X = np.load(X_path, mmap_mode=mmap_mode)
+        labels = np.load(y_path)
+    except (OSError, ValueError, KeyError):
+        return None
+    features = pd.DataFrame(X)
+    # Columns with different types (e.g. int and float) are stored together as float
+    dtypes = dict(enumerate(meta["dtypes"]))
+    if any(str(dtype) != str(X.dtype) for dtype in dtypes.values()):
+        features = features.astype(dtypes)
+    return features, labels, np.unique(labels)
+
+
+def write_cache(filename, cache_dir, features, labels, meta):
+    X_path, y_path, meta_path = cache_paths(filename, cache_dir, meta["missing"])
+    stat = os.stat(filename)
+    meta = dict(meta, mtime_ns=stat.st_mtime_ns, size=stat.st_size, source=os.path.realpath(filename))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Every file is written under a temporary name and renamed, the metadata goes last
+        tmp = ".%d.tmp" % os.getpid()
+        np.save(X_path + tmp, features.to_numpy())
+        os.replace(X_path + tmp + ".npy", X_path)
+        np.save(y_path + tmp, labels)
+        os.replace(y_path + tmp + ".npy", y_path)
+        with open(meta_path + tmp, "w") as file:
+            json.dump(meta, file)
+        os.replace(meta_path + tmp, meta_path)
+    except OSError:
+        # Read-only storage, the dataset is parsed every time
+        pass
+
+
+# missing - policy of the missing values ("?", "<null>"), see utils/keel_parser.MISSING_POLICIES
+def load_data(filename, cache=True, cache_dir=DATASETS_CACHE_DIR, missing="category"):
+    if cache:
+        cached = read_cache(filename, cache_dir, missing=missing)
+        if cached is not None:
+            return cached
+    features, labels, classes, meta = parse_data(filename, missing)
+    if cache:
+        write_cache(filename, cache_dir, features, labels, meta)
+    return features, labels, classes
 
 
 def find_datasets(storage=DATASETS_DIR):
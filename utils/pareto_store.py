@@ -0,0 +1,83 @@
+import os
+import numpy as np
+
+
+# One file with all folds and solutions of the pareto front for one dataset and one method:
+# results/<experiment_name>/pareto/<dataset>/<clf_name>.npz
+def pareto_filename(experiment_name, dataset, clf_name):
+    return "results/%s/pareto/%s/%s.npz" % (experiment_name, dataset, clf_name)
+
+
+class ParetoWriter:
+    # Columns: fold, F (objectives [-precision, -recall]), C, gamma and mask of selected features,
+    # fold_offsets is the index - solutions of fold k are rows fold_offsets[k]:fold_offsets[k+1]
+    def __init__(self, n_folds):
+        self.n_folds = n_folds
+        self.F = [np.zeros((0, 2)) for _ in range(n_folds)]
+        self.X = [None] * n_folds
+
+    def add(self, fold_id, F, X=None):
+        F = np.asarray(F, dtype=float).reshape(-1, 2)
+        # Rows with zero precision or recall are not saved, as in the per-solution csv files
+        keep = (F[:, 0] != 0.0) & (F[:, 1] != 0.0)
+        self.F[fold_id] = F[keep]
+        if X is not None:
+            self.X[fold_id] = np.asarray(X)[keep]
+
+    def save(self, filename):
+        counts = [F.shape[0] for F in self.F]
+        columns = {
+            "fold": np.repeat(np.arange(self.n_folds), counts).astype(np.int32),
+            "fold_offsets": np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+            "F": np.concatenate(self.F),
+        }
+        # Decision vectors are saved only if all folds with solutions have them
+        fold_X = [X for F, X in zip(self.F, self.X) if F.shape[0] > 0]
+        if fold_X and all(X is not None for X in fold_X):
+            X = np.concatenate(fold_X)
+            columns["C"] = X[:, 0].astype(float)
+            columns["gamma"] = X[:, 1].astype(float)
+            columns["mask"] = X[:, 2:].astype(bool)
+        directory = os.path.dirname(filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        np.savez_compressed(filename, **columns)
+
+
+def load_pareto(filename):
+    with np.load(filename) as store:
+        return {name: store[name] for name in store.files}
+
+
+# Objectives of one fold from the loaded store
+def fold_solutions(store, fold_id):
+    return store["F"][store["fold_offsets"][fold_id]:store["fold_offsets"][fold_id + 1]]
+
+
+# Converts per-solution csv files pareto_raw/<dataset>/<clf_name>/fold<k>/sol<i>.csv of older experiments
+def convert_pareto_raw(directory, filename, n_folds, n_rows_p=1000):
+    writer = ParetoWriter(n_folds)
+    for fold_id in range(n_folds):
+        fold_directory = os.path.join(directory, "fold%d" % fold_id)
+        if not os.path.exists(fold_directory):
+            continue
+        solutions = []
+        for sol_id in range(n_rows_p):
+            filename_pareto = os.path.join(fold_directory, "sol%d.csv" % sol_id)
+            if os.path.exists(filename_pareto):
+                solutions.append(np.genfromtxt(filename_pareto, dtype=np.float32))
+        if solutions:
+            writer.add(fold_id, np.array(solutions))
+    writer.save(filename)
+    return load_pareto(filename)
+
+
+# Pareto fronts of one dataset and one method, converted from the older csv files on the first read
+def read_pareto(experiment_name, dataset, clf_name, n_folds):
+    filename = pareto_filename(experiment_name, dataset, clf_name)
+    if os.path.exists(filename):
+        return load_pareto(filename)
+    directory = "results/%s/pareto_raw/%s/%s" % (experiment_name, dataset, clf_name)
+    if os.path.exists(directory):
+        return convert_pareto_raw(directory, filename, n_folds)
+    return None
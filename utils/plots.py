@@ -2,28 +2,21 @@ import os
 import numpy as np
 import matplotlib.pyplot as plt
 from utils.load_dataset import find_datasets
+from utils.pareto_store import read_pareto, fold_solutions
 
 
 # Plot pareto front scatter function
 def scatter_pareto_chart(DATASETS_DIR, n_folds, experiment_name, methods, methods_alias):
-    n_rows_p = 1000
     for dataset_id, dataset in enumerate(find_datasets(DATASETS_DIR)):
         print(dataset)
         for clf_id, clf_name in enumerate(methods):
+            # All folds of the method are read in one call
+            store = read_pareto(experiment_name, dataset, clf_name, n_folds)
+            if store is None:
+                continue
             for fold_id in range(n_folds):
-                solutions = []
-                for sol_id in range(n_rows_p):
-                    try:
-                        filename_pareto = "results/%s/pareto_raw/%s/%s/fold%d/sol%d.csv" % (experiment_name, dataset, clf_name, fold_id, sol_id)
-                        # if os.path.exists(filename_pareto):
-                        #     continue
-                        solution = np.genfromtxt(filename_pareto, dtype=np.float32)
-                        solution = solution.tolist()
-                        solution[0] = solution[0] * (-1)
-                        solution[1] = solution[1] * (-1)
-                        solutions.append(solution)
-                    except IOError:
-                        pass
+                # [-precision, -recall] -> [precision, recall]
+                solutions = (-1 * fold_solutions(store, fold_id)).tolist()
                 if solutions:
                     filename_pareto_chart = "results/%s/pareto_plots/%s/%s/pareto_%s_%s_fold%d" % (experiment_name, dataset, clf_name, dataset, clf_name, fold_id)
                     if not os.path.exists("results/%s/pareto_plots/%s/%s/" % (experiment_name, dataset, clf_name)):
@@ -49,41 +42,14 @@ def scatter_pareto_chart(DATASETS_DIR, n_folds, experiment_name, methods, method
 
 # Plot scatter of pareto front solutions and all methods
 def scatter_plot(datasets, n_folds, experiment_name, methods, raw_data):
-    n_rows_p = 1000
     for dataset_id, dataset in enumerate(datasets):
         print(dataset)
+        stores = [read_pareto(experiment_name, dataset, clf_name, n_folds) for clf_name in ["MooEnsembleSVC_SW", "MooEnsembleSVCbootstrap_SW", "MooEnsembleSVCbootstrapPruned_SW"]]
+        if any(store is None for store in stores):
+            continue
         for fold_id in range(n_folds):
-            solutions_semoos = []
-            solutions_semoosb = []
-            solutions_semoosbp = []
-            for sol_id in range(n_rows_p):
-                try:
-                    filename_pareto_semoos = "results/%s/pareto_raw/%s/MooEnsembleSVC_SW/fold%d/sol%d.csv" % (experiment_name, dataset, fold_id, sol_id)
-                    solution_semoos = np.genfromtxt(filename_pareto_semoos, dtype=np.float32)
-                    solution_semoos = solution_semoos.tolist()
-                    solution_semoos[0] = solution_semoos[0] * (-1)
-                    solution_semoos[1] = solution_semoos[1] * (-1)
-                    solutions_semoos.append(solution_semoos)
-                except IOError:
-                    pass
-                try:
-                    filename_pareto_semoosb = "results/%s/pareto_raw/%s/MooEnsembleSVCbootstrap_SW/fold%d/sol%d.csv" % (experiment_name, dataset, fold_id, sol_id)
-                    solution_semoosb = np.genfromtxt(filename_pareto_semoosb, dtype=np.float32)
-                    solution_semoosb = solution_semoosb.tolist()
-                    solution_semoosb[0] = solution_semoosb[0] * (-1)
-                    solution_semoosb[1] = solution_semoosb[1] * (-1)
-                    solutions_semoosb.append(solution_semoosb)
-                except IOError:
-                    pass
-                try:
-                    filename_pareto_semoosbp = "results/%s/pareto_raw/%s/MooEnsembleSVCbootstrapPruned_SW/fold%d/sol%d.csv" % (experiment_name, dataset, fold_id, sol_id)
-                    solution_semoosbp = np.genfromtxt(filename_pareto_semoosbp, dtype=np.float32)
-                    solution_semoosbp = solution_semoosbp.tolist()
-                    solution_semoosbp[0] = solution_semoosbp[0] * (-1)
-                    solution_semoosbp[1] = solution_semoosbp[1] * (-1)
-                    solutions_semoosbp.append(solution_semoosbp)
-                except IOError:
-                    pass
+            # [-precision, -recall] -> [precision, recall]
+            solutions_semoos, solutions_semoosb, solutions_semoosbp = [(-1 * fold_solutions(store, fold_id)).tolist() for store in stores]
             if solutions_semoos and solutions_semoosb and solutions_semoosbp:
                 filename_pareto_chart = "results/%s/scatter_plots/%s/scatter_%s_fold%d" % (experiment_name, dataset, dataset, fold_id)
                 if not os.path.exists("results/%s/scatter_plots/%s/" % (experiment_name, dataset)):
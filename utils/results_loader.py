@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+
+def raw_results_filename(experiment_name, metric, dataset, clf_name):
+    return "results/%s/raw_results/%s/%s/%s.csv" % (experiment_name, metric, dataset, clf_name)
+
+
+def diversity_results_filename(experiment_name, dataset, clf_name):
+    return "results/%s/diversity_results/%s/%s.csv" % (experiment_name, dataset, clf_name)
+
+
+# Modification times of the result files, None for files which do not exist
+def files_signature(filenames):
+    signature = []
+    for filename in filenames:
+        try:
+            signature.append(os.stat(filename).st_mtime_ns)
+        except OSError:
+            signature.append(None)
+    return signature
+
+
+# The array built from the csv files is saved in results/<experiment_name>/cache/ and read back memory-mapped
+# until any of the files is changed, added or removed
+def cached_array(experiment_name, name, key, filenames, build):
+    cache_dir = "results/%s/cache" % experiment_name
+    digest = hashlib.md5(json.dumps(key).encode()).hexdigest()[:16]
+    array_file = os.path.join(cache_dir, "%s_%s.npy" % (name, digest))
+    signature_file = os.path.join(cache_dir, "%s_%s.json" % (name, digest))
+
+    signature = files_signature(filenames)
+    if os.path.exists(array_file) and os.path.exists(signature_file):
+        with open(signature_file) as file:
+            if json.load(file) == signature:
+                return np.load(array_file, mmap_mode="r")
+
+    array = build()
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    # The array and the signature are written under temporary names of this process, so other scripts never read
+    # a half-written cache and two scripts building the same cache do not write to the same file
+    tmp = ".%d.tmp" % os.getpid()
+    np.save(array_file + tmp + ".npy", array)
+    os.replace(array_file + tmp + ".npy", array_file)
+    with open(signature_file + tmp, "w") as file:
+        json.dump(signature, file)
+    os.replace(signature_file + tmp, signature_file)
+    return np.load(array_file, mmap_mode="r")
+
+
+# Scores of all folds: data_np[dataset, metric, method, fold], missing files give fill_value
+def load_raw_results(experiment_name, datasets, methods, metrics, n_folds, fill_value=0, use_cache=True):
+    datasets, methods, metrics = list(datasets), list(methods), list(metrics)
+    filenames = [raw_results_filename(experiment_name, metric, dataset, clf_name) for dataset in datasets for clf_name in methods for metric in metrics]
+
+    def build():
+        data_np = np.full((len(datasets), len(metrics), len(methods), n_folds), fill_value, dtype=float)
+        for dataset_id, dataset in enumerate(datasets):
+            for clf_id, clf_name in enumerate(methods):
+                for metric_id, metric in enumerate(metrics):
+                    filename = raw_results_filename(experiment_name, metric, dataset, clf_name)
+                    if not os.path.isfile(filename):
+                        continue
+                    try:
+                        data_np[dataset_id, metric_id, clf_id] = np.genfromtxt(filename, delimiter=',', dtype=np.float32)
+                    except ValueError:
+                        print("Error loading data!", dataset, clf_name, metric)
+        return data_np
+
+    if not use_cache:
+        return build()
+    key = ["raw_results", datasets, methods, metrics, n_folds, fill_value]
+    return cached_array(experiment_name, "raw_results", key, filenames, build)
+
+
+# Diversity measures of all folds: diversity[dataset, method, fold, measure], files with only NaN give zeros
+def load_diversity_results(experiment_name, datasets, methods, n_folds, n_measures=4, use_cache=True):
+    datasets, methods = list(datasets), list(methods)
+    filenames = [diversity_results_filename(experiment_name, dataset, clf_name) for dataset in datasets for clf_name in methods]
+
+    def build():
+        diversity = np.zeros((len(datasets), len(methods), n_folds, n_measures))
+        for dataset_id, dataset in enumerate(datasets):
+            for clf_id, clf_name in enumerate(methods):
+                filename = diversity_results_filename(experiment_name, dataset, clf_name)
+                if not os.path.isfile(filename):
+                    continue
+                try:
+                    diversity_raw = np.genfromtxt(filename, delimiter=' ', dtype=np.float32)
+                except ValueError:
+                    print("Error loading diversity data!", dataset, clf_name)
+                    continue
+                if not np.isnan(diversity_raw).all():
+                    diversity[dataset_id, clf_id] = np.nan_to_num(diversity_raw)
+        return diversity
+
+    if not use_cache:
+        return build()
+    key = ["diversity_results", datasets, methods, n_folds, n_measures]
+    return cached_array(experiment_name, "diversity_results", key, filenames, build)
@@ -0,0 +1,71 @@
+import os
+import json
+from collections import namedtuple
+import numpy as np
+from joblib import Parallel, delayed
+
+
+# The smallest unit of an experiment - one method fitted on one fold of one dataset
+Task = namedtuple("Task", ["dataset", "fold_id", "clf_name"])
+
+
+class TaskTimings:
+    # Measured times [s] of tasks from the earlier runs, kept per (dataset, method) in a json file
+    def __init__(self, filename):
+        self.filename = filename
+        self.timings = {}
+        if os.path.exists(filename):
+            with open(filename) as file:
+                self.timings = json.load(file)
+
+    def key(self, dataset, clf_name):
+        return "%s/%s" % (dataset, clf_name)
+
+    def get(self, dataset, clf_name):
+        times = self.timings.get(self.key(dataset, clf_name))
+        return np.mean(times) if times else None
+
+    def record(self, dataset, clf_name, seconds):
+        self.timings.setdefault(self.key(dataset, clf_name), []).append(seconds)
+
+    def save(self):
+        directory = os.path.dirname(self.filename)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.filename + ".tmp", "w") as file:
+            json.dump(self.timings, file)
+        os.replace(self.filename + ".tmp", self.filename)
+
+
+# Cost of the task from the size of the dataset - SVC training grows about with n_samples^2 * n_features,
+# method_weights are relative costs of the methods (e.g. MOO ensembles fit hundreds of SVC)
+def size_cost(task, sizes, method_weights=None):
+    n_samples, n_features = sizes[task.dataset]
+    weight = 1 if method_weights is None else method_weights.get(task.clf_name, 1)
+    return weight * float(n_samples) ** 2 * n_features
+
+
+# Costs of all tasks: measured times where they are known, otherwise the size cost scaled to seconds
+# by the median ratio of time to size cost of the measured tasks
+def task_costs(tasks, sizes, timings=None, method_weights=None):
+    estimated = np.array([size_cost(task, sizes, method_weights) for task in tasks])
+    measured = np.array([np.nan if timings is None else (timings.get(task.dataset, task.clf_name) or np.nan) for task in tasks])
+    known = ~np.isnan(measured)
+    if not np.any(known):
+        return estimated
+    scale = np.median(measured[known] / np.maximum(estimated[known], 1e-12))
+    return np.where(known, measured, estimated * scale)
+
+
+# Longest tasks first - a straggler starts early instead of running alone at the end
+def schedule(tasks, costs):
+    order = np.argsort(-np.asarray(costs), kind="stable")
+    return [tasks[i] for i in order]
+
+
+def run_tasks(function, tasks, costs, n_jobs=-1, backend="loky"):
+    ordered = schedule(tasks, costs)
+    # batch_size=1 - workers take the tasks one by one in the scheduled order
+    return Parallel(n_jobs=n_jobs, backend=backend, batch_size=1, pre_dispatch="n_jobs")(
+                    delayed(function)(task) for task in ordered
+                    )
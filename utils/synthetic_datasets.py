@@ -0,0 +1,95 @@
+import os
+import numpy as np
+from collections import namedtuple
+from sklearn.datasets import make_classification
+
+
+# Parameters of one synthetic dataset: imbalance_ratio - number of majority samples per one minority sample,
+# informative - fraction of informative features, n_categorical - number of nominal features
+DatasetSpec = namedtuple("DatasetSpec", ["n_samples", "n_features", "imbalance_ratio", "informative", "n_categorical", "random_state"])
+
+
+def dataset_spec(n_samples, n_features, imbalance_ratio=9, informative=0.5, n_categorical=0, random_state=0):
+    return DatasetSpec(n_samples, n_features, imbalance_ratio, informative, n_categorical, random_state)
+
+
+# Name without dots, find_datasets() cuts the names at the first dot - fractions are written with "p", e.g. inf0p5
+def dataset_name(spec):
+    return "synthetic-n%d-d%d-ir%s-inf%s-cat%d-rs%d" % (spec.n_samples, spec.n_features, ("%g" % spec.imbalance_ratio).replace(".", "p"), ("%g" % spec.informative).replace(".", "p"), spec.n_categorical, spec.random_state)
+
+
+# All combinations of the sizes, e.g. to find where the methods fall over
+def scaling_grid(n_samples=(500, 1000, 2000, 5000, 10000), n_features=(10, 50), imbalance_ratios=(9,), informative=0.5, n_categorical=0, random_state=0):
+    return [dataset_spec(n, d, ir, informative, n_categorical, random_state) for n in n_samples for d in n_features for ir in imbalance_ratios]
+
+
+# Binary imbalanced problem: X (n_samples x n_features, the first n_categorical features are nominal with values
+# "c0", "c1", ... from quartiles of an informative or noise feature), y - 1 for the minority and 0 for the majority class
+def make_imbalanced(spec, n_categories=4):
+    if spec.n_categorical > spec.n_features:
+        raise ValueError("n_categorical cannot be larger than n_features")
+    n_informative = min(spec.n_features, max(2, int(round(spec.informative * spec.n_features))))
+    minority = 1 / (spec.imbalance_ratio + 1)
+    X, y = make_classification(n_samples=spec.n_samples, n_features=spec.n_features, n_informative=n_informative, n_redundant=0,
+                               n_clusters_per_class=1 if n_informative < 4 else 2, weights=[1 - minority], flip_y=0,
+                               shuffle=True, random_state=spec.random_state)
+    categorical = []
+    for feature_id in range(spec.n_categorical):
+        bins = np.quantile(X[:, feature_id], np.linspace(0, 1, n_categories + 1)[1:-1])
+        categorical.append(np.char.add("c", np.digitize(X[:, feature_id], bins).astype(str)))
+    return X, y, categorical
+
+
+# KEEL .dat file which load_data reads like the datasets in datasets/; rows are written in chunks of chunk_size
+def write_keel(filename, X, y, categorical=(), relation="synthetic", chunk_size=10000):
+    n_categorical = len(categorical)
+    names = ["Atr-%d" % feature_id for feature_id in range(X.shape[1])]
+    directory = os.path.dirname(filename)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(filename + ".tmp", "w") as file:
+        file.write("@relation %s\n" % relation)
+        for feature_id, name in enumerate(names):
+            if feature_id < n_categorical:
+                file.write("@attribute %s {%s}\n" % (name, ", ".join(np.unique(categorical[feature_id]))))
+            else:
+                file.write("@attribute %s real [%r, %r]\n" % (name, float(X[:, feature_id].min()), float(X[:, feature_id].max())))
+        file.write("@attribute Class {positive, negative}\n")
+        file.write("@inputs %s\n" % ", ".join(names))
+        file.write("@outputs Class\n")
+        file.write("@data\n")
+        labels = np.where(y == 1, "positive", "negative")
+        for start in range(0, X.shape[0], chunk_size):
+            stop = start + chunk_size
+            columns = [categorical[feature_id][start:stop] if feature_id < n_categorical else np.char.mod("%.6g", X[start:stop, feature_id]) for feature_id in range(X.shape[1])]
+            columns.append(labels[start:stop])
+            rows = [", ".join(row) for row in zip(*columns)]
+            file.write("\n".join(rows) + "\n")
+    # Renamed when complete, so find_datasets never lists a half-written file
+    os.replace(filename + ".tmp", filename)
+
+
+# Binary format of utils/keel_parser.parse_keel(out=prefix, dtype=np.float32): <prefix>_X.npy (nominal features as
+# codes of the sorted values) and <prefix>_y.npy (int32), which np.load(..., mmap_mode="r") reads without parsing
+def write_npy(prefix, X, y, categorical=()):
+    directory = os.path.dirname(prefix)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    X_out = np.lib.format.open_memmap(prefix + "_X.npy", mode="w+", dtype=np.float32, shape=X.shape)
+    X_out[:] = X
+    for feature_id, column in enumerate(categorical):
+        X_out[:, feature_id] = np.unique(column, return_inverse=True)[1]
+    X_out.flush()
+    np.save(prefix + "_y.npy", y.astype(np.int32))
+
+
+# Generates the datasets which are not in the directory yet and yields their names, like find_datasets(directory),
+# so an experiment script reads them with load_data(directory + "/" + name + ".dat")
+def find_synthetic_datasets(directory, specs, n_categories=4):
+    for spec in specs:
+        name = dataset_name(spec)
+        filename = os.path.join(directory, name + ".dat")
+        if not os.path.exists(filename):
+            X, y, categorical = make_imbalanced(spec, n_categories)
+            write_keel(filename, X, y, categorical, relation=name)
+        yield name